@@ -25,18 +25,2718 @@ CHANGELOG:
 
 import tkinter as tk
 from tkinter import ttk, messagebox, font
+import heapq
 import json
+import math
 import os
 import random
 import time
 import threading
+from collections import deque
+from collections.abc import MutableMapping
 from datetime import datetime
 import hashlib
-import uuid
 import re
+import tracemalloc
+from operator import attrgetter, eq, ge, gt, le, lt, ne
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Optional, Dict, List, Any
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batch simulation and bulk summons fall back to plain Python
+    np = None
+
+class LogBuffer:
+    """Bounded log of structured entries that a Tk Text widget mirrors lazily.
+    
+    add() only appends to a deque capped at capacity; the widget is brought up
+    to date by flush(), which the schedule callback runs at most once per frame
+    no matter how many lines arrived. Timestamps are formatted at flush time and
+    the widget is trimmed from a tracked line count instead of re-reading its
+    text. Set enabled to False to drop everything (headless runs).
+    """
+    
+    def __init__(self, capacity, schedule=None, enabled=True):
+        self.entries = deque(maxlen=capacity)
+        self.capacity = capacity
+        self.schedule = schedule  # schedule(callback) runs callback on the next frame
+        self.enabled = enabled
+        self.widget = None
+        self.pending = 0  # entries added since the last flush
+        self.widget_lines = 0
+        self.redraw = False
+        self.flush_scheduled = False
+    
+    def attach(self, widget, clear=False):
+        """Mirror the log into a Text widget, optionally starting a fresh log"""
+        if clear:
+            self.entries.clear()
+        self.widget = widget
+        self.widget_lines = 0
+        self.redraw = True
+        self.request_flush()
+    
+    def detach(self):
+        """Stop mirroring into the current widget"""
+        self.widget = None
+    
+    def add(self, message, color='white', turn=None):
+        """Record a log line; the widget catches up on the next flush"""
+        if not self.enabled:
+            return
+        self.entries.append({"time": time.time(), "message": message, "color": color, "turn": turn})
+        self.pending += 1
+        self.request_flush()
+    
+    def request_flush(self):
+        """Schedule a flush unless one is already queued"""
+        if self.widget is None or self.flush_scheduled:
+            return
+        if self.schedule is None:
+            self.flush()
+        else:
+            self.flush_scheduled = True
+            self.schedule(self.flush)
+    
+    @staticmethod
+    def format_entry(entry):
+        """Text line for one entry"""
+        if entry["turn"] is not None:
+            return f"[Turn {entry['turn']}] {entry['message']}\n"
+        return f"[{time.strftime('%H:%M:%S', time.localtime(entry['time']))}] {entry['message']}\n"
+    
+    def flush(self):
+        """Write every pending entry to the widget in one insert"""
+        self.flush_scheduled = False
+        if self.widget is None:
+            return
+        
+        pending = min(self.pending, len(self.entries))
+        self.pending = 0
+        if self.redraw or pending >= self.capacity:
+            new_entries = list(self.entries)
+        else:
+            new_entries = list(self.entries)[len(self.entries) - pending:] if pending else []
+        if not new_entries and not self.redraw:
+            return
+        
+        try:
+            self.widget.config(state='normal')
+            if self.redraw or pending >= self.capacity:
+                self.widget.delete('1.0', 'end')
+                self.widget_lines = 0
+            self.redraw = False
+            self.widget.insert('end', "".join(self.format_entry(entry) for entry in new_entries))
+            self.widget_lines += len(new_entries)
+            
+            # Trim to capacity without reading the widget back
+            excess = self.widget_lines - self.capacity
+            if excess > 0:
+                self.widget.delete('1.0', f'{excess + 1}.0')
+                self.widget_lines = self.capacity
+            self.widget.see('end')
+            self.widget.config(state='disabled')
+        except tk.TclError:
+            # Widget was destroyed with its screen
+            self.widget = None
+
+class EffectStore(list):
+    """Status effects of one combatant, indexed by type and by (type, source).
+    
+    It is still a list of effect dicts, so display code can iterate it and saves
+    serialize it as before, but lookups go through the indexes and durations
+    live in expiry buckets keyed by the store's own turn clock. Ticking a turn
+    only touches the effects whose bucket comes due instead of decrementing
+    every counter, so an effect's "turns" is its duration when applied; ask
+    turns_left() for what remains.
+    """
+    
+    def __init__(self, effects=()):
+        super().__init__()
+        self.by_type = {}
+        self.by_source = {}
+        self.expiry = {}  # clock turn -> effects that run out on that tick
+        self.expires_at = {}  # id(effect) -> clock turn
+        self.clock = 0
+        for effect in effects:
+            self.add(effect)
+    
+    @classmethod
+    def of(cls, unit):
+        """Return the unit's EffectStore, converting a plain effect list in place"""
+        effects = unit.get("effects")
+        if not isinstance(effects, cls):
+            effects = cls(effects or [])
+            unit["effects"] = effects
+        return effects
+    
+    def add(self, effect):
+        """Add an effect and schedule its expiry"""
+        super().append(effect)
+        self.by_type.setdefault(effect.get("type"), []).append(effect)
+        self.by_source.setdefault((effect.get("type"), effect.get("source")), []).append(effect)
+        if effect.get("turns", 0) > 0:
+            expires_at = self.clock + effect["turns"]
+            self.expires_at[id(effect)] = expires_at
+            self.expiry.setdefault(expires_at, []).append(effect)
+        return effect
+    
+    append = add  # Older call sites treat the store as a plain list
+    
+    def __reduce__(self):
+        """Copies rebuild the identity-keyed indexes from the remaining turns"""
+        return (self.__class__, ([dict(effect, turns=self.turns_left(effect)) if effect.get("turns", 0) > 0 else effect
+                                  for effect in self],))
+    
+    def find(self, effect_type, source=None):
+        """First effect of a type (optionally from one source), or None"""
+        if source is None:
+            effects = self.by_type.get(effect_type)
+        else:
+            effects = self.by_source.get((effect_type, source))
+        return effects[0] if effects else None
+    
+    def of_type(self, effect_type):
+        """All effects of a type, oldest first"""
+        return list(self.by_type.get(effect_type, []))
+    
+    def has(self, effect_type):
+        """True if any effect of this type is active"""
+        return bool(self.by_type.get(effect_type))
+    
+    def discard(self, effect):
+        """Remove one effect from the store and its indexes"""
+        super().remove(effect)
+        self.by_type[effect.get("type")].remove(effect)
+        self.by_source[(effect.get("type"), effect.get("source"))].remove(effect)
+        expires_at = self.expires_at.pop(id(effect), None)
+        if expires_at is not None:
+            self.expiry[expires_at].remove(effect)
+    
+    def remove_type(self, effect_type, source=None):
+        """Remove every effect of a type (optionally only from one source)"""
+        if source is None:
+            effects = self.by_type.get(effect_type, [])
+        else:
+            effects = self.by_source.get((effect_type, source), [])
+        for effect in list(effects):
+            self.discard(effect)
+    
+    def add_stack(self, effect, max_stacks):
+        """Add one stack to the existing effect of this type, or add the effect"""
+        existing = self.find(effect["type"])
+        if existing:
+            existing["stacks"] = min(existing["stacks"] + 1, max_stacks)
+            return existing
+        return self.add(effect)
+    
+    def turns_left(self, effect):
+        """Remaining turns of an effect"""
+        expires_at = self.expires_at.get(id(effect))
+        if expires_at is None:
+            return effect.get("turns", 0)
+        return expires_at - self.clock
+    
+    def tick(self):
+        """Advance one turn and return the effects that expired"""
+        self.clock += 1
+        expired = self.expiry.pop(self.clock, [])
+        for effect in expired:
+            del self.expires_at[id(effect)]
+            super().remove(effect)
+            self.by_type[effect.get("type")].remove(effect)
+            self.by_source[(effect.get("type"), effect.get("source"))].remove(effect)
+        return expired
+
+RUNE_FIELDS = ("id", "name", "type", "rarity", "level", "main_stat", "main_value", "substats",
+               "set", "equipped_unit", "equipped_slot", "locked")
+RUNE_FIELD_SET = frozenset(RUNE_FIELDS)
+RUNE_STRING_FIELDS = frozenset(("name", "type", "rarity", "main_stat", "set"))
+RUNE_COLUMN_CODES = ("rarity", "type", "set", "main_stat", "name")  # Strings kept as small codes
+RUNE_COLUMN_FIELDS = frozenset(RUNE_COLUMN_CODES + ("level", "main_value", "substats", "equipped_unit", "locked"))
+read_column_fields = attrgetter(*RUNE_COLUMN_CODES, "level", "main_value", "equipped_unit", "locked")
+
+# Rune search: set:Nightmare main:Attack% sub:"Crit Rate">=5 level>=9 unequipped sort:rarity,level
+RUNE_QUERY_TOKEN = re.compile(r'(-?)(?:(\w+):)?("[^"]*"|[^\s"<>=!]+)(?:(>=|<=|!=|=|<|>)(-?\d+(?:\.\d+)?))?(?=\s|$)')
+RUNE_QUERY_OPERATORS = {">=": ge, "<=": le, ">": gt, "<": lt, "=": eq, "!=": ne}
+RUNE_QUERY_CODES = {"set": "set", "type": "type", "main": "main_stat", "rarity": "rarity"}
+RUNE_QUERY_NUMBERS = {"level": "level", "value": "main_value"}
+RUNE_QUERY_FLAGS = {"equipped": ("equipped", True), "unequipped": ("equipped", False),
+                    "locked": ("locked", True), "unlocked": ("locked", False)}
+RUNE_SORT_KEYS = {"name": ("name", False), "rarity": ("rarity", True), "type": ("type", False),
+                  "level": ("level", True), "set": ("set", False), "main": ("main_stat", False),
+                  "value": ("main_value", True)}
+
+def parse_rune_query(text):
+    """Parse a rune search into filter terms and an optional sort order.
+    
+    Each term is (negate, kind, field, op, value), with strings lowercased so
+    matching ignores case. Bare words search rune names, a leading - negates a
+    term and sort: takes a comma separated list of RUNE_SORT_KEYS. Raises
+    ValueError on anything it can't read.
+    """
+    terms, order_by = [], None
+    pos = 0
+    while True:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos == len(text):
+            break
+        match = RUNE_QUERY_TOKEN.match(text, pos)
+        if not match:
+            raise ValueError(f"Can't read '{text[pos:].split()[0]}'")
+        pos = match.end()
+        negate, key, word, op, number = match.groups()
+        word = word.strip('"')
+        if op:
+            op, number = RUNE_QUERY_OPERATORS[op], float(number)
+        negate, key, lowered = bool(negate), (key or "").lower(), word.lower()
+        
+        if key == "sort" and not op and not negate:
+            order_by = []
+            for name in lowered.split(","):
+                if name not in RUNE_SORT_KEYS:
+                    raise ValueError(f"Can't sort by '{name}'")
+                order_by.append(RUNE_SORT_KEYS[name])
+        elif key == "main" and op:
+            # One term, so a leading - negates the stat and the comparison together
+            terms.append((negate, "main", lowered, op, number))
+        elif key in RUNE_QUERY_CODES:
+            if op:
+                raise ValueError(f"'{key}:' can't be compared with a number")
+            terms.append((negate, "code", RUNE_QUERY_CODES[key], None, lowered))
+        elif key == "sub":
+            terms.append((negate, "sub", lowered, op, number))
+        elif key == "name" and not op:
+            terms.append((negate, "name", None, None, lowered))
+        elif not key and lowered in RUNE_QUERY_NUMBERS and op:
+            terms.append((negate, "number", RUNE_QUERY_NUMBERS[lowered], op, number))
+        elif not key and lowered in RUNE_QUERY_FLAGS and not op:
+            field, value = RUNE_QUERY_FLAGS[lowered]
+            terms.append((negate, "flag", field, None, value))
+        elif not key and not op:
+            terms.append((negate, "name", None, None, lowered))
+        else:
+            raise ValueError(f"Unknown filter '{match.group(0)}'")
+    return terms, order_by
+
+def rune_matches_query(rune, terms):
+    """Check one rune against parsed query terms, without the columns"""
+    for negate, kind, field, op, value in terms:
+        if kind == "code":
+            hit = str(rune.get(field)).lower() == value
+        elif kind == "name":
+            hit = value in str(rune.get("name")).lower()
+        elif kind == "number":
+            hit = op(rune.get(field) or 0, value)
+        elif kind == "main":
+            hit = str(rune.get("main_stat")).lower() == field and op(rune.get("main_value") or 0, value)
+        elif kind == "flag":
+            if field == "equipped":
+                hit = (rune.get("equipped_unit") is not None) == value
+            else:
+                hit = bool(rune.get("locked")) == value
+        else:
+            amount = next((amount for stat, amount in (rune.get("substats") or {}).items()
+                           if stat.lower() == field), None)
+            hit = amount is not None and (op is None or op(amount, value))
+        if hit == negate:
+            return False
+    return True
+
+
+MISSING = object()  # Marks a rune field that an older save never had
+read_rune_fields = attrgetter(*RUNE_FIELDS)
+rune_strings = {}  # One shared copy of each repeated rune string
+
+def intern_rune_string(value):
+    """Shared copy of a rune name, type, stat or set string"""
+    return rune_strings.setdefault(value, value)
+
+class Rune(MutableMapping):
+    """One rune, stored in slots instead of a dict.
+    
+    Runes still behave like the dicts they replaced: rune["level"], rune.get("set"),
+    "set" in rune, dict(rune) and == against a dict all work, so UI and save code is
+    unchanged. Repeated strings are interned, which matters most for runes parsed
+    from a save, where every field arrives as a fresh string. Keys outside the usual
+    fields live in a small extra dict. A rune in a RuneStore tells the store when
+    any field is assigned, so saves and columns only revisit the runes that changed.
+    """
+    
+    __slots__ = RUNE_FIELDS + ("extra", "owner")
+    
+    def __init__(self, fields=()):
+        self.extra = None
+        self.owner = None
+        for key in RUNE_FIELDS:
+            setattr(self, key, MISSING)
+        for key, value in dict(fields).items():
+            self[key] = value
+            
+    def __getitem__(self, key):
+        if key in RUNE_FIELD_SET:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+    
+    def __setitem__(self, key, value):
+        if key in RUNE_FIELD_SET:
+            if key in RUNE_STRING_FIELDS and isinstance(value, str):
+                value = intern_rune_string(value)
+            elif key == "substats":
+                value = {intern_rune_string(stat): amount for stat, amount in value.items()}
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+        if self.owner is not None:
+            self.owner.mark(self, key)
+            
+    def __delitem__(self, key):
+        if key in RUNE_FIELD_SET and getattr(self, key) is not MISSING:
+            setattr(self, key, MISSING)
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+        if self.owner is not None:
+            self.owner.mark(self, key)
+        
+    def __iter__(self):
+        for key, value in zip(RUNE_FIELDS, read_rune_fields(self)):
+            if value is not MISSING:
+                yield key
+        if self.extra:
+            yield from self.extra
+            
+    def __len__(self):
+        return sum(1 for _ in self)
+    
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, Rune):
+            other = other.to_dict()
+        elif not isinstance(other, dict):
+            return NotImplemented
+        return self.to_dict() == other
+    
+    def __reduce__(self):
+        return (Rune, (self.to_dict(),))
+    
+    def __repr__(self):
+        return f"Rune({self.to_dict()!r})"
+    
+    def copy(self):
+        return Rune(self.to_dict())
+    
+    def to_dict(self):
+        """Plain dict with its own substats, as saved"""
+        data = dict(zip(RUNE_FIELDS, read_rune_fields(self)))
+        if MISSING in data.values():
+            data = {key: value for key, value in data.items() if value is not MISSING}
+        if "substats" in data:
+            data["substats"] = dict(data["substats"])
+        if self.extra:
+            data.update(self.extra)
+        return data
+    
+def benchmark_rune_memory(runes):
+    """Bytes held by saved runes loaded as plain dicts versus as Runes.
+    
+    Both are parsed from the same JSON, the way a save is loaded, so neither side
+    shares strings with the live game except through the intern pool.
+    """
+    payload = json.dumps([dict(rune) if isinstance(rune, Rune) else rune for rune in runes])
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        as_dicts = json.loads(payload)
+        dict_bytes = tracemalloc.get_traced_memory()[0] - base
+        del as_dicts
+        
+        base = tracemalloc.get_traced_memory()[0]
+        as_runes = [Rune(rune) for rune in json.loads(payload)]
+        rune_bytes = tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+    return {"count": len(as_runes), "dict_bytes": dict_bytes, "rune_bytes": rune_bytes}
+
+class RuneStore(list):
+    """The player's runes, indexed by id.
+    
+    It stays a plain list of Runes for iteration and saving, but every add and
+    remove also maintains by_id, so finding an equipped rune is a dict lookup
+    instead of a scan over the whole rune inventory. positions maps ids to list
+    indexes, so removing one rune swaps the last rune into its place in O(1). Plain rune dicts are turned
+    into Runes as they are added. Once the rune screen asks for columns, they are
+    kept in step with every add and remove too. Stored runes report field changes
+    here, and unsaved remembers which runes changed since the last save.
+    """
+    
+    def __init__(self, runes=()):
+        super().__init__()
+        self.by_id = {}
+        self.positions = {}
+        self.next_id = 1
+        self.columns = None
+        self.unsaved = {}  # Rune id -> rune changed since the last save, or None once removed
+        self.extend(runes)
+        
+    def get_columns(self):
+        """NumPy columns mirroring the store, built on first use; None without NumPy"""
+        if np is None:
+            return None
+        if self.columns is None:
+            self.columns = RuneColumns(self)
+        return self.columns
+    
+    def get(self, rune_id):
+        """Return the rune with this id, or None"""
+        return self.by_id.get(rune_id)
+    
+    def new_id(self):
+        """Small integer id for a new rune; runes from older saves keep their uuid strings"""
+        rune_id = self.next_id
+        self.next_id += 1
+        return rune_id
+    
+    def add(self, rune):
+        """Add a rune to the inventory"""
+        if not isinstance(rune, Rune):
+            rune = Rune(rune)
+        self.positions[rune["id"]] = len(self)
+        super().append(rune)
+        self.by_id[rune["id"]] = rune
+        self.unsaved[rune["id"]] = rune
+        rune.owner = self
+        if isinstance(rune["id"], int) and rune["id"] >= self.next_id:
+            self.next_id = rune["id"] + 1
+        if self.columns is not None:
+            self.columns.add(rune)
+        return rune
+    
+    append = add
+    
+    def extend(self, runes):
+        for rune in runes:
+            self.add(rune)
+    
+    def remove(self, rune):
+        """Remove a rune from the inventory; the last rune moves into its place"""
+        idx = self.positions.get(rune["id"])
+        if idx is None or self[idx] is not rune:
+            raise ValueError("rune not in store")
+        last = super().pop()
+        if last is not rune:
+            self[idx] = last
+            self.positions[last["id"]] = idx
+        del self.positions[rune["id"]]
+        del self.by_id[rune["id"]]
+        self.unsaved[rune["id"]] = None
+        rune.owner = None
+        if self.columns is not None:
+            self.columns.remove(rune, successor=last if last is not rune else None)
+    
+    def remove_many(self, runes):
+        """Remove many runes with one pass over the list, keeping the others in order"""
+        doomed = {id(rune): rune for rune in runes}
+        kept = [rune for rune in self if id(rune) not in doomed]
+        if len(kept) != len(self) - len(doomed):
+            raise ValueError("rune not in store")
+        self[:] = kept
+        self.positions = {rune["id"]: idx for idx, rune in enumerate(kept)}
+        for rune in doomed.values():
+            del self.by_id[rune["id"]]
+            self.unsaved[rune["id"]] = None
+            rune.owner = None
+            if self.columns is not None:
+                self.columns.remove(rune)
+                
+    def discard(self, rune_id):
+        """Remove the rune with this id if present and return it"""
+        rune = self.by_id.get(rune_id)
+        if rune is not None:
+            self.remove(rune)
+        return rune
+    
+    def mark(self, rune, key):
+        """Called by a stored rune whenever one of its fields is assigned"""
+        self.unsaved[rune["id"]] = rune
+        if self.columns is not None and key in RUNE_COLUMN_FIELDS:
+            self.columns.mark(rune)
+            
+    def take_unsaved(self):
+        """Runes changed since the last call, by id (None for removed ones)"""
+        unsaved, self.unsaved = self.unsaved, {}
+        return unsaved
+    
+    def copy(self):
+        return list(self)
+    
+class UnitInventory(list):
+    """The player's units, remembering which changed since the last save.
+    
+    Every unit carries a stable "uid", so the save journal can record one unit's
+    change or removal without rewriting the units after it. Adds and removals are
+    seen here; code that changes a unit in place calls mark(unit). Units from saves
+    older than uids are numbered by position (see number_units).
+    """
+    
+    def __init__(self, units=()):
+        super().__init__(units)
+        self.next_uid = number_units(self)
+        self.by_uid = {unit["uid"]: unit for unit in self}
+        self.unsaved = dict(self.by_uid)  # uid -> unit changed since the last save, or None once removed
+        
+    def add(self, unit):
+        """Add a unit under a new uid"""
+        unit["uid"] = self.next_uid
+        self.next_uid += 1
+        super().append(unit)
+        self.by_uid[unit["uid"]] = unit
+        self.unsaved[unit["uid"]] = unit
+        return unit
+    
+    append = add
+    
+    def extend(self, units):
+        for unit in units:
+            self.add(unit)
+            
+    def pop(self, idx=-1):
+        unit = super().pop(idx)
+        del self.by_uid[unit["uid"]]
+        self.unsaved[unit["uid"]] = None
+        return unit
+    
+    def remove(self, unit):
+        self.pop(next(idx for idx, owned in enumerate(self) if owned is unit))
+        
+    def mark(self, unit):
+        """Note that an owned unit was changed in place; copies of it are ignored"""
+        uid = unit.get("uid")
+        if self.by_uid.get(uid) is unit:
+            self.unsaved[uid] = unit
+            
+    def take_unsaved(self):
+        """Units changed since the last call, by uid (None for removed ones)"""
+        unsaved, self.unsaved = self.unsaved, {}
+        return unsaved
+    
+    def copy(self):
+        return list(self)
+    
+class RuneColumns:
+    """A RuneStore mirrored into NumPy columns for vectorized filters and sorts.
+    
+    Rarity, type, set, main stat and name are stored as small integer codes, next to
+    level, main value and equipped and locked flags, and each substat gets a value column
+    that is NaN for runes without it. The code and substat columns are the
+    secondary indexes rune searches run against. Rows are swap-removed, so an order
+    column remembers the store's own order and keeps sorts stable the way
+    list.sort was. A rune marks itself dirty when a mirrored field, substats
+    included, is assigned, and its row is rewritten before the next query. Editing
+    a stored rune's substats dict in place is not seen; assign a new dict instead.
+    """
+    
+    NUMBERS = ("level", "main_value", "equipped", "locked", "order")
+    
+    def __init__(self, runes=()):
+        self.codes = {field: {} for field in RUNE_COLUMN_CODES}   # string -> code
+        self.labels = {field: [] for field in RUNE_COLUMN_CODES}  # code -> string
+        self.data = {field: np.zeros(0, dtype=np.int32) for field in RUNE_COLUMN_CODES + self.NUMBERS}
+        self.data["order"] = np.zeros(0, dtype=np.int64)
+        self.substats = {}  # Stat -> value column
+        self.runes = []  # Row -> rune
+        self.rows = {}   # id(rune) -> row
+        self.dirty = {}
+        self.count = 0
+        self.next_order = 0
+        self.extend(runes)
+    
+    def code(self, field, value):
+        codes = self.codes[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.labels[field].append(value)
+        return code
+    
+    def column_values(self, runes):
+        """Column values for many runes: coded strings first, then level, main value and the flags"""
+        # Straight from the slots; Rune.get goes through the generic Mapping path
+        fields = list(zip(*map(read_column_fields, runes)))
+        columns = []
+        for field, values in zip(RUNE_COLUMN_CODES, fields):
+            codes = self.codes[field]
+            for value in set(values) - codes.keys():
+                self.code(field, value)
+            columns.append(list(map(codes.__getitem__, values)))
+        for values in fields[5:7]:
+            try:
+                columns.append(np.array(values, dtype=np.int64))
+            except (TypeError, ValueError):  # Missing or None in an older save
+                columns.append([int(value or 0) if value is not MISSING else 0 for value in values])
+        columns.append([value is not None and value is not MISSING for value in fields[7]])
+        columns.append([value is not MISSING and bool(value) for value in fields[8]])
+        return columns
+    
+    def reserve(self, size):
+        capacity = len(self.data["order"])
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 1024)
+        for columns in (self.data, self.substats):
+            for field, column in columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:self.count] = column[:self.count]
+                columns[field] = grown
+                
+    def write_rows(self, rows, runes):
+        """Write the column values of runes into rows"""
+        for field, values in zip(RUNE_COLUMN_CODES + self.NUMBERS, self.column_values(runes)):
+            self.data[field][rows] = values
+        by_stat = {}
+        for row, substats in zip(rows.tolist(), map(attrgetter("substats"), runes)):
+            if substats and substats is not MISSING:
+                for stat, amount in substats.items():
+                    stat_rows, amounts = by_stat.setdefault(stat, ([], []))
+                    stat_rows.append(row)
+                    amounts.append(amount)
+        for column in self.substats.values():
+            column[rows] = np.nan
+        for stat, (stat_rows, amounts) in by_stat.items():
+            if stat not in self.substats:
+                self.substats[stat] = np.full(len(self.data["order"]), np.nan)
+            self.substats[stat][stat_rows] = amounts
+            
+    def extend(self, runes):
+        """Append rows for many runes in one pass"""
+        runes = list(runes)
+        if not runes:
+            return
+        start, end = self.count, self.count + len(runes)
+        self.reserve(end)
+        self.write_rows(np.arange(start, end), runes)
+        self.data["order"][start:end] = np.arange(self.next_order, self.next_order + len(runes))
+        for row, rune in enumerate(runes, start):
+            self.rows[id(rune)] = row
+        self.runes.extend(runes)
+        self.count = end
+        self.next_order += len(runes)
+        
+    def add(self, rune):
+        self.extend((rune,))
+    
+    def remove(self, rune, successor=None):
+        """Drop a rune's row; successor, if given, takes over its place in the store order"""
+        row = self.rows.pop(id(rune))
+        if successor is not None:
+            self.data["order"][self.rows[id(successor)]] = self.data["order"][row]
+        last = self.count - 1
+        if row != last:
+            for columns in (self.data, self.substats):
+                for column in columns.values():
+                    column[row] = column[last]
+            moved = self.runes[last]
+            self.runes[row] = moved
+            self.rows[id(moved)] = row
+        self.runes.pop()
+        self.count = last
+        self.dirty.pop(id(rune), None)
+    
+    def mark(self, rune):
+        """Called by the store when a rune's mirrored fields changed"""
+        self.dirty[id(rune)] = rune
+    
+    def refresh(self):
+        """Rewrite the rows of runes changed since the last query"""
+        if self.dirty:
+            rows = np.array([self.rows[key] for key in self.dirty], dtype=np.int64)
+            self.write_rows(rows, list(self.dirty.values()))
+            self.dirty.clear()
+            
+    def term_mask(self, term):
+        """Boolean row mask for one parsed query term"""
+        negate, kind, field, op, value = term
+        count = self.count
+        if kind == "code":
+            codes = [code for label, code in self.codes[field].items() if str(label).lower() == value]
+            mask = np.isin(self.data[field][:count], codes)
+        elif kind == "name":
+            codes = [code for label, code in self.codes["name"].items() if value in str(label).lower()]
+            mask = np.isin(self.data["name"][:count], codes)
+        elif kind == "number":
+            mask = op(self.data[field][:count], value)
+        elif kind == "main":
+            codes = [code for label, code in self.codes["main_stat"].items() if str(label).lower() == field]
+            mask = np.isin(self.data["main_stat"][:count], codes) & op(self.data["main_value"][:count], value)
+        elif kind == "flag":
+            mask = self.data[field][:count] == value
+        else:
+            mask = np.zeros(count, dtype=bool)
+            for stat, column in self.substats.items():
+                if stat.lower() == field:
+                    amounts = column[:count]
+                    present = ~np.isnan(amounts)
+                    mask |= present if op is None else present & op(amounts, value)
+        return ~mask if negate else mask
+    
+    def sort_key(self, field, rows, ranks):
+        """Column values for rows, with coded strings turned into their sort rank"""
+        column = self.data[field][rows]
+        if field not in self.codes:
+            return column
+        labels = self.labels[field]
+        if field in ranks:
+            table = np.array([ranks[field].get(label, 0) for label in labels], dtype=np.int64)
+        else:
+            table = np.zeros(len(labels), dtype=np.int64)
+            by_label = sorted(range(len(labels)), key=lambda code: (labels[code] is not None, labels[code] or ""))
+            table[by_label] = np.arange(len(labels))
+        return table[column] if len(table) else column.astype(np.int64)
+    
+    def select(self, rarities=None, types=None, equipped=None, terms=(), order_by=(), ranks=None):
+        """Runes matching every given filter, sorted like list.sort would.
+        
+        rarities and types are the allowed strings, equipped a bool and terms come
+        from parse_rune_query. order_by is a list of (field, descending) pairs, most
+        significant first; coded fields sort alphabetically unless ranks maps the
+        field to a {string: rank} dict.
+        """
+        self.refresh()
+        mask = np.ones(self.count, dtype=bool)
+        for field, allowed in (("rarity", rarities), ("type", types)):
+            if allowed is not None:
+                codes = [self.codes[field][value] for value in allowed if value in self.codes[field]]
+                mask &= np.isin(self.data[field][:self.count], codes)
+        if equipped is not None:
+            mask &= self.data["equipped"][:self.count] == equipped
+        for term in terms:
+            mask &= self.term_mask(term)
+        rows = np.flatnonzero(mask)
+        
+        # lexsort takes its most significant key last; the order column breaks ties
+        keys = [self.data["order"][rows]]
+        for field, descending in reversed(order_by):
+            key = self.sort_key(field, rows, ranks or {})
+            keys.append(-key if descending else key)
+        rows = rows[np.lexsort(keys)]
+        runes = self.runes
+        return [runes[row] for row in rows.tolist()]
+
+
+class AliasTable:
+    """Walker's alias method: weighted random choice in O(1) after O(n) setup"""
+    
+    def __init__(self, weights):
+        self.items = list(weights)
+        count = len(self.items)
+        total = sum(weights.values())
+        scaled = [weights[item] * count / total for item in self.items]
+        
+        # Pair each under-full column with an over-full one that tops it up
+        self.prob = [1.0] * count
+        self.alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            low = small.pop()
+            high = large.pop()
+            self.prob[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1 - scaled[low]
+            if scaled[high] < 1:
+                small.append(high)
+            else:
+                large.append(high)
+        # Whatever is left is full up to rounding and keeps prob 1
+    
+    def sample(self, rng=random):
+        """Draw one item"""
+        column = int(rng.random() * len(self.items))
+        if rng.random() < self.prob[column]:
+            return self.items[column]
+        return self.items[self.alias[column]]
+    
+    def sample_indices(self, count, generator):
+        """Draw count item indices at once with a NumPy generator"""
+        if not hasattr(self, 'prob_array'):
+            self.prob_array = np.array(self.prob)
+            self.alias_array = np.array(self.alias)
+        columns = generator.integers(0, len(self.items), count)
+        keep = generator.random(count) < self.prob_array[columns]
+        return np.where(keep, columns, self.alias_array[columns])
+    
+
+class TurnScheduler:
+    """ATB-style turn queue for one battle.
+    
+    Every combatant fills an action gauge at its speed and acts when the gauge
+    reaches GAUGE_SIZE. Entries sit in a heap keyed by the moment their gauge
+    fills, so popping the next actor, removing a dead one and re-timing a unit
+    after a speed change are all O(log n). Stale heap entries are invalidated
+    in place and skipped when they surface.
+    """
+    
+    GAUGE_SIZE = 1000
+    
+    def __init__(self):
+        self.heap = []
+        self.entries = {}  # id(unit) -> live heap entry [ready_at, order, combatant]
+        self.clock = 0.0
+        self.order = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def push(self, combatant, ready_at):
+        """Queue a combatant to act at ready_at"""
+        entry = [ready_at, self.order, combatant]
+        self.order += 1
+        self.entries[id(combatant["unit"])] = entry
+        heapq.heappush(self.heap, entry)
+    
+    def add(self, combatant):
+        """Add a combatant with an empty gauge"""
+        self.push(combatant, self.clock + self.GAUGE_SIZE / max(1, combatant["speed"]))
+    
+    def remove(self, unit):
+        """Drop a unit from the queue (e.g. when it dies)"""
+        entry = self.entries.pop(id(unit), None)
+        if entry:
+            entry[2] = None
+    
+    def set_speed(self, unit, speed):
+        """Change a unit's speed, keeping the gauge it has already filled"""
+        entry = self.entries.get(id(unit))
+        if not entry or entry[2]["speed"] == speed:
+            return
+        combatant = entry[2]
+        gauge_left = (entry[0] - self.clock) * max(1, combatant["speed"])
+        entry[2] = None
+        combatant["speed"] = speed
+        self.push(combatant, self.clock + gauge_left / max(1, speed))
+    
+    def pop(self):
+        """Advance the clock to the next full gauge and return that combatant"""
+        while self.heap:
+            ready_at, order, combatant = heapq.heappop(self.heap)
+            if combatant is None:
+                continue
+            self.clock = ready_at
+            # Gauge empties and starts refilling straight away
+            self.push(combatant, ready_at + self.GAUGE_SIZE / max(1, combatant["speed"]))
+            return combatant
+        return None
+    
+    def preview(self, count, is_alive=None):
+        """Return the next count combatants to act without changing the queue.
+        
+        Walks the heap lazily from its root: a small frontier holds the children of
+        entries already passed plus each previewed combatant's next turn, so only
+        about count entries are looked at. Next turns get tie-break orders the way
+        pop() hands them out, so ties come out in the real order.
+        """
+        heap = self.heap
+        frontier = [(heap[0][0], heap[0][1], 0, heap[0][2])] if heap else []
+        order = self.order
+        preview = []
+        while frontier and len(preview) < count:
+            ready_at, _, idx, combatant = heapq.heappop(frontier)
+            if idx >= 0:
+                for child in (2 * idx + 1, 2 * idx + 2):
+                    if child < len(heap):
+                        entry = heap[child]
+                        heapq.heappush(frontier, (entry[0], entry[1], child, entry[2]))
+            if combatant is None or (is_alive is not None and not is_alive(combatant["unit"])):
+                continue
+            preview.append(combatant)
+            # idx -1: a turn that exists only in the preview, with no children to visit
+            heapq.heappush(frontier, (ready_at + self.GAUGE_SIZE / max(1, combatant["speed"]), order, -1, combatant))
+            order += 1
+        return preview
+
+class BattleEngine:
+    """Headless battle rules shared by the GUI and offline simulations.
+    
+    The engine owns the team, the enemy waves and the turn order, and resolves
+    every action synchronously. It never touches Tkinter: log lines and state
+    changes are reported to observers registered with add_observer(), so the
+    battle screen is just one observer and simulations can run with none.
+    """
+    
+    MAX_SP = 150
+    
+    def __init__(self, team, waves, rng=None, skill_costs=None, is_boss_stage=False):
+        self.team = team
+        self.waves = waves if waves else [[]]
+        self.rng = rng if rng is not None else random.Random()
+        self.skill_costs = skill_costs if skill_costs is not None else {}
+        self.is_boss_stage = is_boss_stage
+        self.current_wave = 1
+        self.total_waves = len(self.waves)
+        self.enemies = self.waves[0]
+        self.scheduler = None
+        self.current = None
+        self.turns_taken = 0
+        self.result = None
+        self.observers = []
+        for unit in self.team + self.enemies:
+            EffectStore.of(unit)
+    
+    @staticmethod
+    def prepare_unit(unit, final_stats, sp):
+        """Reset a team unit's battle fields from its final calculated stats"""
+        unit["battle_stats"] = final_stats
+        unit["battle_hp"] = final_stats["hp"]
+        unit["max_hp"] = final_stats["hp"]
+        unit["max_sp"] = final_stats["sp_cap"]
+        unit["sp"] = sp
+        unit["effects"] = EffectStore()
+        unit["defending"] = False
+        # Jeff starts with 1 ghost stack (Go to Sleep passive)
+        if unit["entity"]["name"] == "Jeff the Killer":
+            unit["effects"].add({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
+    
+    def add_observer(self, callback):
+        """Register callback(event, data) for engine events"""
+        self.observers.append(callback)
+    
+    def notify(self, event, **data):
+        """Send an event to every observer"""
+        for callback in self.observers:
+            callback(event, data)
+    
+    def log(self, message):
+        """Report a battle log line to observers"""
+        if self.observers:
+            self.notify("log", message=message)
+    
+    @staticmethod
+    def get_unit_name(unit):
+        """Get the display name of a unit"""
+        if "entity" in unit:
+            return unit["entity"]["name"]
+        return unit.get("name", "Unknown")
+    
+    def alive_team(self):
+        """Team units that can still fight"""
+        return [unit for unit in self.team if unit["battle_hp"] > 0]
+    
+    def alive_enemies(self):
+        """Enemies of the current wave that can still fight"""
+        return [enemy for enemy in self.enemies if enemy["hp"] > 0]
+    
+    def get_outcome(self):
+        """Return None while the battle continues, else 'defeat', 'wave_cleared' or 'victory'"""
+        if not any(unit["battle_hp"] > 0 for unit in self.team):
+            return "defeat"
+        if not any(enemy["hp"] > 0 for enemy in self.enemies):
+            if self.current_wave < self.total_waves:
+                return "wave_cleared"
+            return "victory"
+        return None
+    
+    def finish(self, result):
+        """Record the final result and tell observers"""
+        self.result = result
+        self.notify("battle_end", result=result)
+    
+    def start_next_wave(self):
+        """Advance to the next enemy wave and partially heal the team"""
+        self.current_wave += 1
+        self.enemies = self.waves[self.current_wave - 1]
+        self.scheduler = None
+        for enemy in self.enemies:
+            EffectStore.of(enemy)
+        
+        # Heal team members between waves
+        heal_percentage = 0.3 if self.is_boss_stage else 0.25  # More healing for boss stages
+        sp_recovery = 40 if self.is_boss_stage else 30  # More SP for boss stages
+        
+        for unit in self.team:
+            if unit['battle_hp'] > 0:  # Only heal living units
+                max_hp = unit.get('battle_stats', {}).get('hp', unit.get('max_hp', 100))
+                heal_amount = int(max_hp * heal_percentage)
+                unit['battle_hp'] = min(unit['battle_hp'] + heal_amount, max_hp)
+                unit['sp'] = min(unit['sp'] + sp_recovery, self.MAX_SP)
+        
+        # Special message for boss waves
+        if self.is_boss_stage and self.current_wave == self.total_waves:
+            self.log("👑 FINAL WAVE! The boss emerges! Team healed for the ultimate challenge!")
+        elif self.is_boss_stage:
+            self.log(f"🌊 Boss Stage Wave {self.current_wave}/{self.total_waves} - Team healed, prepare for escalating difficulty!")
+        else:
+            self.log(f"🌊 Wave {self.current_wave}/{self.total_waves} begins! Team partially healed.")
+        self.notify("wave_start", wave=self.current_wave)
+    
+    @staticmethod
+    def is_alive(unit):
+        """True while a team unit or enemy still has HP"""
+        if "entity" in unit:
+            return unit["battle_hp"] > 0
+        return unit["hp"] > 0
+    
+    @staticmethod
+    def get_speed(unit):
+        """Current speed of a combatant, including runes and slow debuffs"""
+        if "entity" in unit:
+            speed = unit.get("battle_stats", unit["entity"])["speed"]
+        else:
+            speed = unit["speed"]
+        if EffectStore.of(unit).has("slow"):
+            speed = int(speed * 0.7)  # Slowed units fill their gauge 30% slower
+        return max(1, speed)
+    
+    def create_turn_order(self):
+        """Start a fresh turn scheduler with every living combatant"""
+        self.scheduler = TurnScheduler()
+        
+        for unit in self.team:
+            if unit["battle_hp"] > 0:
+                self.scheduler.add({"type": "player", "unit": unit, "speed": self.get_speed(unit)})
+        
+        for enemy in self.enemies:
+            if enemy["hp"] > 0:
+                self.scheduler.add({"type": "enemy", "unit": enemy, "speed": self.get_speed(enemy)})
+    
+    def next_combatant(self):
+        """Pop the next living combatant from the turn scheduler"""
+        if self.scheduler is None:
+            self.create_turn_order()
+        
+        while self.scheduler:
+            current = self.scheduler.pop()
+            if self.is_alive(current["unit"]):
+                self.current = current
+                return current
+            self.scheduler.remove(current["unit"])
+        
+        self.current = None
+        return None
+    
+    def preview_turns(self, count):
+        """The next count combatants to act after the current one"""
+        if self.scheduler is None:
+            return []
+        return self.scheduler.preview(count, self.is_alive)
+    
+    def update_speed(self, unit):
+        """Re-time a combatant in the scheduler after its speed changed"""
+        if self.scheduler is not None:
+            self.scheduler.set_speed(unit, self.get_speed(unit))
+    
+    def take_turn(self, combatant):
+        """Resolve one automatic turn for a combatant from next_combatant()"""
+        if combatant["type"] == "player":
+            self.auto_player_turn(combatant["unit"])
+        else:
+            self.enemy_turn(combatant["unit"])
+        self.end_turn(combatant["unit"])
+    
+    def run(self, max_turns=1000):
+        """Resolve the whole battle with AI control on both sides and return the result"""
+        while self.result is None:
+            outcome = self.get_outcome()
+            if outcome == "wave_cleared":
+                self.start_next_wave()
+            elif outcome:
+                self.finish(outcome)
+            elif self.turns_taken >= max_turns:
+                self.finish("timeout")
+            else:
+                combatant = self.next_combatant()
+                if combatant:
+                    self.take_turn(combatant)
+        return self.result
+    
+    def calculate_damage(self, attacker, defender, force_crit=False):
+        """Calculate damage between attacker and defender using battle stats"""
+        # Get battle stats if available, otherwise fall back to base stats
+        if "battle_stats" in attacker:
+            atk = attacker["battle_stats"]["attack"]
+            crit_rate = min(attacker["battle_stats"]["crit_rate"], 100)  # Cap at 100%
+            crit_damage = attacker["battle_stats"]["crit_damage"]
+        elif "entity" in attacker:
+            atk = attacker["entity"]["attack"]
+            crit_rate = min(attacker["entity"]["crit_rate"], 100)
+            crit_damage = attacker["entity"]["crit_damage"]
+        else:
+            atk = attacker["attack"]
+            crit_rate = min(attacker["crit_rate"], 100)
+            crit_damage = attacker["crit_damage"]
+        
+        if "battle_stats" in defender:
+            defense = defender["battle_stats"]["defense"]
+        elif "entity" in defender:
+            defense = defender["entity"]["defense"]
+        else:
+            defense = defender["defense"]
+        
+        # Calculate base damage
+        base_damage = max(1, atk - defense)
+        
+        # Check for crit
+        is_crit = force_crit or (self.rng.randint(1, 100) <= crit_rate)
+        
+        if is_crit:
+            damage = int(base_damage * (crit_damage / 100))
+        else:
+            damage = base_damage
+        
+        # Add some randomness
+        damage = int(damage * self.rng.uniform(0.85, 1.15))
+        
+        return max(1, damage), is_crit
+    
+    def add_ghost_stack(self, unit):
+        """Give Jeff the Killer one Ghost stack (max 5)"""
+        unit["effects"].add_stack({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"}, 5)
+    
+    def player_attack(self, unit, target):
+        """Resolve a player's chosen basic attack"""
+        damage, is_crit = self.calculate_damage(unit, target)
+        target["hp"] -= damage
+        target["hp"] = max(0, target["hp"])
+        
+        # Apply Slender's Eight Pages passive (only when Slender is involved)
+        self.apply_slender_eight_pages_passive(unit, target)
+        
+        # Apply Jeff's Go to Sleep passive on crit
+        if is_crit and unit["entity"]["name"] == "Jeff the Killer":
+            self.add_ghost_stack(unit)
+            self.log(f"👻 {unit['entity']['name']} gains Ghost stack on critical hit!")
+        
+        # Special effects
+        if unit["entity"]["name"] == "Iris":
+            # Iris AoE attack
+            self.log(f"⚔️ {unit['entity']['name']} attacks ALL enemies for {damage} damage!")
+            for enemy in self.enemies:
+                if enemy["hp"] > 0 and enemy != target:
+                    enemy["hp"] -= damage
+                    enemy["hp"] = max(0, enemy["hp"])
+                    # 40% chance to slow
+                    if self.rng.randint(1, 100) <= 40:
+                        enemy["effects"].add({"type": "slow", "turns": 3, "source": "Iris"})
+                        self.update_speed(enemy)
+                    # Apply Slender passive for AoE targets too
+                    self.apply_slender_eight_pages_passive(unit, enemy)
+        else:
+            crit_text = " [CRITICAL HIT]" if is_crit else ""
+            self.log(f"⚔️ {unit['entity']['name']} attacks {target['name']} for {damage} damage!{crit_text}")
+        
+        # SP gain
+        unit["sp"] = min(unit["sp"] + 5, self.MAX_SP)
+    
+    def cast_skill(self, unit, target):
+        """Use a unit's skill and pay its SP cost"""
+        self.use_skill(unit, target)
+        unit["sp"] -= self.skill_costs[unit["entity"]["skill"]]
+    
+    def defend(self, unit):
+        """Put a unit in defending stance"""
+        unit["defending"] = True
+        unit["sp"] = min(unit["sp"] + 10, self.MAX_SP)
+    
+    def use_skill(self, unit, target):
+        """Use a unit's skill"""
+        skill = unit["entity"]["skill"]
+        name = unit["entity"]["name"]
+        skill_level = unit.get("skill_level", 0)
+        
+        if skill == "joyful_regeneration":  # SCP-999
+            # Grant 20% HP regeneration per turn for 3 turns to all allies
+            for team_unit in self.team:
+                if team_unit["battle_hp"] > 0:
+                    # Remove existing joyful regen if present
+                    team_unit["effects"].remove_type("joyful_regen")
+                    # Add new joyful regeneration
+                    regen_effect = {
+                        "type": "joyful_regen",
+                        "turns": 3,
+                        "heal_percent": 20,
+                        "source": name
+                    }
+                    # At skill level 5, add 50% increased healing effect
+                    if skill_level >= 5:
+                        team_unit["effects"].remove_type("heal_boost")
+                        team_unit["effects"].add({
+                            "type": "heal_boost",
+                            "turns": 3,
+                            "boost_percent": 50,
+                            "source": name
+                        })
+                        regen_effect["enhanced"] = True
+                    team_unit["effects"].add(regen_effect)
+            
+            heal_text = f"💚 {name} grants joyful regeneration to all allies!"
+            if skill_level >= 5:
+                heal_text += " Enhanced healing effects active!"
+            self.log(heal_text)
+        
+        elif skill == "killer_burst":  # Jeff the Killer
+            # High damage attack - chosen target, or a random one for auto-battle
+            alive_enemies = self.alive_enemies()
+            if alive_enemies:
+                if not target:
+                    target = self.rng.choice(alive_enemies)
+                damage, _ = self.calculate_damage(unit, target, force_crit=True)
+                damage = int(damage * 1.5)
+                target["hp"] = max(0, target["hp"] - damage)
+                # Gain 1 ghost stack after using skill
+                self.add_ghost_stack(unit)
+                self.log(f"👻 {name} unleashes Killer Burst for {damage} damage and gains Ghost!")
+        
+        elif skill == "analog_distortion":  # Iris
+            # Reality distortion - damage and debuff all enemies
+            for enemy in self.enemies:
+                if enemy["hp"] > 0:
+                    damage = int(unit["entity"]["attack"] * 0.8)
+                    enemy["hp"] = max(0, enemy["hp"] - damage)
+                    enemy["effects"].add({"type": "debuff", "stat": "defense", "amount": int(enemy["defense"] * 0.3), "turns": 4, "source": name})
+            self.log(f"📺 {name} distorts reality, damaging and debuffing all enemies!")
+        
+        elif skill == "indestructible_regeneration":  # SCP-682
+            # Heal and taunt
+            max_hp = unit.get("battle_stats", {}).get("hp", unit["entity"]["hp"])
+            heal = int(max_hp * 0.4)
+            unit["battle_hp"] = min(unit["battle_hp"] + heal, max_hp)
+            
+            # Add regeneration effect (different from SCP-999's joyful_regen)
+            unit["effects"].add({"type": "scp_regen", "turns": 3, "heal_percent": 10, "source": name})
+            unit["effects"].add({"type": "taunt", "turns": 3, "source": name})
+            self.log(f"🦎 {name} regenerates {heal} HP and taunts enemies!")
+        
+        elif skill == "faceless_terror":  # Slender - 8 Pages effect
+            # Chosen target, or a random one for auto-battle
+            alive_enemies = self.alive_enemies()
+            if alive_enemies:
+                if not target:
+                    target = self.rng.choice(alive_enemies)
+                # Guaranteed hit with no defense calculation
+                damage = unit["entity"]["attack"]
+                target["hp"] = max(0, target["hp"] - damage)
+                
+                # Add Eight Pages stack
+                eight_pages_effect = target["effects"].add_stack({"type": "eight_pages", "turns": 99, "stacks": 1, "source": name}, 8)
+                
+                # Apply defense reduction based on stacks
+                defense_reduction = eight_pages_effect["stacks"] * 5
+                target["effects"].remove_type("debuff", "Eight Pages")
+                target["effects"].add({"type": "debuff", "stat": "defense", "amount": defense_reduction, "turns": 99, "source": "Eight Pages"})
+                
+                # Check for 8 stacks at max skill level
+                if skill_level == 5 and eight_pages_effect["stacks"] >= 8:
+                    target["effects"].add({"type": "stun", "turns": 2, "source": name})
+                    target["effects"].add({"type": "fear", "turns": 3, "source": name})
+                    eight_pages_effect["stacks"] = 0
+                    self.log(f"📄 {name} completes the 8 Pages ritual! {target['name']} is stunned and feared!")
+                else:
+                    self.log(f"📄 {name} uses Faceless Terror for {damage} damage! {target['name']} has {eight_pages_effect['stacks']} Pages.")
+        
+        elif skill == "bloody_smile":  # Kuchisake-onna
+            # High crit chance attack with bleed
+            alive_enemies = self.alive_enemies()
+            if alive_enemies:
+                target = self.rng.choice(alive_enemies)
+                damage, _ = self.calculate_damage(unit, target, force_crit=True)
+                target["hp"] = max(0, target["hp"] - damage)
+                target["effects"].add({"type": "bleed", "turns": 4, "damage": damage // 4, "source": name})
+                self.log(f"💋 {name} inflicts a Bloody Smile for {damage} damage and bleeding!")
+        
+        elif skill == "night_ambush":  # The Rake
+            # Multi-hit attack with increased damage in darkness
+            alive_enemies = self.alive_enemies()
+            if alive_enemies:
+                hits = self.rng.randint(2, 4)
+                total_damage = 0
+                for _ in range(hits):
+                    target = self.rng.choice(alive_enemies)
+                    if target["hp"] > 0:
+                        damage, _ = self.calculate_damage(unit, target)
+                        damage = int(damage * 1.3)  # Night bonus
+                        target["hp"] = max(0, target["hp"] - damage)
+                        total_damage += damage
+                self.log(f"🌙 {name} performs Night Ambush with {hits} hits for {total_damage} total damage!")
+        
+        elif skill == "mothmans_omen":  # Mothman
+            # Accuracy debuff and damage all enemies
+            for enemy in self.enemies:
+                if enemy["hp"] > 0:
+                    damage = int(unit["entity"]["attack"] * 0.6)
+                    enemy["hp"] = max(0, enemy["hp"] - damage)
+                    enemy["effects"].add({"type": "debuff", "stat": "accuracy", "amount": 30, "turns": 3, "source": name})
+            self.log(f"🦋 {name} brings an ill omen, reducing all enemies' accuracy!")
+        
+        elif skill == "mirror_curse":  # Bloody Mary
+            # Damage and curse reflection
+            alive_enemies = self.alive_enemies()
+            if alive_enemies:
+                target = self.rng.choice(alive_enemies)
+                damage, _ = self.calculate_damage(unit, target)
+                target["hp"] = max(0, target["hp"] - damage)
+                # Curse that reflects damage
+                target["effects"].add({"type": "mirror_curse", "turns": 5, "reflect_percent": 50, "source": name})
+                self.log(f"🪞 {name} casts Mirror Curse for {damage} damage and curse reflection!")
+        
+        # Add other skills as needed...
+    
+    def apply_slender_eight_pages_passive(self, attacker, target):
+        """Apply Slender's Eight Pages passive effect - only when Slender is involved"""
+        attacker_name = attacker.get('entity', {}).get('name', attacker.get('name', ''))
+        target_name = target.get('entity', {}).get('name', target.get('name', ''))
+        
+        if attacker_name != 'Slender' and target_name != 'Slender':
+            return
+        
+        # Apply Eight Pages stack to the non-Slender participant
+        stack_target = target if attacker_name == 'Slender' else attacker
+        stack_target_name = target_name if attacker_name == 'Slender' else attacker_name
+        
+        if stack_target_name == 'Slender':  # Don't apply to Slender itself
+            return
+        
+        # Apply Eight Pages stack
+        effects = EffectStore.of(stack_target)
+        eight_pages_effect = effects.add_stack({
+            'type': 'eight_pages',
+            'turns': 99,
+            'stacks': 1,
+            'source': 'Slender'
+        }, 8)
+        
+        # Apply defense reduction (5% per stack)
+        defense_reduction = eight_pages_effect['stacks'] * 5
+        
+        # Remove old defense debuff from Eight Pages if exists
+        effects.remove_type('debuff', 'Eight Pages')
+        
+        # Apply new defense debuff
+        effects.add({
+            'type': 'debuff',
+            'stat': 'defense',
+            'amount': defense_reduction,
+            'turns': 99,
+            'source': 'Eight Pages'
+        })
+        
+        self.log(f"📄 {stack_target_name} gains Eight Pages stack ({eight_pages_effect['stacks']}/8) - Defense reduced by {defense_reduction}%!")
+        
+        # Check for 8 stacks - stun effect
+        if eight_pages_effect['stacks'] >= 8:
+            effects.add({'type': 'stun', 'turns': 2, 'source': 'Slender'})
+            effects.add({'type': 'fear', 'turns': 3, 'source': 'Slender'})
+            eight_pages_effect['stacks'] = 0  # Reset stacks after triggering
+            self.log(f"📄 {stack_target_name} is overwhelmed by the Eight Pages! Stunned and feared!")
+    
+    def auto_player_turn(self, unit):
+        """Resolve an automatic player action (AI)"""
+        # Simple AI: attack random enemy
+        alive_enemies = self.alive_enemies()
+        if not alive_enemies:
+            return
+        target = self.rng.choice(alive_enemies)
+        
+        # Use skill if available and SP is sufficient
+        if (unit["entity"]["skill"] and
+            unit["sp"] >= self.skill_costs.get(unit["entity"]["skill"], 999) and
+            self.rng.randint(1, 100) <= 30):  # 30% chance to use skill
+            self.cast_skill(unit, target)
+            self.log(f"🤖 {unit['entity']['name']} uses skill!")
+        else:
+            # Normal attack
+            damage, is_crit = self.calculate_damage(unit, target)
+            target["hp"] = max(0, target["hp"] - damage)
+            
+            # Apply Slender's Eight Pages passive (only when Slender is involved)
+            self.apply_slender_eight_pages_passive(unit, target)
+            
+            # Apply Jeff's Go to Sleep passive on crit
+            if is_crit and unit["entity"]["name"] == "Jeff the Killer":
+                self.add_ghost_stack(unit)
+                self.log(f"👻 {unit['entity']['name']} gains Ghost stack on critical hit!")
+            
+            crit_text = " [CRIT]" if is_crit else ""
+            self.log(f"🤖 {unit['entity']['name']} attacks {target['name']} for {damage} damage!{crit_text}")
+            
+            unit["sp"] = min(unit["sp"] + 5, self.MAX_SP)
+    
+    def enemy_turn(self, enemy):
+        """Resolve an enemy's action"""
+        # Enemy AI: attack random player
+        alive_team = self.alive_team()
+        if not alive_team:
+            return
+        target = self.rng.choice(alive_team)
+        
+        damage, is_crit = self.calculate_damage(enemy, target)
+        
+        # Apply defending reduction
+        if target.get("defending"):
+            damage = damage // 2
+        
+        target["battle_hp"] = max(0, target["battle_hp"] - damage)
+        
+        # Apply Slender's Eight Pages passive (only when Slender is involved)
+        self.apply_slender_eight_pages_passive(enemy, target)
+        
+        crit_text = " [CRIT]" if is_crit else ""
+        self.log(f"👹 {enemy['name']} attacks {target['entity']['name']} for {damage} damage!{crit_text}")
+    
+    def end_turn(self, unit):
+        """Close a combatant's turn: drop defending stance and tick effects"""
+        if "entity" in unit:  # Player unit
+            unit["defending"] = False
+        self.apply_turn_effects(unit)
+        self.update_speed(unit)  # Expired slows speed the unit back up
+        self.turns_taken += 1
+        self.notify("turn_end", unit=unit)
+    
+    def apply_turn_effects(self, unit):
+        """Apply turn-based effects like DoT, HoT, buffs, debuffs with proper stacking"""
+        effects = EffectStore.of(unit)
+        max_hp = unit.get("battle_stats", {}).get("hp", unit.get("max_hp", unit.get("entity", {}).get("hp", 1)))
+        
+        # Apply healing over time effects (these stack from different sources)
+        for effect in effects.of_type("joyful_regen"):
+            heal_amount = int(max_hp * effect.get("heal_percent", 20) / 100)
+            self.change_hp(unit, heal_amount, max_hp)
+            self.log(f"💚 {self.get_unit_name(unit)} heals {heal_amount} HP from {effect.get('source', 'unknown')}'s regeneration!")
+        
+        for effect in effects.of_type("scp_regen"):  # SCP-682's regeneration (different from joyful_regen)
+            heal_amount = int(max_hp * effect.get("heal_percent", 10) / 100)
+            self.change_hp(unit, heal_amount, max_hp)
+            self.log(f"🦎 {self.get_unit_name(unit)} regenerates {heal_amount} HP from SCP-682's ability!")
+        
+        # Apply damage over time effects (these also stack from different sources)
+        for effect_type, default_damage, icon in (("bleed", 10, "🩸"), ("burn", 15, "🔥"), ("poison", 20, "☠️")):
+            for effect in effects.of_type(effect_type):
+                damage = effect.get("damage", default_damage)
+                self.change_hp(unit, -damage, max_hp)
+                self.log(f"{icon} {self.get_unit_name(unit)} takes {damage} {effect_type} damage from {effect.get('source', 'unknown')}!")
+        
+        # Only effects whose expiry bucket comes due are touched
+        for effect in effects.tick():
+            effect_name = effect.get("type", "unknown").replace("_", " ").title()
+            effect_source = effect.get("source", "unknown")
+            self.log(f"⏰ {effect_name} from {effect_source} expired on {self.get_unit_name(unit)}")
+    
+    @staticmethod
+    def change_hp(unit, amount, max_hp):
+        """Heal (positive) or damage (negative) a team unit or enemy"""
+        key = "battle_hp" if "entity" in unit else "hp"
+        unit[key] = max(0, min(unit[key] + amount, max_hp))
+
+
+class BatchBattleSimulator:
+    """Resolve many auto battles at once by stepping them in lockstep with NumPy.
+    
+    Each battle is one row of shared arrays: the team in the first columns and
+    the current wave's enemies after them. Every step, all unfinished rows pick
+    the combatant whose action gauge fills first, roll a target, crit and
+    variance, and apply damage together. Only plain attack trades are vectorized; a team that can
+    cast skills or carries Jeff/Slender passives runs every battle through the
+    scalar BattleEngine instead, as does everything when NumPy is missing.
+    """
+    
+    SCALAR_UNITS = ("Slender", "Jeff the Killer")
+    
+    def __init__(self, team, battles, rng=None, skill_costs=None, is_boss_stage=False):
+        self.team = team  # (unit, final_stats, start_sp) per team member
+        self.battles = battles  # list of wave lists, one per battle
+        self.rng = rng if rng is not None else random.Random()
+        self.skill_costs = skill_costs if skill_costs is not None else {}
+        self.is_boss_stage = is_boss_stage
+    
+    def can_vectorize(self):
+        """True when every battle is a plain attack trade NumPy can resolve"""
+        if np is None:
+            return False
+        for unit, final_stats, start_sp in self.team:
+            if unit["entity"]["skill"] in self.skill_costs or unit["entity"]["name"] in self.SCALAR_UNITS:
+                return False
+        return True
+    
+    def run(self, max_turns=1000):
+        """Resolve every battle and return a (result, turns_taken) pair per battle"""
+        if self.can_vectorize():
+            return self.run_vectorized(max_turns)
+        return [self.run_scalar(waves, max_turns) for waves in self.battles]
+    
+    def run_scalar(self, waves, max_turns):
+        """Resolve one battle with the regular engine"""
+        battle_team = []
+        for unit, final_stats, start_sp in self.team:
+            battle_unit = dict(unit)
+            BattleEngine.prepare_unit(battle_unit, dict(final_stats), start_sp)
+            battle_team.append(battle_unit)
+        engine = BattleEngine(battle_team, waves, rng=self.rng, skill_costs=self.skill_costs,
+                              is_boss_stage=self.is_boss_stage)
+        return engine.run(max_turns), engine.turns_taken
+    
+    def run_vectorized(self, max_turns):
+        """Resolve all battles together; each loop iteration is one turn in every battle"""
+        gen = np.random.default_rng(self.rng.getrandbits(64))
+        num_battles = len(self.battles)
+        team_size = len(self.team)
+        max_waves = max(len(waves) for waves in self.battles)
+        max_enemies = max(len(wave) for waves in self.battles for wave in waves)
+        columns = team_size + max_enemies
+        
+        # Team stats are shared by every battle
+        stat_keys = ("hp", "attack", "defense", "crit_rate", "crit_damage", "speed")
+        team_stats = {key: np.array([final_stats[key] for unit, final_stats, start_sp in self.team], dtype=np.int64)
+                      for key in stat_keys}
+        
+        # Enemy stats for every wave, padded with dead slots
+        enemy_stats = {key: np.zeros((num_battles, max_waves, max_enemies), dtype=np.int64) for key in stat_keys}
+        enemy_stats["speed"].fill(-1)
+        wave_counts = np.array([len(waves) for waves in self.battles])
+        for b, waves in enumerate(self.battles):
+            for w, wave in enumerate(waves):
+                for e, enemy in enumerate(wave):
+                    for key in stat_keys:
+                        enemy_stats[key][b, w, e] = enemy[key]
+        
+        stats = {key: np.zeros((num_battles, columns), dtype=np.int64) for key in stat_keys}
+        for key in stat_keys:
+            stats[key][:, :team_size] = team_stats[key]
+        hp = stats["hp"]
+        
+        wave = np.zeros(num_battles, dtype=np.int64)
+        ready_at = np.zeros((num_battles, columns))  # TurnScheduler gauge timing per combatant
+        turns = np.zeros(num_battles, dtype=np.int64)
+        result = np.zeros(num_battles, dtype=np.int8)  # 0 running, 1 victory, 2 defeat, 3 timeout
+        is_enemy_column = np.arange(columns) >= team_size
+        
+        heal_percentage = 0.3 if self.is_boss_stage else 0.25
+        heal_amounts = (team_stats["hp"] * heal_percentage).astype(np.int64)
+        
+        def load_wave(rows):
+            """Copy each row's current wave into the enemy columns and reset every gauge"""
+            for key in stat_keys:
+                stats[key][rows, team_size:] = enemy_stats[key][rows, wave[rows]]
+            ready_at[rows] = TurnScheduler.GAUGE_SIZE / np.maximum(1, stats["speed"][rows])
+        
+        load_wave(np.arange(num_battles))
+        
+        while True:
+            running = np.flatnonzero(result == 0)
+            if running.size == 0:
+                break
+            
+            team_alive = (hp[running, :team_size] > 0).any(axis=1)
+            enemies_alive = (hp[running, team_size:] > 0).any(axis=1)
+            result[running[~team_alive]] = 2
+            
+            cleared = running[team_alive & ~enemies_alive]
+            if cleared.size:
+                last_wave = wave[cleared] + 1 >= wave_counts[cleared]
+                result[cleared[last_wave]] = 1
+                advancing = cleared[~last_wave]
+                if advancing.size:
+                    wave[advancing] += 1
+                    # Heal living team members between waves
+                    team_hp = hp[advancing, :team_size]
+                    healed = np.minimum(team_hp + heal_amounts, team_stats["hp"])
+                    hp[advancing, :team_size] = np.where(team_hp > 0, healed, team_hp)
+                    load_wave(advancing)
+            
+            fighting = running[team_alive & enemies_alive]
+            timed_out = turns[fighting] >= max_turns
+            result[fighting[timed_out]] = 3
+            acting = fighting[~timed_out]
+            if acting.size == 0:
+                continue
+            
+            # Living combatant whose gauge fills first acts, then its gauge restarts
+            alive = hp[acting] > 0
+            actor = np.where(alive, ready_at[acting], np.inf).argmin(axis=1)
+            ready_at[acting, actor] += TurnScheduler.GAUGE_SIZE / np.maximum(1, stats["speed"][acting, actor])
+            
+            # Random living target on the other side
+            targets = alive & (is_enemy_column == (actor < team_size)[:, None])
+            pick = (gen.random(acting.size) * targets.sum(axis=1)).astype(np.int64)
+            target = (np.cumsum(targets, axis=1) > pick[:, None]).argmax(axis=1)
+            
+            # Same formula as BattleEngine.calculate_damage
+            base_damage = np.maximum(1, stats["attack"][acting, actor] - stats["defense"][acting, target])
+            is_crit = gen.integers(1, 101, acting.size) <= np.minimum(stats["crit_rate"][acting, actor], 100)
+            damage = np.where(is_crit, (base_damage * (stats["crit_damage"][acting, actor] / 100)).astype(np.int64), base_damage)
+            damage = np.maximum(1, (damage * gen.uniform(0.85, 1.15, acting.size)).astype(np.int64))
+            
+            hp[acting, target] = np.maximum(0, hp[acting, target] - damage)
+            turns[acting] += 1
+        
+        outcomes = {1: "victory", 2: "defeat", 3: "timeout"}
+        return [(outcomes[int(code)], int(taken)) for code, taken in zip(result, turns)]
+
+def build_level_multipliers():
+    """(hp, attack, defense) growth multipliers indexed by level, up to the level where all three are capped"""
+    table = [None]
+    level = 1
+    while True:
+        multipliers = (
+            min(1.10 ** (level - 1), 5000),   # HP grows slightly slower, capped at 5000x
+            min(1.12 ** (level - 1), 10000),  # Attack grows at standard rate, capped at 10000x
+            min(1.08 ** (level - 1), 3000)    # Defense grows slower for balance, capped at 3000x
+        )
+        table.append(multipliers)
+        if multipliers == (5000, 10000, 3000):
+            return table
+        level += 1
+
+LEVEL_MULTIPLIERS = build_level_multipliers()
+
+def level_multipliers(level):
+    """Look up a level's (hp, attack, defense) multipliers; past the table every stat is capped"""
+    if level >= len(LEVEL_MULTIPLIERS):
+        return LEVEL_MULTIPLIERS[-1]
+    if level >= 1:
+        return LEVEL_MULTIPLIERS[level]
+    return (1.10 ** (level - 1), 1.12 ** (level - 1), 1.08 ** (level - 1))
+
+def exp_to_reach_level(level):
+    """Total EXP needed to climb from level 1 to level (going from L to L+1 costs L*100)"""
+    return 50 * level * (level - 1)
+
+def add_exp(level, exp, amount):
+    """Return (level, exp) after gaining amount EXP, applying every level-up at once"""
+    total = exp_to_reach_level(level) + exp + amount
+    
+    # Largest n with 50*n*(n-1) <= total
+    steps = int(total // 50)
+    new_level = (1 + math.isqrt(1 + 4 * steps)) // 2
+    if new_level <= level:
+        return level, exp + amount
+    return new_level, total - exp_to_reach_level(new_level)
+
+def search_rune_loadout(groups, set_bonuses, set_pieces, floor=None):
+    """Best full rune loadout, by dynamic programming over set progress.
+    
+    groups is a list of (positions, candidates) where candidates are
+    (value, set_name, rune) tuples sorted by value, best first; a group takes
+    min(positions, len(candidates)) distinct candidates. A set adds
+    set_bonuses[set] once when set_pieces[set] of its runes are picked. Groups
+    are placed largest first; the state is how many pieces of each bonus set
+    are placed, capped at what completes it, and a group's moves are how many
+    of its best candidates to take from each set. Pieces of a set the
+    remaining positions can no longer complete are dropped from the state, so
+    such states merge. States whose upper bound
+    (every remaining best value plus the bonuses still completable) falls short
+    of the greedy loadout, or doesn't beat the floor if one is given, are
+    pruned; (floor, None) means no loadout is worth more than the floor.
+    Returns (value, picks per group).
+    """
+    tracked = [set_name for set_name, bonus in set_bonuses.items() if bonus > 0 and set_pieces.get(set_name)]
+    index = {set_name: i for i, set_name in enumerate(tracked)}
+    caps = [set_pieces[set_name] for set_name in tracked]
+    order = sorted(range(len(groups)), key=lambda gi: -groups[gi][0])
+    
+    remaining = [0] * (len(order) + 1)  # Positions left after each step
+    best_rest = [0] * (len(order) + 1)  # Best values left after each step, sets aside
+    for step in range(len(order) - 1, -1, -1):
+        positions, candidates = groups[order[step]]
+        remaining[step] = remaining[step + 1] + min(positions, len(candidates))
+        best_rest[step] = best_rest[step + 1] + sum(c[0] for c in candidates[:positions])
+        
+    # Lower bound: each group's best candidates, plus whatever sets they happen to complete
+    greedy_counts = {}
+    for positions, candidates in groups:
+        for c in candidates[:positions]:
+            greedy_counts[c[1]] = greedy_counts.get(c[1], 0) + 1
+    incumbent = best_rest[0] + sum(set_bonuses[set_name] for i, set_name in enumerate(tracked)
+                                   if greedy_counts.get(set_name, 0) >= caps[i])
+                                   
+    def set_bound(state, room):
+        # 0/1 knapsack: which unfinished sets could the remaining positions still complete
+        best = [0] * (room + 1)
+        for i, set_name in enumerate(tracked):
+            needed = caps[i] - state[i]
+            if needed <= 0 or needed > room:
+                continue
+            for r in range(room, needed - 1, -1):
+                best[r] = max(best[r], best[r - needed] + set_bonuses[set_name])
+        return best[room]
+        
+    states = {(0,) * len(tracked): 0}
+    layers = []
+    for step, gi in enumerate(order):
+        bounds = {state: value + best_rest[step] + set_bound(state, remaining[step]) for state, value in states.items()}
+        states = {state: value for state, value in states.items()
+                  if bounds[state] >= incumbent - 1e-9 and (floor is None or bounds[state] > floor)}
+                  
+
+        # Every way to split the group's picks across sets, each set's best candidates first
+        positions, candidates = groups[gi]
+        by_set = {}
+        for c in candidates:
+            by_set.setdefault(c[1] if c[1] in index else None, []).append(c)
+        labels = list(by_set)
+        moves = []
+        
+        def split(li, left, counts):
+            if li == len(labels):
+                if not left:
+                    value = sum(c[0] for label, m in zip(labels, counts) for c in by_set[label][:m])
+                    adds = [(index[label], m) for label, m in zip(labels, counts) if m and label is not None]
+                    moves.append((value, adds, tuple(counts)))
+                return
+            for m in range(min(left, len(by_set[labels[li]])), -1, -1):
+                counts.append(m)
+                split(li + 1, left - m, counts)
+                counts.pop()
+                
+        split(0, min(positions, len(candidates)), [])
+        
+        room = remaining[step + 1]
+        next_states = {}
+        back = {}
+        for state, value in states.items():
+            for move_value, adds, counts in moves:
+                placed = list(state)
+                total = value + move_value
+                for i, m in adds:
+                    if placed[i] < caps[i]:
+                        placed[i] = min(caps[i], placed[i] + m)
+                        if placed[i] == caps[i]:
+                            total += set_bonuses[tracked[i]]
+                for i, cap in enumerate(caps):
+                    if 0 < cap - placed[i] > room:
+                        placed[i] = 0
+                placed = tuple(placed)
+                if placed not in next_states or total > next_states[placed]:
+                    next_states[placed] = total
+                    back[placed] = (state, counts)
+        layers.append((labels, by_set, back))
+        states = next_states
+        
+    if not states or (floor is not None and max(states.values()) <= floor):
+        return floor, None
+        
+    # Walk the choices back from the best final state
+    state = max(states, key=states.get)
+    value = states[state]
+    picks = [[] for _ in groups]
+    for gi, (labels, by_set, back) in zip(reversed(order), reversed(layers)):
+        state, counts = back[state]
+        chosen = [c for label, m in zip(labels, counts) for c in by_set[label][:m]]
+        chosen.sort(key=lambda c: c[0], reverse=True)
+        picks[gi] = [c[2] for c in chosen]
+    return value, picks
+
+def assign_runes_to_classes(capacities, weights, deadline=None):
+    """Max-weight assignment of runes to unit classes, each class taking up to its capacity.
+    
+    weights[k][r] is rune r's score for class k (every unit in a class values
+    runes alike). Solved by successive shortest augmenting paths: each step adds
+    one rune to the assignment, possibly passing runes from class to class, in
+    the way that raises the total most. The path search is a Dijkstra over
+    classes with node potentials keeping edge costs non-negative, stopped as soon
+    as the cheapest path is settled; per-pair heaps give the cheapest rune to
+    pass along each edge. Past the deadline the remaining capacity is filled
+    greedily. Returns, per class, the list of rune indices it owns.
+    """
+    num_classes = len(capacities)
+    total = sum(capacities)
+    owned = [[] for _ in range(num_classes)]
+    if not num_classes or not total:
+        return owned
+        
+    # A class never needs a rune outside its own top `total`
+    free = []
+    for k in range(num_classes):
+        top = heapq.nlargest(total, zip(weights[k], range(len(weights[k]))))
+        free.append([(-weight, r) for weight, r in top])  # Already in heap order
+        
+    owner = {}  # rune -> class
+    used = [0] * num_classes
+    # moves[a][b]: (cost for class a to take a rune from class b, rune), lazily pruned
+    moves = [[[] for _ in range(num_classes)] for _ in range(num_classes)]
+    
+    def give(k, r):
+        owner[r] = k
+        for a in range(num_classes):
+            if a != k:
+                heapq.heappush(moves[a][k], (weights[k][r] - weights[a][r], r))
+                
+    def best_free(k):
+        heap = free[k]
+        while heap and heap[0][1] in owner:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+        
+    def best_move(a, b):
+        heap = moves[a][b]
+        while heap and owner.get(heap[0][1]) != b:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+        
+    # The end of every path (a free rune) starts at minus the best weight anywhere and
+    # each class that much above it plus its own best weight, so every reduced cost
+    # starts out non-negative and each class's first rune costs it nothing extra
+    end_potential = min((free[k][0][0] for k in range(num_classes) if free[k]), default=0)
+    potential = [end_potential - free[k][0][0] if free[k] else 0 for k in range(num_classes)]
+    placed = 0
+    while placed < total:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+            
+        # Cheapest path from any class with room, through rune hand-offs, to a free rune
+        dist = [-potential[k] if used[k] < capacities[k] else math.inf for k in range(num_classes)]
+        via = [None] * num_classes
+        settled = [False] * num_classes
+        queue = [(dist[k], k) for k in range(num_classes) if dist[k] < math.inf]
+        heapq.heapify(queue)
+        end, end_dist = None, math.inf
+        while queue:
+            d, a = heapq.heappop(queue)
+            if settled[a] or d > dist[a]:
+                continue
+            if d >= end_dist:
+                break
+            settled[a] = True
+            top = best_free(a)
+            if top is not None and d + top[0] + potential[a] - end_potential < end_dist:
+                end, end_dist = a, d + top[0] + potential[a] - end_potential
+            for b in range(num_classes):
+                if settled[b] or not used[b]:
+                    continue  # A class holds exactly `used` runes, so none to take here
+                move = best_move(a, b)
+                if move is not None and d + move[0] + potential[a] - potential[b] < dist[b]:
+                    dist[b] = d + move[0] + potential[a] - potential[b]
+                    via[b] = (a, move[1])
+                    heapq.heappush(queue, (dist[b], b))
+                    
+        # Stop once no path raises the total
+        if end is None or end_dist + end_potential >= 0:
+            return owned_runes(owner, num_classes)
+        for k in range(num_classes):
+            potential[k] += min(dist[k], end_dist)
+        end_potential += end_dist
+        
+        # Walk the path back, handing each rune to the class before it
+        k, r = end, best_free(end)[1]
+        while True:
+            give(k, r)
+            if via[k] is None:
+                used[k] += 1
+                break
+            k, r = via[k]
+        placed += 1
+        
+    # Out of time: top up the remaining capacity greedily
+    for k in range(num_classes):
+        while used[k] < capacities[k] and best_free(k) is not None:
+            give(k, best_free(k)[1])
+            used[k] += 1
+    return owned_runes(owner, num_classes)
+
+def owned_runes(owner, num_classes):
+    """Invert a rune -> class mapping into per-class rune lists"""
+    owned = [[] for _ in range(num_classes)]
+    for r, k in owner.items():
+        owned[k].append(r)
+    return owned
+
+def group_entities_by_rarity(entities):
+    """Entities grouped by rarity, each group in entity list order"""
+    pools = {}
+    for entity in entities:
+        pools.setdefault(entity["rarity"], []).append(entity)
+    return pools
+
+def generate_campaign_enemies(pools, world_idx, stage_idx, wave=1, rng=random):
+    """Generate enemies for a stage with enhanced difficulty scaling and progression gating.
+    
+    pools are the entities grouped by rarity (see group_entities_by_rarity), so a
+    wave only looks at the rarities it can spawn.
+    """
+    is_boss_stage = (stage_idx + 1) % 10 == 0
+    
+    # Enhanced difficulty scaling - more aggressive progression
+    world_difficulty = 1.0 + (world_idx * 0.5)  # Increased from 0.3
+    stage_difficulty = 1.0 + (stage_idx * 0.15)  # Increased from 0.1
+    wave_difficulty = 1.0 + ((wave - 1) * 0.25)  # Increased from 0.2
+    
+    # Progressive enemy rarity scaling based on world progression
+    if world_idx == 0:  # World 1: Mostly Common/Rare
+        story_rarities = [["Common"], ["Common", "Rare"], ["Rare"]]
+        boss_rarities = [["Common", "Rare"], ["Rare"], ["Rare", "Epic"]]
+    elif world_idx == 1:  # World 2: Rare/Epic introduction
+        story_rarities = [["Common", "Rare"], ["Rare"], ["Rare", "Epic"]]
+        boss_rarities = [["Rare"], ["Rare", "Epic"], ["Epic"]]
+    elif world_idx == 2:  # World 3: Epic becomes common
+        story_rarities = [["Rare"], ["Rare", "Epic"], ["Epic"]]
+        boss_rarities = [["Rare", "Epic"], ["Epic"], ["Epic", "Legendary"]]
+    elif world_idx == 3:  # World 4: Epic/Legendary
+        story_rarities = [["Rare", "Epic"], ["Epic"], ["Epic", "Legendary"]]
+        boss_rarities = [["Epic"], ["Epic", "Legendary"], ["Legendary"]]
+    else:  # World 5+: End game content
+        story_rarities = [["Epic"], ["Epic", "Legendary"], ["Legendary"]]
+        boss_rarities = [["Epic", "Legendary"], ["Legendary"], ["Legendary"]]
+    
+    if is_boss_stage:
+        # Boss stage enemy generation with enhanced scaling
+        if wave < 5:
+            num_enemies = min(3 + wave, 7)  # 4-8 enemies
+            if wave <= 2:
+                enemy_rarities = boss_rarities[0]
+            elif wave <= 4:
+                enemy_rarities = boss_rarities[1] 
+            else:
+                enemy_rarities = boss_rarities[2]
+        else:
+            # Wave 5: The actual boss + elite minions
+            num_enemies = rng.randint(2, 4)  # Boss + 1-3 minions
+            enemy_rarities = ["Epic", "Legendary"]
+    else:
+        # Story stage enemy generation with progression scaling
+        if wave == 1:
+            num_enemies = rng.randint(3, 5)  # Slightly more enemies
+            enemy_rarities = story_rarities[0]
+        elif wave == 2:
+            num_enemies = rng.randint(4, 6)  # More challenging
+            enemy_rarities = story_rarities[1]
+        else:  # wave == 3
+            num_enemies = rng.randint(5, 7)  # Significantly more enemies
+            enemy_rarities = story_rarities[2]
+    
+    enemies = []
+    
+    # Get the appropriate rarity pool once for the whole wave
+    available_entities = [e for rarity in enemy_rarities for e in pools.get(rarity, ())]
+    if not available_entities:  # Fallback to common if no matches
+        available_entities = pools.get("Common", [])
+        
+    for _ in range(num_enemies):
+        base_entity = rng.choice(available_entities)
+        
+        # Enhanced scaling calculation
+        total_scale = world_difficulty * stage_difficulty * wave_difficulty
+        
+        # Additional scaling for boss stages (increased from 1.5 to 2.0)
+        if is_boss_stage:
+            total_scale *= 2.0
+        
+        # Late world scaling becomes more aggressive
+        if world_idx >= 3:
+            total_scale *= 1.3  # 30% bonus for worlds 4-5
+        if world_idx >= 4:
+            total_scale *= 1.2  # Additional 20% for world 5
+        
+        enemy = {
+            "name": f"{base_entity['name']} [W{world_idx+1}-{stage_idx+1}]",
+            "rarity": base_entity["rarity"],
+            "hp": int(base_entity["hp"] * total_scale),
+            "max_hp": int(base_entity["hp"] * total_scale),
+            "attack": int(base_entity["attack"] * total_scale),
+            "defense": int(base_entity["defense"] * total_scale),
+            "speed": int(base_entity["speed"] * min(total_scale, 2.0)),  # Cap speed scaling
+            "skill": base_entity["skill"],
+            "crit_rate": min(base_entity["crit_rate"] + (world_idx * 3) + (wave * 2), 30),
+            "crit_damage": base_entity["crit_damage"] + (world_idx * 10) + (wave * 5),
+            "accuracy": min(base_entity["accuracy"] + (world_idx * 5) + (wave * 3), 95),
+            "evasion": min(base_entity["evasion"] + (world_idx * 2) + wave, 25),
+            "sp": min(80 + (world_idx * 10) + (wave * 10), 150),
+            "effects": []
+        }
+        
+        # Enhanced boss generation for final wave
+        if is_boss_stage and wave == 5 and len(enemies) == 0:
+            boss_names = [
+                "Nightmare Sovereign", "Terror Lord", "Dread King", "Horror Master", 
+                "Void Emperor", "Abyssal Tyrant", "Shadow Overlord", "Crimson Despot"
+            ]
+            enemy["name"] = f"{rng.choice(boss_names)} [W{world_idx+1} BOSS]"
+            enemy["rarity"] = "Legendary"
+            # More dramatic boss scaling
+            enemy["hp"] = int(enemy["hp"] * 3.0)  # 3x HP instead of 2.5x
+            enemy["max_hp"] = int(enemy["max_hp"] * 3.0)
+            enemy["attack"] = int(enemy["attack"] * 2.0)  # 2x attack instead of 1.8x
+            enemy["defense"] = int(enemy["defense"] * 1.8)  # 1.8x defense instead of 1.5x
+            enemy["skill"] = "boss_ultimate"
+            enemy["sp"] = 150
+            enemy["crit_rate"] = min(enemy["crit_rate"] + 10, 35)  # Boss crit bonus
+            enemy["crit_damage"] = enemy["crit_damage"] + 25  # Boss crit damage bonus
+        
+        enemies.append(enemy)
+    
+    return enemies
+
+def generate_campaign_waves(pools, world_idx, stage_idx, rng=random):
+    """Roll every wave of a campaign stage: 5 for boss stages, 3 for story stages"""
+    total_waves = 5 if (stage_idx + 1) % 10 == 0 else 3
+    return [generate_campaign_enemies(pools, world_idx, stage_idx, wave, rng) for wave in range(1, total_waves + 1)]
+
+def simulate_campaign_stage(task):
+    """Run one stage's Monte Carlo batch; picklable entry point for worker processes"""
+    entities, team, world_idx, stage_idx, runs, seed, skill_costs = task
+    rng = random.Random(f"{seed}-{world_idx}-{stage_idx}")
+    is_boss_stage = (stage_idx + 1) % 10 == 0
+    
+    battle_team = [(unit, final_stats, int(final_stats["sp_cap"] * 0.7)) for unit, final_stats in team]
+    pools = group_entities_by_rarity(entities)
+    battles = [generate_campaign_waves(pools, world_idx, stage_idx, rng) for _ in range(runs)]
+    outcomes = BatchBattleSimulator(battle_team, battles, rng=rng, skill_costs=skill_costs, is_boss_stage=is_boss_stage).run()
+    
+    clear_turns = [turns for result, turns in outcomes if result == "victory"]
+    wins = len(clear_turns)
+    
+    # Wilson score interval keeps the bounds sane at 0% and 100%
+    z = 1.96
+    win_rate = wins / runs
+    denominator = 1 + z * z / runs
+    centre = (win_rate + z * z / (2 * runs)) / denominator
+    margin = z * math.sqrt(win_rate * (1 - win_rate) / runs + z * z / (4 * runs * runs)) / denominator
+    
+    avg_turns = None
+    turns_margin = None
+    if clear_turns:
+        avg_turns = sum(clear_turns) / len(clear_turns)
+        if len(clear_turns) > 1:
+            variance = sum((turns - avg_turns) ** 2 for turns in clear_turns) / (len(clear_turns) - 1)
+            turns_margin = z * math.sqrt(variance / len(clear_turns))
+        else:
+            turns_margin = 0.0
+    
+    return {
+        "world_idx": world_idx,
+        "stage_idx": stage_idx,
+        "runs": runs,
+        "wins": wins,
+        "win_rate": win_rate,
+        "win_rate_low": max(0.0, centre - margin),
+        "win_rate_high": min(1.0, centre + margin),
+        "avg_turns": avg_turns,
+        "turns_margin": turns_margin
+    }
+
+def campaign_win_rate_tasks(entities, team, runs=100, seed=0, skill_costs=None, num_worlds=5, stages_per_world=20):
+    """Build one simulate_campaign_stage task per campaign stage"""
+    return [
+        (entities, team, world_idx, stage_idx, runs, seed, skill_costs)
+        for world_idx in range(num_worlds)
+        for stage_idx in range(stages_per_world)
+    ]
+
+def estimate_campaign_win_rates(entities, team, runs=100, seed=0, skill_costs=None, num_worlds=5, stages_per_world=20, max_workers=None):
+    """Estimate win rate and turns to clear for every campaign stage across all CPU cores.
+    
+    team is a list of (unit, final_stats) pairs. Results are deterministic for a
+    given seed no matter how many worker processes are used.
+    """
+    tasks = campaign_win_rate_tasks(entities, team, runs, seed, skill_costs, num_worlds, stages_per_world)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(simulate_campaign_stage, tasks))
+
+def banner_rates(rarity_chances, banner_type=None):
+    """Rarity chances for a banner, with its boosts applied and normalized to 100%"""
+    chances = dict(rarity_chances)
+    
+    if banner_type:
+        # Apply banner boosts (simplified)
+        if banner_type == "Creepypasta":
+            chances["Legendary"] = min(chances["Legendary"] * 2, 25)
+        elif banner_type == "SCP":
+            chances["Epic"] = min(chances["Epic"] * 1.5, 20)
+            chances["Legendary"] = min(chances["Legendary"] * 1.5, 15)
+        elif banner_type == "Analogue":
+            chances["Legendary"] = min(chances["Legendary"] * 3, 30)
+            
+    # Normalize to 100%
+    total = sum(chances.values())
+    for rarity in chances:
+        chances[rarity] = (chances[rarity] / total) * 100
+        
+    return chances
+
+def simulate_gacha_chunk(task):
+    """Simulate one chunk of summons; picklable entry point for worker processes"""
+    rates, pools, pulls, seed = task
+    table = AliasTable(rates)
+    seed_bits = random.Random(seed).getrandbits(64)
+    
+    names = [name for rarity in table.items for name in pools.get(rarity, [])]
+    sizes = [len(pools.get(rarity, [])) for rarity in table.items]
+    offsets = [sum(sizes[:i]) for i in range(len(sizes))]
+    legendary = table.items.index("Legendary") if "Legendary" in table.items else -1
+    
+    if np is not None:
+        generator = np.random.default_rng(seed_bits)
+        rarity_idx = table.sample_indices(pulls, generator)
+        size_array = np.array(sizes)
+        picks = np.array(offsets)[rarity_idx] + (generator.random(pulls) * size_array[rarity_idx]).astype(np.int64)
+        
+        rarity_counts = np.bincount(rarity_idx, minlength=len(sizes)).tolist()
+        entity_counts = np.bincount(picks[size_array[rarity_idx] > 0], minlength=len(names)).tolist()
+        per_ten = (rarity_idx[:pulls - pulls % 10].reshape(-1, 10) == legendary).sum(axis=1)
+        legendaries_per_10 = np.bincount(per_ten, minlength=11).tolist()
+    else:
+        rng = random.Random(seed_bits)
+        index = {rarity: i for i, rarity in enumerate(table.items)}
+        rarity_counts = [0] * len(sizes)
+        entity_counts = [0] * len(names)
+        legendaries_per_10 = [0] * 11
+        in_ten = 0
+        for pull in range(pulls):
+            i = index[table.sample(rng)]
+            rarity_counts[i] += 1
+            if sizes[i]:
+                entity_counts[offsets[i] + int(rng.random() * sizes[i])] += 1
+            if i == legendary:
+                in_ten += 1
+            if pull % 10 == 9:
+                legendaries_per_10[in_ten] += 1
+                in_ten = 0
+                
+    return {
+        "pulls": pulls,
+        "rarity_counts": dict(zip(table.items, rarity_counts)),
+        "entity_counts": dict(zip(names, entity_counts)),
+        "legendaries_per_10": legendaries_per_10
+    }
+
+def gacha_simulation_tasks(rates, pools, pulls, seed=0, chunk_size=500000):
+    """Split pulls into whole 10-pull chunks, each with its own seed"""
+    chunk_size = max(10, chunk_size - chunk_size % 10)
+    tasks = []
+    for chunk_idx, start in enumerate(range(0, pulls, chunk_size)):
+        tasks.append((rates, pools, min(chunk_size, pulls - start), f"{seed}-{chunk_idx}"))
+    return tasks
+
+def chi_square_p_value(statistic, dof):
+    """Chance of a chi-square statistic at least this large (closed form for whole dof)"""
+    if dof <= 0:
+        return 1.0
+    if statistic == math.inf:
+        return 0.0
+    half = statistic / 2
+    if dof % 2 == 0:
+        term = total = math.exp(-half)
+        for k in range(1, dof // 2):
+            term *= half / k
+            total += term
+    else:
+        total = math.erfc(math.sqrt(half))
+        term = math.sqrt(half) * math.exp(-half) / math.gamma(1.5)
+        for k in range(1, (dof - 1) // 2 + 1):
+            total += term
+            term *= half / (k + 0.5)
+    return min(1.0, total)
+
+def analyze_gacha_results(rates, pools, chunks, gems_per_pull=5):
+    """Merge chunk counts into a banner report: rate audit, legendaries per 10-pull, gems per entity"""
+    pulls = sum(chunk["pulls"] for chunk in chunks)
+    rarity_counts = {rarity: sum(chunk["rarity_counts"].get(rarity, 0) for chunk in chunks) for rarity in rates}
+    legendaries_per_10 = [sum(chunk["legendaries_per_10"][k] for chunk in chunks) for k in range(11)]
+    
+    # Chi-square audit of observed rarity counts against the configured rates
+    statistic = 0.0
+    categories = 0
+    for rarity, rate in rates.items():
+        expected = pulls * rate / 100
+        if expected > 0:
+            statistic += (rarity_counts[rarity] - expected) ** 2 / expected
+            categories += 1
+        elif rarity_counts[rarity]:
+            statistic = math.inf  # Pulled a rarity that should be impossible
+            
+    # Exact legendary count per 10-pull is Binomial(10, p)
+    p_legendary = rates.get("Legendary", 0) / 100
+    ten_pulls = sum(legendaries_per_10)
+    per_ten = [{
+        "legendaries": k,
+        "exact": math.comb(10, k) * p_legendary ** k * (1 - p_legendary) ** (10 - k),
+        "observed": legendaries_per_10[k] / ten_pulls if ten_pulls else 0.0
+    } for k in range(11)]
+    
+    # Pulls until the first copy are geometric in the entity's per-pull chance
+    entities = {}
+    for rarity, names in pools.items():
+        for name in names:
+            chance = rates.get(rarity, 0) / 100 / len(names)
+            count = sum(chunk["entity_counts"].get(name, 0) for chunk in chunks)
+            entry = {"rarity": rarity, "chance": chance, "observed": count / pulls if pulls else 0.0}
+            if 0 < chance < 1:
+                entry["expected_gems"] = gems_per_pull / chance
+                entry["gems_50"] = gems_per_pull * math.ceil(math.log(0.5) / math.log(1 - chance))
+                entry["gems_90"] = gems_per_pull * math.ceil(math.log(0.1) / math.log(1 - chance))
+            entities[name] = entry
+            
+    return {
+        "pulls": pulls,
+        "rates": {rarity: {"configured": rate, "observed": rarity_counts[rarity] / pulls * 100 if pulls else 0.0}
+                  for rarity, rate in rates.items()},
+        "chi_square": statistic,
+        "dof": categories - 1,
+        "p_value": chi_square_p_value(statistic, categories - 1),
+        "legendaries_per_10": per_ten,
+        "entities": entities
+    }
+
+def simulate_gacha_banner(rarity_chances, entities, banner_type=None, pulls=1000000, seed=0, max_workers=None, chunk_size=500000):
+    """Simulate pulls on a banner across all CPU cores and report its economics.
+    
+    Works without the GUI: pass the game's rarity_chances and entity list. Results
+    are deterministic for a given seed no matter how many worker processes run.
+    """
+    rates = banner_rates(rarity_chances, banner_type)
+    pools = {}
+    for entity in entities:
+        pools.setdefault(entity["rarity"], []).append(entity["name"])
+        
+    tasks = gacha_simulation_tasks(rates, pools, pulls, f"{seed}-{banner_type}", chunk_size)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunks = list(executor.map(simulate_gacha_chunk, tasks))
+        
+    report = analyze_gacha_results(rates, pools, chunks)
+    report["banner"] = banner_type
+    return report
+
+def snapshot_save_value(value):
+    """Copy nested dicts and lists (sets become lists) so a writer thread sees a frozen save"""
+    if isinstance(value, dict):
+        return {key: snapshot_save_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [snapshot_save_value(item) for item in value]
+    return value
+
+def snapshot_runes(runes):
+    """Copy runes for a save; substats is their only nested field, so skip the generic walk"""
+    return [rune.to_dict() if isinstance(rune, Rune) else dict(rune, substats=dict(rune["substats"])) for rune in runes]
+
+# Fields a battle leaves on team units; prepare_unit resets them, so saves skip them
+BATTLE_UNIT_FIELDS = frozenset(("battle_stats", "battle_hp", "max_hp", "max_sp", "sp", "effects", "defending"))
+
+def number_units(units):
+    """Give units from saves older than uids their position as uid; returns the next free uid"""
+    for idx, unit in enumerate(units):
+        unit.setdefault("uid", idx)
+    return max((unit["uid"] for unit in units), default=-1) + 1
+
+def pack_unit(unit, templates):
+    """Save form of a unit: its entity by id, plus only the fields that differ from the template"""
+    packed = snapshot_save_value({key: value for key, value in unit.items()
+                                 if key != "entity" and key not in BATTLE_UNIT_FIELDS})
+    entity = unit["entity"]
+    template = templates.get(entity["name"])
+    packed["entity_id"] = entity["name"]
+    if entity is not template:
+        overrides = {key: value for key, value in entity.items() if template is None or template.get(key) != value}
+        if overrides:
+            packed["entity_overrides"] = overrides
+    return packed
+
+def unpack_unit(packed, templates):
+    """Live form of a saved unit; units without overrides share the template dict"""
+    if "entity" in packed:
+        # Saves from before entity ids embed a full copy; keep only what differs
+        entity = packed.pop("entity")
+        template = templates.get(entity.get("name"))
+        overrides = {key: value for key, value in entity.items() if template is None or template.get(key) != value}
+    else:
+        template = templates.get(packed.pop("entity_id"))
+        overrides = packed.pop("entity_overrides", None)
+    packed["entity"] = dict(template or {}, **overrides) if overrides else template
+    return packed
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file and swap it in, so a crash mid-save never leaves a torn file.
+    
+    Returns the seconds spent writing. indent=2 keeps saves readable and makes json use its
+    pure-Python encoder, which releases the GIL between chunks so a writer thread doesn't
+    stall the UI.
+    """
+    start = time.perf_counter()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return time.perf_counter() - start
+
+# Player saves are split into sections behind an offset table, so login can parse the
+# small ones and leave units and runes until the game needs them
+SAVE_FORMAT_MAGIC = b"NNSAVE 2\n"
+SAVE_SECTIONS = (
+    ("header", ("version", "username", "password_hash", "journal_seq")),
+    ("currencies", ("player_gems", "player_cash", "player_level", "player_xp", "player_items")),
+    ("progress", ("player_progress", "player_facilities", "player_research", "battle_preferences")),
+    ("inventory", ("player_inventory",)),
+    ("runes", ("player_runes",))
+)
+DEFERRED_SAVE_SECTIONS = {"inventory": "player_inventory", "runes": "player_runes"}
+
+def replay_unit_changes(units, entries):
+    """Apply journaled unit changes (by uid) to a unit list; new units go last"""
+    by_uid = None
+    for entry in entries:
+        changes = entry["units"]
+        if "set" in changes:
+            # Journals from before uids hold units by position, and only ever come first
+            for idx, unit in sorted((int(idx), unit) for idx, unit in changes["set"].items()):
+                if idx < len(units):
+                    units[idx] = unit
+                else:
+                    units.append(unit)
+            del units[changes["count"]:]
+            continue
+        if by_uid is None:
+            number_units(units)
+            by_uid = {unit["uid"]: unit for unit in units}
+        for unit in changes["changed"]:
+            by_uid[unit["uid"]] = unit
+        for uid in changes["removed"]:
+            by_uid.pop(uid, None)
+    if by_uid is not None:
+        units[:] = by_uid.values()
+    return units
+
+def replay_rune_changes(runes, entries):
+    """Apply journaled rune upserts and removals (by id) to a rune list"""
+    if not entries:
+        return runes
+    by_id = {rune["id"]: rune for rune in runes}
+    for entry in entries:
+        for rune in entry.get("runes", []):
+            by_id[rune["id"]] = rune
+        for rune_id in entry.get("removed_runes", []):
+            by_id.pop(rune_id, None)
+    return list(by_id.values())
+
+class DeferredSection:
+    """A big save section left unparsed at login, plus journal entries still to replay.
+    
+    read_raw() pins the section's bytes in memory; that must happen before a compaction
+    replaces the save file, since the offsets only describe the file as it was loaded.
+    """
+    
+    def __init__(self, path, offset, length, key, count=None):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.key = key
+        self.saved_count = count
+        self.entries = []
+        self.raw = None
+        
+    @property
+    def count(self):
+        """Number of entries in the section without parsing it"""
+        if self.key == "player_inventory" and self.entries:
+            return self.entries[-1]["units"]["count"]
+        return self.saved_count
+    
+    def read_raw(self):
+        """Section bytes exactly as saved"""
+        if self.raw is None:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                self.raw = f.read(self.length)
+        return self.raw
+    
+    def load(self):
+        """Parse the section and replay its journal entries; returns a fresh list every call"""
+        value = json.loads(self.read_raw())[self.key]
+        if self.key == "player_inventory":
+            return replay_unit_changes(value, self.entries)
+        return replay_rune_changes(value, self.entries)
+
+def write_save_sections(path, save_data):
+    """Write a player save as sections behind an offset table, atomically.
+    
+    Values may be DeferredSections that were never parsed; untouched ones are copied
+    through as raw bytes. Returns the seconds spent writing.
+    """
+    start = time.perf_counter()
+    placed = {key for _, keys in SAVE_SECTIONS for key in keys}
+    table = {}
+    blobs = []
+    offset = 0
+    for name, keys in SAVE_SECTIONS:
+        values = {key: save_data[key] for key in keys if key in save_data}
+        if name == "header":
+            values.update((key, value) for key, value in save_data.items() if key not in placed)
+            
+        deferred = next((value for value in values.values() if isinstance(value, DeferredSection)), None)
+        if deferred is not None and not deferred.entries:
+            blob = deferred.read_raw()
+            count = deferred.count
+        else:
+            values = {key: value.load() if isinstance(value, DeferredSection) else value
+                      for key, value in values.items()}
+            # indent=2 keeps saves readable and lets the writer thread release the GIL
+            blob = json.dumps(values, indent=2).encode("utf-8")
+            count = len(values[DEFERRED_SAVE_SECTIONS[name]]) if name in DEFERRED_SAVE_SECTIONS else None
+            
+        table[name] = [offset, len(blob)] + ([count] if count is not None else [])
+        blobs.append(blob)
+        offset += len(blob)
+        
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(SAVE_FORMAT_MAGIC)
+        f.write(json.dumps(table).encode("utf-8") + b"\n")
+        for blob in blobs:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return time.perf_counter() - start
+
+class SaveJournal:
+    """Append-only journal of changes beside a sectioned save snapshot.
+    
+    The journal keeps a mirror of what is already on disk. diff() takes the fields plus
+    the units and runes that UnitInventory and RuneStore saw change, and returns one
+    compact JSON line holding only what differs from the mirror: fields, units (by
+    uid) and runes (by id), or None when nothing is dirty. Units and runes that were
+    never loaded stay DeferredSections in the mirror and are
+    skipped, since they cannot have changed. Mirror entries are replaced rather than
+    mutated, so compact_data() can hand the writer thread a full snapshot without
+    another pass over live state. load() rebuilds an account from snapshot plus journal.
+    """
+    
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + ".journal"
+        self.mirrored = False  # No baseline yet, so the first save must snapshot live state
+        self.ready = False  # Disk matches the mirror, so diffs may be appended
+        self.seq = 0
+        self.journal_bytes = 0
+        
+    def reset(self, save_data):
+        """Adopt a full snapshot (independent of live state) as the new baseline"""
+        self.fields = {key: value for key, value in save_data.items()
+                       if key not in ("player_inventory", "player_runes", "journal_seq")}
+        units = list(save_data["player_inventory"])
+        number_units(units)
+        self.units = {unit["uid"]: unit for unit in units}
+        self.runes = {rune["id"]: rune for rune in save_data["player_runes"]}
+        self.journal_bytes = 0
+        self.mirrored = self.ready = True
+        
+    def resume(self, save_data):
+        """Adopt a save that was just loaded lazily, so login needs no full rewrite"""
+        units = save_data.get("player_inventory")
+        runes = save_data.get("player_runes")
+        if not (isinstance(units, DeferredSection) and isinstance(runes, DeferredSection)):
+            return  # Older plain-JSON save; the first save converts it to sections
+        
+        self.fields = {key: snapshot_save_value(value) for key, value in save_data.items()
+                       if key not in ("player_inventory", "player_runes", "journal_seq")}
+        self.units = units
+        self.runes = runes
+        self.seq = save_data.get("journal_seq", 0)
+        self.journal_bytes = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        self.mirrored = self.ready = True
+        
+    def adopt(self, section, value):
+        """Take a freshly parsed copy of a deferred section as its baseline"""
+        if self.mirrored and self.units is section:
+            number_units(value)
+            self.units = {unit["uid"]: unit for unit in value}
+        elif self.mirrored and self.runes is section:
+            self.runes = {rune["id"]: rune for rune in value}
+            
+    def diff(self, fields, units, runes):
+        """Journal line for everything changed since the last save, or None when clean.
+        
+        units and runes map the uid or id of everything changed since the last diff to
+        its save form (see pack_unit), or to None once removed. Pass None for units or
+        runes that are still deferred.
+        """
+        entry = {}
+        
+        changed_fields = {name: value for name, value in fields.items() if value != self.fields.get(name)}
+        if changed_fields:
+            self.fields.update(changed_fields)
+            entry["fields"] = changed_fields
+            
+        if units is not None:
+            changed_units, removed_units = self.merge(self.units, units)
+            if changed_units or removed_units:
+                entry["units"] = {"count": len(self.units), "changed": changed_units, "removed": removed_units}
+                
+        if runes is not None:
+            changed_runes, removed_runes = self.merge(self.runes, runes)
+            if changed_runes:
+                entry["runes"] = changed_runes
+            if removed_runes:
+                entry["removed_runes"] = removed_runes
+                
+        if not entry:
+            return None
+        self.seq += 1
+        entry["seq"] = self.seq
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        self.journal_bytes += len(line)
+        return line
+    
+    @staticmethod
+    def merge(mirror, changes):
+        """Fold changes into a mirror dict; returns the entries that differed and the keys removed"""
+        changed = []
+        removed = []
+        for key, value in changes.items():
+            if value is None:
+                if mirror.pop(key, None) is not None:
+                    removed.append(key)
+            elif mirror.get(key) != value:
+                mirror[key] = value
+                changed.append(value)
+        return changed, removed
+    
+    def compact_data(self):
+        """Full save built from the mirror, covering every journal entry so far"""
+        save_data = dict(self.fields)
+        if isinstance(self.units, DeferredSection):
+            self.units.read_raw()  # Pin before the compaction replaces the file
+            save_data["player_inventory"] = self.units
+        else:
+            save_data["player_inventory"] = list(self.units.values())
+        if isinstance(self.runes, DeferredSection):
+            self.runes.read_raw()
+            save_data["player_runes"] = self.runes
+        else:
+            save_data["player_runes"] = list(self.runes.values())
+        save_data["journal_seq"] = self.seq
+        return save_data
+    
+    def append(self, line):
+        """Append one entry to the journal (writer thread); returns the seconds spent"""
+        start = time.perf_counter()
+        try:
+            with open(self.journal_path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            self.ready = False  # The mirror is ahead of the disk, so the next save must compact it
+            raise
+        return time.perf_counter() - start
+    
+    def compact(self, save_data):
+        """Write a full snapshot, then drop the journal it covers (writer thread)"""
+        try:
+            seconds = write_save_sections(self.snapshot_path, save_data)
+            # A crash between these steps is harmless: replay skips entries the snapshot covers
+            open(self.journal_path, "w").close()
+        except Exception:
+            self.ready = False
+            raise
+        return seconds
+    
+    @staticmethod
+    def load(snapshot_path, lazy=False):
+        """Load a save snapshot and replay its journal on top.
+        
+        With lazy set, units and runes come back as DeferredSections carrying their
+        journal entries, so only the small sections are parsed.
+        """
+        with open(snapshot_path, "rb") as f:
+            if f.read(len(SAVE_FORMAT_MAGIC)) != SAVE_FORMAT_MAGIC:
+                f.seek(0)
+                save_data = json.load(f)  # Plain JSON save from before sections
+            else:
+                table = json.loads(f.readline())
+                data_start = f.tell()
+                save_data = {}
+                for name, (offset, length, *count) in table.items():
+                    if lazy and name in DEFERRED_SAVE_SECTIONS:
+                        save_data[DEFERRED_SAVE_SECTIONS[name]] = DeferredSection(
+                            snapshot_path, data_start + offset, length, DEFERRED_SAVE_SECTIONS[name], *count)
+                    else:
+                        f.seek(data_start + offset)
+                        save_data.update(json.loads(f.read(length)))
+                        
+        unit_entries = []
+        rune_entries = []
+        journal_path = os.path.splitext(snapshot_path)[0] + ".journal"
+        if os.path.exists(journal_path):
+            with open(journal_path, "r+b") as f:
+                good_bytes = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated journal line")
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn last line from a crash mid-append: cut it off, or the next
+                        # append would be glued onto it and lost as well
+                        f.truncate(good_bytes)
+                        break
+                    good_bytes += len(line)
+                    if entry["seq"] <= save_data.get("journal_seq", 0):
+                        continue
+                    save_data.update(entry.get("fields", {}))
+                    if "units" in entry:
+                        unit_entries.append(entry)
+                    if "runes" in entry or "removed_runes" in entry:
+                        rune_entries.append(entry)
+                    save_data["journal_seq"] = entry["seq"]
+                    
+        units = save_data.setdefault("player_inventory", [])
+        if isinstance(units, DeferredSection):
+            units.entries = unit_entries
+        else:
+            replay_unit_changes(units, unit_entries)
+        runes = save_data.setdefault("player_runes", [])
+        if isinstance(runes, DeferredSection):
+            runes.entries = rune_entries
+        else:
+            save_data["player_runes"] = replay_rune_changes(runes, rune_entries)
+        return save_data
+
+def deferred_save_attribute(name, wrap=None):
+    """Attribute that may hold a DeferredSection, parsed the first time it is read.
+    
+    With wrap given, other values are stored as wrap(value) unless they already are one.
+    """
+    def get(self):
+        try:
+            value = self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name)
+        if isinstance(value, DeferredSection):
+            value = self.load_deferred_section(name, value)
+        return value
+    
+    def set(self, value):
+        if wrap is not None and not isinstance(value, (wrap, DeferredSection)):
+            value = wrap(value)
+        self.__dict__[name] = value
+        
+    return property(get, set)
+
 class NightmareNexusGUI:
+    # Unit collection grid layout; cards are recycled, so only visible rows exist
+    UNIT_GRID_COLUMNS = 3
+    UNIT_CARD_HEIGHT = 240
+    SAVE_JOURNAL_LIMIT = 4 * 1024 * 1024  # Compact a player's save journal past this many bytes
+    
+    # Units and runes may be left as DeferredSections at login and parsed on first use
+    player_inventory = deferred_save_attribute("player_inventory", UnitInventory)
+    player_runes = deferred_save_attribute("player_runes")
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("NIGHTMARE NEXUS - Horror Gacha Game")
@@ -54,7 +2754,8 @@ class NightmareNexusGUI:
         self.auto_battle_active = False
         self.selected_units = []  # For unit selection
         self.saved_teams = {}  # For team save/load system
-        self.battle_log = []  # For in-game battle log instead of console
+        self.battle_log = LogBuffer(50, self.schedule_log_flush)  # For in-game battle log instead of console
+        self.notification_log = LogBuffer(20, self.schedule_log_flush)
         self.logged_in = False  # Track login state
         
         # Battle preferences and settings - persistent across battles
@@ -169,6 +2870,7 @@ class NightmareNexusGUI:
             state='disabled'
         )
         self.notification_text.pack(fill='both', expand=True, padx=5, pady=5)
+        self.notification_log.attach(self.notification_text)
         
         # Update stats display
         self.update_stats_display()
@@ -307,6 +3009,20 @@ class NightmareNexusGUI:
             "Enhancement": {"slot": [4, 5, 6], "icon": "✨", "color": "#CC66FF"}
         }
         
+        # Optimal rune stat priorities for each unit type, used by auto-equip
+        self.unit_rune_priorities = {
+            "Jeff the Killer": ["Crit Rate", "Crit Damage", "Attack%", "Speed", "Attack"],
+            "SCP-682": ["HP%", "Defense%", "HP", "Defense", "Attack%"],
+            "Slender": ["Speed", "Accuracy", "HP%", "Evasion", "Attack%"],
+            "Iris": ["Attack%", "Speed", "Accuracy", "Attack", "HP%"],
+            "SCP-999": ["HP%", "Speed", "Defense%", "HP", "Defense"],
+            "The Rake": ["Attack%", "Crit Rate", "Speed", "Crit Damage", "Attack"],
+            "Kuchisake-onna": ["Crit Rate", "Crit Damage", "Attack%", "Speed", "Attack"],
+            "Mothman": ["Speed", "Accuracy", "Attack%", "HP%", "Evasion"],
+            "Bloody Mary": ["HP%", "Defense%", "Speed", "Attack%", "HP"]
+        }
+        self.default_rune_priorities = ["Attack%", "HP%", "Speed", "Defense%", "Crit Rate"]
+        
         # Rune rarities
         self.rune_rarities = {
             "Common": {"color": "#FFFFFF", "stat_mult": 1.0, "substats": 1},
@@ -353,7 +3069,8 @@ class NightmareNexusGUI:
         
     def generate_sample_runes(self):
         """Generate sample runes for developer account"""
-        self.player_runes = []
+        self.player_runes = RuneStore()
+        self.invalidate_unit_stats()
         
         # Generate a variety of runes for testing
         rune_names = [
@@ -383,8 +3100,8 @@ class NightmareNexusGUI:
             # Assign set name
             set_name = random.choice(list(self.rune_sets.keys()))
             
-            rune = {
-                "id": str(uuid.uuid4()),
+            rune = Rune({
+                "id": self.player_runes.new_id(),
                 "name": random.choice(rune_names),
                 "type": rtype,
                 "rarity": rarity,
@@ -394,10 +3111,11 @@ class NightmareNexusGUI:
                 "substats": substats,
                 "set": set_name,
                 "equipped_unit": None,
-                "equipped_slot": None
-            }
+                "equipped_slot": None,
+                "locked": False
+            })
             
-            self.player_runes.append(rune)
+            self.player_runes.add(rune)
             
     def generate_rune(self, rarity=None, rtype=None):
         """Generate a new rune"""
@@ -439,8 +3157,8 @@ class NightmareNexusGUI:
         # Assign set name
         set_name = random.choice(list(self.rune_sets.keys()))
         
-        rune = {
-            "id": str(uuid.uuid4()),
+        rune = Rune({
+            "id": self.player_runes.new_id(),
             "name": random.choice(rune_names[rtype]),
             "type": rtype,
             "rarity": rarity,
@@ -450,8 +3168,9 @@ class NightmareNexusGUI:
             "substats": substats,
             "set": set_name,
             "equipped_unit": None,
-            "equipped_slot": None
-        }
+            "equipped_slot": None,
+            "locked": False
+        })
         
         return rune
         
@@ -461,7 +3180,7 @@ class NightmareNexusGUI:
             return False
             
         unit = self.player_inventory[unit_idx]
-        rune = next((r for r in self.player_runes if r["id"] == rune_id), None)
+        rune = self.player_runes.get(rune_id)
         
         if not rune or rune["equipped_unit"] is not None:
             return False
@@ -478,7 +3197,7 @@ class NightmareNexusGUI:
         # Unequip any existing rune in that slot
         if slot in unit.get("runes", {}):
             old_rune_id = unit["runes"][slot]
-            old_rune = next((r for r in self.player_runes if r["id"] == old_rune_id), None)
+            old_rune = self.player_runes.get(old_rune_id)
             if old_rune:
                 old_rune["equipped_unit"] = None
                 old_rune["equipped_slot"] = None
@@ -489,6 +3208,8 @@ class NightmareNexusGUI:
         unit["runes"][slot] = rune_id
         rune["equipped_unit"] = unit_idx
         rune["equipped_slot"] = slot
+        self.player_inventory.mark(unit)
+        self.invalidate_unit_stats(unit)
         
         return True
         
@@ -503,13 +3224,15 @@ class NightmareNexusGUI:
             return False
             
         rune_id = unit["runes"][slot]
-        rune = next((r for r in self.player_runes if r["id"] == rune_id), None)
+        rune = self.player_runes.get(rune_id)
         
         if rune:
             rune["equipped_unit"] = None
             rune["equipped_slot"] = None
             
         del unit["runes"][slot]
+        self.player_inventory.mark(unit)
+        self.invalidate_unit_stats(unit)
         return True
         
     def calculate_unit_level_stats(self, unit):
@@ -517,19 +3240,12 @@ class NightmareNexusGUI:
         base_entity = unit["entity"]
         level = unit["level"]
         
-        # Exponential growth formula for core stats only
-        hp_multiplier = 1.10 ** (level - 1)      # HP grows slightly slower
-        attack_multiplier = 1.12 ** (level - 1)   # Attack grows at standard rate
-        defense_multiplier = 1.08 ** (level - 1)  # Defense grows slower for balance
+        # Exponential growth for core stats only, capped to prevent overflow (precomputed per level)
+        hp_multiplier, attack_multiplier, defense_multiplier = level_multipliers(level)
         
         # Calculate SP cap (150 + 5 per level after 10)
         sp_cap = 150 + max(0, (level - 10) * 5)
         
-        # Cap the multipliers at reasonable levels to prevent overflow
-        hp_multiplier = min(hp_multiplier, 5000)      # Cap at 5000x base HP
-        attack_multiplier = min(attack_multiplier, 10000)  # Cap at 10000x base attack
-        defense_multiplier = min(defense_multiplier, 3000)  # Cap at 3000x base defense
-        
         return {
             "hp": int(base_entity["hp"] * hp_multiplier),
             "attack": int(base_entity["attack"] * attack_multiplier),
@@ -542,7 +3258,35 @@ class NightmareNexusGUI:
             "sp_cap": sp_cap
         }
     
+    def grant_unit_exp(self, unit, amount):
+        """Give a unit EXP and apply all the level-ups it earns; returns the levels gained"""
+        old_level = unit["level"]
+        unit["level"], unit["exp"] = add_exp(unit["level"], unit["exp"], amount)
+        self.player_inventory.mark(unit)
+        return unit["level"] - old_level
+        
     def calculate_unit_stats_with_runes(self, unit):
+        """Get a unit's total stats, recomputing them only after a level, rune or research change"""
+        stamp = (unit["level"], self.stats_version)
+        cached = self.unit_stats_cache.get(id(unit))
+        if cached is not None and cached[0] is unit and cached[1] == stamp:
+            self.stat_cache_hits += 1
+            return dict(cached[2])  # Callers may adjust their copy
+            
+        self.stat_cache_misses += 1
+        final_stats = self.compute_unit_stats_with_runes(unit)
+        self.unit_stats_cache[id(unit)] = (unit, stamp, final_stats)
+        return dict(final_stats)
+        
+    def invalidate_unit_stats(self, unit=None):
+        """Drop one unit's cached stats, or every unit's when no unit is given"""
+        if unit is not None:
+            self.unit_stats_cache.pop(id(unit), None)
+        else:
+            self.stats_version += 1
+            self.unit_stats_cache = {}
+            
+    def compute_unit_stats_with_runes(self, unit):
         """Calculate a unit's total stats including level scaling, rune bonuses, and set effects"""
         # Start with level-scaled stats
         base_stats = self.calculate_unit_level_stats(unit)
@@ -553,7 +3297,7 @@ class NightmareNexusGUI:
         equipped_runes = []
         
         for slot, rune_id in unit.get("runes", {}).items():
-            rune = next((r for r in self.player_runes if r["id"] == rune_id), None)
+            rune = self.player_runes.get(rune_id)
             if rune:
                 equipped_runes.append(rune)
                 # Main stat (scaled by rune level)
@@ -661,7 +3405,7 @@ class NightmareNexusGUI:
         self.player_xp = 0
         self.player_inventory = []
         self.player_items = {"Small XP Pot": 0, "Medium XP Pot": 0, "Large XP Pot": 0}
-        self.player_runes = []
+        self.player_runes = RuneStore()
         self.player_progress = {
             "world": 0,
             "stage": 0,
@@ -677,6 +3421,12 @@ class NightmareNexusGUI:
         # Turn counter for battles
         self.turn_counter = 0
         
+        # Final stats per unit, valid while the unit's level and stats_version are unchanged
+        self.unit_stats_cache = {}  # id(unit) -> (unit, stamp, final_stats)
+        self.stats_version = 0
+        self.stat_cache_hits = 0
+        self.stat_cache_misses = 0
+        
         # Load existing save data
         self.load_game_data()
         
@@ -1077,7 +3827,7 @@ class NightmareNexusGUI:
         
         # Clear existing inventory and runes to rebuild with optimal setup
         self.player_inventory = []
-        self.player_runes = []
+        self.player_runes = RuneStore()
         
         # Generate high-level legendary and epic runes
         for _ in range(50):
@@ -1089,14 +3839,14 @@ class NightmareNexusGUI:
             rune['main_value'] = int(rune['main_value'] * 1.8)
             for substat in rune['substats']:
                 rune['substats'][substat] = int(rune['substats'][substat] * 1.5)
-            self.player_runes.append(rune)
+            self.player_runes.add(rune)
         
         # Add all Epic and Legendary units at max level with perfect stats
         for entity in self.entities:
             if entity["rarity"] in ["Epic", "Legendary"]:
                 skill_level = 5 if entity["skill"] else 0
                 unit = {
-                    "entity": entity.copy(),
+                    "entity": entity,
                     "level": 100, 
                     "exp": 0, 
                     "skill_level": skill_level,
@@ -1126,7 +3876,7 @@ class NightmareNexusGUI:
             user_text = f"👤 {self.current_user['username']}"
             if self.current_user.get('is_developer'):
                 user_text += " [DEV]"
-            stats_text = f"{user_text} | 💎 {self.player_gems:,} | 🪙 {self.player_cash:,} | Lv.{self.player_level} | Units: {len(self.player_inventory)}"
+            stats_text = f"{user_text} | 💎 {self.player_gems:,} | 🪙 {self.player_cash:,} | Lv.{self.player_level} | Units: {self.player_unit_count()}"
         else:
             stats_text = "Not logged in"
             
@@ -1135,38 +3885,19 @@ class NightmareNexusGUI:
     def show_notification(self, message, color='#66FF66'):
         """Show notification in the notification area"""
         # Check if notification_text widget exists (only in main container)
-        if hasattr(self, 'notification_text') and self.notification_text:
-            self.notification_text.config(state='normal')
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            self.notification_text.insert('end', f"[{timestamp}] {message}\n")
-            self.notification_text.see('end')
-            self.notification_text.config(state='disabled')
-            
-            # Auto-scroll and limit lines
-            lines = self.notification_text.get('1.0', 'end').count('\n')
-            if lines > 20:
-                self.notification_text.config(state='normal')
-                self.notification_text.delete('1.0', '2.0')
-                self.notification_text.config(state='disabled')
+        if self.notification_log.widget is not None:
+            self.notification_log.add(message, color)
         else:
             # Fallback for startup screens - print to console or store for later
             print(f"[NOTIFICATION] {message}")
             
     def add_battle_log(self, message, color='white'):
         """Add message to battle log display"""
-        if hasattr(self, 'battle_log_display'):
-            self.battle_log_display.config(state='normal')
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            self.battle_log_display.insert('end', f"[{timestamp}] {message}\n")
-            self.battle_log_display.see('end')
-            self.battle_log_display.config(state='disabled')
-            
-            # Auto-scroll and limit lines
-            lines = self.battle_log_display.get('1.0', 'end').count('\n')
-            if lines > 50:
-                self.battle_log_display.config(state='normal')
-                self.battle_log_display.delete('1.0', '2.0')
-                self.battle_log_display.config(state='disabled')
+        self.battle_log.add(message, color)
+        
+    def schedule_log_flush(self, flush):
+        """Run a log buffer flush on the next frame (~60 fps)"""
+        self.root.after(16, flush)
             
     def clear_content(self):
         """Clear the content area"""
@@ -1575,14 +4306,70 @@ class NightmareNexusGUI:
             return
     
     def load_account_data(self, save_path):
-        """Load account data from file"""
-        with open(save_path, "r") as f:
-            return json.load(f)
+        """Load account data from file, replaying its save journal"""
+        self.wait_for_saves()  # Never read between a compaction's snapshot and journal steps
+        return SaveJournal.load(save_path, lazy=True)
+    
+    def section_loaded(self, name):
+        """Whether player_inventory or player_runes has been parsed yet"""
+        return not isinstance(self.__dict__.get(name), DeferredSection)
+    
+    def load_deferred_section(self, name, section):
+        """Parse units or runes left deferred at login, the first time anything reads them"""
+        value = section.load()
+        journal = getattr(self, 'save_journal', None)
+        if journal is not None:
+            # Baseline is taken before compatibility fixes so the next save records them
+            journal.adopt(section, snapshot_runes(value) if name == "player_runes" else snapshot_save_value(value))
+        self.prepare_loaded_section(name, value)
+        
+        if name == "player_runes":
+            value = RuneStore(value)
+            self.invalidate_unit_stats()
+        setattr(self, name, value)
+        return value
+    
+    def prepare_loaded_section(self, name, value):
+        """Backward compatibility fixes for units or runes read from an older save"""
+        if name == "player_runes":
+            for rune in value:
+                if "set" not in rune:
+                    rune["set"] = random.choice(list(self.rune_sets.keys()))
+        else:
+            templates = self.get_entity_templates()
+            for idx, unit in enumerate(value):
+                value[idx] = unpack_unit(unit, templates)
+                if "runes" not in unit:
+                    unit["runes"] = {}
+                    
+    def pack_player_units(self):
+        """Player units in save form, referencing shared entity templates by id"""
+        templates = self.get_entity_templates()
+        return [pack_unit(unit, templates) for unit in self.player_inventory]
+    
+    def take_unsaved_changes(self):
+        """Units (in save form) and runes changed since the last save, by uid and id.
+        
+        Removed ones map to None; a section that was never loaded comes back as None.
+        """
+        units = runes = None
+        if self.section_loaded("player_inventory"):
+            templates = self.get_entity_templates()
+            units = {uid: None if unit is None else pack_unit(unit, templates)
+                     for uid, unit in self.player_inventory.take_unsaved().items()}
+        if self.section_loaded("player_runes"):
+            runes = {rune_id: None if rune is None else rune.to_dict()
+                     for rune_id, rune in self.player_runes.take_unsaved().items()}
+        return units, runes
+    
+    def player_unit_count(self):
+        """Number of owned units, without parsing a deferred inventory"""
+        units = self.__dict__.get("player_inventory")
+        return units.count if isinstance(units, DeferredSection) else len(units)
     
     def save_account_data(self, save_path, account_data):
         """Save account data to file"""
-        with open(save_path, "w") as f:
-            json.dump(account_data, f, indent=2)
+        write_json_atomic(save_path, account_data)
     
     def load_player_account_from_data(self, username, save_data):
         """Load player account from data dict"""
@@ -1590,6 +4377,9 @@ class NightmareNexusGUI:
             "username": username,
             "is_developer": False
         }
+        self.account_password_hash = save_data.get("password_hash")
+        self.save_journal = SaveJournal(f"saves/player_{username.lower()}.json")
+        self.save_journal.resume(save_data)
         
         # Load player data
         self.player_gems = save_data.get("player_gems", 100)
@@ -1598,7 +4388,9 @@ class NightmareNexusGUI:
         self.player_xp = save_data.get("player_xp", 0)
         self.player_inventory = save_data.get("player_inventory", [])
         self.player_items = save_data.get("player_items", {"Small XP Pot": 5, "Medium XP Pot": 2, "Large XP Pot": 0})
-        self.player_runes = save_data.get("player_runes", [])
+        runes = save_data.get("player_runes", [])
+        self.player_runes = runes if isinstance(runes, DeferredSection) else RuneStore(runes)
+        self.invalidate_unit_stats()
         self.player_progress = save_data.get("player_progress", {
             "world": 0,
             "stage": 0,
@@ -1619,14 +4411,10 @@ class NightmareNexusGUI:
             "Legendary": 5
         }
         
-        # Ensure backward compatibility
-        for rune in self.player_runes:
-            if "set" not in rune:
-                rune["set"] = random.choice(list(self.rune_sets.keys()))
-        
-        for unit in self.player_inventory:
-            if "runes" not in unit:
-                unit["runes"] = {}
+        # Ensure backward compatibility; deferred sections get this when first loaded
+        for name in ("player_inventory", "player_runes"):
+            if self.section_loaded(name):
+                self.prepare_loaded_section(name, getattr(self, name))
     
     def create_player_account(self, username, password):
         """Create a new player account with starter content and password"""
@@ -1642,7 +4430,7 @@ class NightmareNexusGUI:
         self.player_xp = 0
         self.player_inventory = []
         self.player_items = {"Small XP Pot": 5, "Medium XP Pot": 2, "Large XP Pot": 0}
-        self.player_runes = []
+        self.player_runes = RuneStore()
         self.player_progress = {
             "world": 0,
             "stage": 0,
@@ -1668,12 +4456,12 @@ class NightmareNexusGUI:
         }
         
         # Give starter units (2 common, 1 rare)
-        starter_commons = [e for e in self.entities if e["rarity"] == "Common"]
-        starter_rares = [e for e in self.entities if e["rarity"] == "Rare"]
+        starter_commons = self.get_entity_pools().get("Common", [])
+        starter_rares = self.get_entity_pools().get("Rare", [])
         
         for _ in range(2):
             if starter_commons:
-                entity = random.choice(starter_commons).copy()
+                entity = random.choice(starter_commons)
                 unit = {
                     "entity": entity,
                     "level": 1,
@@ -1684,7 +4472,7 @@ class NightmareNexusGUI:
                 self.player_inventory.append(unit)
         
         if starter_rares:
-            entity = random.choice(starter_rares).copy()
+            entity = random.choice(starter_rares)
             unit = {
                 "entity": entity,
                 "level": 1,
@@ -1697,11 +4485,11 @@ class NightmareNexusGUI:
         # Give starter runes
         for _ in range(5):
             rune = self.generate_rune("Common")
-            self.player_runes.append(rune)
+            self.player_runes.add(rune)
         
         for _ in range(2):
             rune = self.generate_rune("Rare")
-            self.player_runes.append(rune)
+            self.player_runes.add(rune)
         
         # Save the new account with password hash
         self.save_player_account_with_password(password)
@@ -1709,13 +4497,15 @@ class NightmareNexusGUI:
     def load_player_account(self, username, save_path):
         """Load an existing player account"""
         try:
-            with open(save_path, "r") as f:
-                save_data = json.load(f)
+            save_data = self.load_account_data(save_path)
             
             self.current_user = {
                 "username": username,
                 "is_developer": False
             }
+            self.account_password_hash = save_data.get("password_hash")
+            self.save_journal = SaveJournal(save_path)
+            self.save_journal.resume(save_data)
             
             # Load player data
             self.player_gems = save_data.get("player_gems", 100)
@@ -1724,7 +4514,9 @@ class NightmareNexusGUI:
             self.player_xp = save_data.get("player_xp", 0)
             self.player_inventory = save_data.get("player_inventory", [])
             self.player_items = save_data.get("player_items", {"Small XP Pot": 5, "Medium XP Pot": 2, "Large XP Pot": 0})
-            self.player_runes = save_data.get("player_runes", [])
+            runes = save_data.get("player_runes", [])
+            self.player_runes = runes if isinstance(runes, DeferredSection) else RuneStore(runes)
+            self.invalidate_unit_stats()
             self.player_progress = save_data.get("player_progress", {
                 "world": 0,
                 "stage": 0,
@@ -1750,108 +4542,118 @@ class NightmareNexusGUI:
                 "Legendary": 5
             }
             
-            # Ensure backward compatibility
-            for rune in self.player_runes:
-                if "set" not in rune:
-                    rune["set"] = random.choice(list(self.rune_sets.keys()))
-            
-            for unit in self.player_inventory:
-                if "runes" not in unit:
-                    unit["runes"] = {}
+            # Ensure backward compatibility; deferred sections get this when first loaded
+            for name in ("player_inventory", "player_runes"):
+                if self.section_loaded(name):
+                    self.prepare_loaded_section(name, getattr(self, name))
                     
         except Exception as e:
             self.show_notification(f"❌ Error loading account: {e}. Creating new account.", '#FF6666')
             self.create_player_account(username)
     
-    def save_player_account(self):
-        """Save current player account data"""
-        if not self.current_user or self.current_user.get('is_developer'):
-            return  # Don't save developer account as player data
-        
-        username = self.current_user['username']
-        save_path = f"saves/player_{username.lower()}.json"
-        
-        # Load existing data to preserve password hash
-        existing_password_hash = None
-        if os.path.exists(save_path):
-            try:
-                with open(save_path, "r") as f:
-                    existing_data = json.load(f)
-                    existing_password_hash = existing_data.get('password_hash')
-            except:
-                pass
-        
-        # Ensure cleared_stages is a list for JSON compatibility
-        progress_copy = self.player_progress.copy()
-        if "cleared_stages" in progress_copy and isinstance(progress_copy["cleared_stages"], set):
-            progress_copy["cleared_stages"] = list(progress_copy["cleared_stages"])
-        
-        save_data = {
+    def player_save_fields(self, password_hash):
+        """Everything in a player save except units and runes, snapshotted whole"""
+        return {
             "version": "1.2",
-            "username": username,
-            "password_hash": existing_password_hash,  # Preserve existing password hash
+            "username": self.current_user['username'],
+            "password_hash": password_hash,
             "player_gems": self.player_gems,
             "player_cash": self.player_cash,
             "player_level": self.player_level,
             "player_xp": self.player_xp,
-            "player_inventory": self.player_inventory,
-            "player_items": self.player_items,
-            "player_runes": self.player_runes,
-            "player_progress": progress_copy,
-            "player_facilities": self.player_facilities,
-            "player_research": self.player_research,
+            "player_items": dict(self.player_items),
+            "player_progress": snapshot_save_value(self.player_progress),  # Also turns cleared_stages into a list
+            "player_facilities": dict(self.player_facilities),
+            "player_research": snapshot_save_value(self.player_research),
             "battle_preferences": {
                 "auto_battle_preference": self.auto_battle_preference,
                 "battle_speed_preference": self.battle_speed_preference
             }
         }
+    
+    def build_player_save_data(self, password_hash):
+        """Full copy of the player account, for a first save with no journal mirror to build from"""
+        save_data = self.player_save_fields(password_hash)
+        save_data["player_inventory"] = self.pack_player_units()
+        save_data["player_runes"] = snapshot_runes(self.player_runes)
+        return save_data
+    
+    def save_player_account(self, wait=True, full=False):
+        """Journal changes to the player account; returns the writer future, or None if nothing changed"""
+        if not self.current_user or self.current_user.get('is_developer'):
+            return None  # Don't save developer account as player data
         
-        # Ensure save directory exists
-        os.makedirs("saves", exist_ok=True)
+        username = self.current_user['username']
+        save_path = f"saves/player_{username.lower()}.json"
         
-        # Save to user-specific file
-        with open(save_path, "w") as f:
-            json.dump(save_data, f, indent=2)
-    
+        # The hash is cached at login; only accounts loaded some other way need the file re-read
+        if getattr(self, 'account_password_hash', None) is None and os.path.exists(save_path):
+            try:
+                self.account_password_hash = self.load_account_data(save_path).get('password_hash')
+            except:
+                pass
+        password_hash = getattr(self, 'account_password_hash', None)
+        
+        journal = getattr(self, 'save_journal', None)
+        if journal is None or journal.snapshot_path != save_path:
+            journal = self.save_journal = SaveJournal(save_path)
+        
+        executor = self.get_save_executor()
+        if not journal.mirrored:
+            # Nothing to build on yet: copy the whole account, once per login at most
+            save_data = self.build_player_save_data(password_hash)
+            save_data["journal_seq"] = journal.seq
+            journal.reset(save_data)
+            self.player_inventory.take_unsaved()  # The snapshot covers them
+            self.player_runes.take_unsaved()
+            future = executor.submit(journal.compact, save_data)
+        else:
+            # Only what changed is copied here; full snapshots come from the mirror it updates
+            line = journal.diff(self.player_save_fields(password_hash), *self.take_unsaved_changes())
+            if full or not journal.ready:
+                journal.ready = True  # Until the compaction says otherwise
+                future = executor.submit(journal.compact, journal.compact_data())
+                journal.journal_bytes = 0
+            elif line is None:
+                return None  # Nothing dirty since the last save
+            else:
+                future = executor.submit(journal.append, line)
+                
+                # Fold a long journal into a new snapshot; queued behind the append it covers
+                if journal.journal_bytes > self.SAVE_JOURNAL_LIMIT:
+                    executor.submit(journal.compact, journal.compact_data())
+                    journal.journal_bytes = 0
+        
+        if wait:
+            future.result()
+        return future
+
     def save_player_account_with_password(self, password):
         """Save new player account with password hash"""
         if not self.current_user or self.current_user.get('is_developer'):
             return
         
-        username = self.current_user['username']
-        # Ensure cleared_stages is a list for JSON compatibility
-        progress_copy = self.player_progress.copy()
-        if "cleared_stages" in progress_copy and isinstance(progress_copy["cleared_stages"], set):
-            progress_copy["cleared_stages"] = list(progress_copy["cleared_stages"])
-        
-        save_data = {
-            "version": "1.2",
-            "username": username,
-            "password_hash": self.hash_password(password),
-            "player_gems": self.player_gems,
-            "player_cash": self.player_cash,
-            "player_level": self.player_level,
-            "player_xp": self.player_xp,
-            "player_inventory": self.player_inventory,
-            "player_items": self.player_items,
-            "player_runes": self.player_runes,
-            "player_progress": progress_copy,
-            "player_facilities": self.player_facilities,
-            "player_research": self.player_research,
-            "battle_preferences": {
-                "auto_battle_preference": self.auto_battle_preference,
-                "battle_speed_preference": self.battle_speed_preference
-            }
-        }
-        
-        # Ensure save directory exists
-        os.makedirs("saves", exist_ok=True)
-        
-        # Save to user-specific file
-        save_path = f"saves/player_{username.lower()}.json"
-        with open(save_path, "w") as f:
-            json.dump(save_data, f, indent=2)
+        self.account_password_hash = self.hash_password(password)
+        self.save_player_account()
+    
+    def get_save_executor(self):
+        """Single writer thread, so saves reach the disk in the order they were taken"""
+        if not hasattr(self, 'save_executor'):
+            self.save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save-writer")
+        return self.save_executor
     
+    def wait_for_saves(self):
+        """Block until every queued save is on disk"""
+        if hasattr(self, 'save_executor'):
+            self.save_executor.submit(lambda: None).result()
+    
+    def write_save(self, save_path, save_data, wait=True):
+        """Queue a save snapshot on the writer thread, optionally blocking until it is on disk"""
+        future = self.get_save_executor().submit(write_json_atomic, save_path, save_data)
+        if wait:
+            future.result()
+        return future
+
     def logout(self):
         """Logout current user and return to login screen"""
         # Save current account before logout
@@ -1885,6 +4687,7 @@ class NightmareNexusGUI:
             del self.stats_label
         if hasattr(self, 'notification_text'):
             del self.notification_text
+        self.notification_log.detach()
         
         # Reset to startup container
         self.setup_startup_container()
@@ -2039,19 +4842,39 @@ class NightmareNexusGUI:
             )
             multi_btn.pack(side='left', padx=5)
             
+            # Bulk summon for event accounts, with a pull count selector
+            bulk_count_var = tk.StringVar(value="100")
+            bulk_btn = tk.Button(
+                btn_frame,
+                text="💫 Bulk 100x (500 💎)",
+                command=lambda bt=banner_type, var=bulk_count_var: self.bulk_summon(bt, int(var.get().replace(",", ""))),
+                font=self.body_font,
+                bg='#663399',
+                fg='white',
+                width=21
+            )
+            bulk_btn.pack(side='left', padx=5)
+            
+            bulk_count_menu = ttk.Combobox(btn_frame, textvariable=bulk_count_var,
+                                           values=["100", "1,000", "10,000"], state="readonly", width=7)
+            bulk_count_menu.pack(side='left', padx=5)
+            bulk_count_menu.bind("<<ComboboxSelected>>", lambda e, btn=bulk_btn, var=bulk_count_var: btn.config(
+                text=f"💫 Bulk {var.get()}x ({int(var.get().replace(',', '')) * 5:,} 💎)"))
+            
     def single_summon(self, banner_type=None):
         """Perform a single summon"""
         if self.player_gems < 5:
             self.show_notification("❌ Insufficient gems! Need 5 gems for single summon.", '#FF6666')
             return
             
-        self.player_gems -= 5
         entity = self.summon_entity(banner_type)
         
         if entity:
+            self.player_gems -= 5  # Only charged when a unit actually arrives
+            
             # Add to inventory
             unit = {
-                "entity": entity.copy(),
+                "entity": entity,
                 "level": 1,
                 "exp": 0,
                 "skill_level": 0,
@@ -2067,80 +4890,116 @@ class NightmareNexusGUI:
         
     def multi_summon(self, banner_type=None):
         """Perform a multi summon (10x)"""
-        if self.player_gems < 50:
-            self.show_notification("❌ Insufficient gems! Need 50 gems for multi summon.", '#FF6666')
+        self.bulk_summon(banner_type, 10)
+        
+    def bulk_summon(self, banner_type=None, count=10):
+        """Summon count units at 5 gems each, adding them in one batch with one summary.
+        
+        Pulls that land on a rarity with no units are not charged.
+        """
+        cost = count * 5
+        if self.player_gems < cost:
+            self.show_notification(f"❌ Insufficient gems! Need {cost:,} gems for {count:,}x summon.", '#FF6666')
             return
             
-        self.player_gems -= 50
-        results = []
+        start = time.perf_counter()
+        results = self.summon_entities(banner_type, count)
+        self.player_gems -= len(results) * 5
+        if len(results) < count:
+            self.show_notification(f"⚠️ {count - len(results):,} pulls found no units and were not charged", '#FFCC66')
         
-        for _ in range(10):
-            entity = self.summon_entity(banner_type)
-            if entity:
-                unit = {
-                    "entity": entity.copy(),
-                    "level": 1,
-                    "exp": 0,
-                    "skill_level": 0,
-                    "runes": {}
-                }
-                self.player_inventory.append(unit)
-                results.append(entity)
-                
-        # Show results
-        if results:
-            self.show_notification("✨ Multi Summon Results:")
-            rarity_counts = {"Common": 0, "Rare": 0, "Epic": 0, "Legendary": 0}
-            
-            for entity in results:
-                rarity_counts[entity["rarity"]] += 1
-                self.show_notification(f"  • {entity['name']} ({entity['rarity']})")
+        self.player_inventory.extend({
+            "entity": entity,
+            "level": 1,
+            "exp": 0,
+            "skill_level": 0,
+            "runes": {}
+        } for entity in results)
+        
+        # One summary instead of a notification per unit
+        rarity_counts = {"Common": 0, "Rare": 0, "Epic": 0, "Legendary": 0}
+        name_counts = {}
+        for entity in results:
+            rarity_counts[entity["rarity"]] = rarity_counts.get(entity["rarity"], 0) + 1
+            if entity["rarity"] in ("Epic", "Legendary"):
+                name_counts[entity["name"]] = name_counts.get(entity["name"], 0) + 1
                 
-            # Summary
-            summary = " | ".join([f"{r}: {c}" for r, c in rarity_counts.items() if c > 0])
-            self.show_notification(f"Summary: {summary}")
+        summary = " | ".join([f"{r}: {c:,}" for r, c in rarity_counts.items() if c > 0])
+        self.show_notification(f"✨ {count:,}x Summon: {summary} ({time.perf_counter() - start:.2f}s)")
+        if name_counts:
+            highlights = ", ".join(f"{name} x{n}" if n > 1 else name
+                                   for name, n in sorted(name_counts.items(), key=lambda item: -item[1]))
+            self.show_notification(f"🌟 Highlights: {highlights}", '#FFCC66')
             
         # Refresh stats
         self.update_stats_display()
         
+    def summon_entities(self, banner_type=None, count=10):
+        """Summon count entity templates at once; with NumPy the rarity and unit rolls are single array draws"""
+        table = self.get_summon_table(banner_type)
+        pools = self.get_entity_pools()
+        
+        if np is None:
+            results = []
+            for _ in range(count):
+                rarity_entities = pools.get(table.sample())
+                if rarity_entities:
+                    results.append(random.choice(rarity_entities))
+            return results
+            
+        # Seeded from random so a seeded game still summons reproducibly
+        generator = np.random.default_rng(random.getrandbits(64))
+        rarity_idx = table.sample_indices(count, generator)
+        pool_sizes = np.array([len(pools.get(rarity, [])) for rarity in table.items])
+        picks = (generator.random(count) * pool_sizes[rarity_idx]).astype(np.int64)
+        
+        results = []
+        for r, pick in zip(rarity_idx.tolist(), picks.tolist()):
+            rarity_entities = pools.get(table.items[r])
+            if rarity_entities:
+                results.append(rarity_entities[pick])
+        return results
+        
     def summon_entity(self, banner_type=None):
-        """Summon a single entity with rarity chances"""
-        # Calculate rarity based on banner
-        chances = self.rarity_chances.copy()
-        
-        if banner_type:
-            # Apply banner boosts (simplified)
-            if banner_type == "Creepypasta":
-                chances["Legendary"] = min(chances["Legendary"] * 2, 25)
-            elif banner_type == "SCP":
-                chances["Epic"] = min(chances["Epic"] * 1.5, 20)
-                chances["Legendary"] = min(chances["Legendary"] * 1.5, 15)
-            elif banner_type == "Analogue":
-                chances["Legendary"] = min(chances["Legendary"] * 3, 30)
-                
-        # Normalize to 100%
-        total = sum(chances.values())
-        for rarity in chances:
-            chances[rarity] = (chances[rarity] / total) * 100
-            
-        # Roll for rarity
-        roll = random.randint(1, 100)
-        cumulative = 0
-        selected_rarity = "Common"
-        
-        for rarity in ["Legendary", "Epic", "Rare", "Common"]:
-            cumulative += chances[rarity]
-            if roll <= cumulative:
-                selected_rarity = rarity
-                break
-                
-        # Get entities of selected rarity
-        rarity_entities = [e for e in self.entities if e["rarity"] == selected_rarity]
+        """Summon a single entity template (shared, read-only) with rarity chances"""
+        # Roll for rarity, then pick uniformly within it
+        selected_rarity = self.get_summon_table(banner_type).sample()
+        rarity_entities = self.get_entity_pools().get(selected_rarity)
         
         if rarity_entities:
-            return random.choice(rarity_entities).copy()
+            return random.choice(rarity_entities)
         return None
         
+    def get_banner_rates(self, banner_type=None):
+        """Rarity chances for a banner, with its boosts applied and normalized to 100%"""
+        return banner_rates(self.rarity_chances, banner_type)
+        
+    def get_summon_table(self, banner_type=None):
+        """Alias table over rarities for a banner, rebuilt only when the base rates change"""
+        if not hasattr(self, 'summon_tables'):
+            self.summon_tables = {}
+            
+        key = (banner_type, tuple(self.rarity_chances.items()))
+        table = self.summon_tables.get(key)
+        if table is None:
+            table = AliasTable(self.get_banner_rates(banner_type))
+            self.summon_tables[key] = table
+        return table
+        
+    def get_entity_templates(self):
+        """Shared entity templates by id (their name); units reference these instead of copies"""
+        if getattr(self, 'entity_templates_source', None) is not self.entities:
+            self.entity_templates = {entity["name"]: entity for entity in self.entities}
+            self.entity_templates_source = self.entities
+        return self.entity_templates
+        
+    def get_entity_pools(self):
+        """Entities grouped by rarity, rebuilt only if the entity list is replaced"""
+        if getattr(self, 'entity_pools_source', None) is not self.entities:
+            self.entity_pools = group_entities_by_rarity(self.entities)
+            self.entity_pools_source = self.entities
+        return self.entity_pools
+        
     def show_unit_collection(self):
         """Show the enhanced unit collection interface"""
         self.navigate_to("units")
@@ -2192,182 +5051,236 @@ class NightmareNexusGUI:
         
     def refresh_unit_display(self):
         """Refresh the unit display with current filters and sorting"""
-        # Clear existing display
-        for widget in self.units_display_frame.winfo_children():
-            widget.destroy()
+        grid = getattr(self, 'unit_grid', None)
+        if grid is None or grid["frame"] is not self.units_display_frame:
+            grid = self.create_unit_grid()
             
         # Get filtered and sorted units
-        filtered_units = self.get_filtered_units()
+        grid["units"] = self.get_filtered_units()
         
         # Update count
-        self.unit_count_label.config(text=f"Showing {len(filtered_units)} units")
+        self.unit_count_label.config(text=f"Showing {len(grid['units'])} units")
         
-        if not filtered_units:
-            no_units_label = tk.Label(self.units_display_frame, text="No units match the current filter", 
-                                     font=self.body_font, bg='black', fg='#666666')
-            no_units_label.pack(pady=50)
+        if not grid["units"]:
+            grid["canvas"].pack_forget()
+            grid["scrollbar"].pack_forget()
+            grid["empty_label"].pack(pady=50)
             return
+            
+        grid["empty_label"].pack_forget()
+        grid["canvas"].pack(side="left", fill="both", expand=True)
+        grid["scrollbar"].pack(side="right", fill="y")
         
-        # Scrollable frame for units
-        canvas = tk.Canvas(self.units_display_frame, bg='black', highlightthickness=0)
-        scrollbar = ttk.Scrollbar(self.units_display_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg='black')
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
+        # The scroll region stands in for every row; only the visible ones get cards
+        rows = (len(grid["units"]) + self.UNIT_GRID_COLUMNS - 1) // self.UNIT_GRID_COLUMNS
+        grid["canvas"].configure(scrollregion=(0, 0, grid["width"], rows * self.UNIT_CARD_HEIGHT))
+        grid["canvas"].yview_moveto(0)
         
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        # Different units may now sit behind the same card
+        for card in grid["pool"]:
+            card["bound"] = None
+            
+        self.render_visible_units()
         
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+    def create_unit_grid(self):
+        """Create the virtual scrolling canvas that recycles unit cards"""
+        canvas = tk.Canvas(self.units_display_frame, bg='black', highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self.units_display_frame, orient="vertical", command=canvas.yview)
+        empty_label = tk.Label(self.units_display_frame, text="No units match the current filter", 
+                               font=self.body_font, bg='black', fg='#666666')
+        
+        self.unit_grid = {
+            "frame": self.units_display_frame,
+            "canvas": canvas,
+            "scrollbar": scrollbar,
+            "empty_label": empty_label,
+            "units": [],
+            "pool": [],
+            "width": 0,
+            "height": 0
+        }
         
-        # Display units in grid
-        for i, (unit, original_idx) in enumerate(filtered_units):
-            row = i // 3
-            col = i % 3
-            
-            # Calculate level-scaled base stats and final stats with runes
-            base_stats = self.calculate_unit_level_stats(unit)
-            final_stats = self.calculate_unit_stats_with_runes(unit)
-            
-            unit_frame = tk.LabelFrame(
-                scrollable_frame,
-                text=f"{unit['entity']['name']} (Lv.{unit['level']})",
-                font=self.body_font,
-                bg='#1a1a1a',
-                fg=self.rarity_colors[unit['entity']['rarity']],
-                bd=2,
-                relief='ridge'
-            )
-            unit_frame.grid(row=row, column=col, padx=10, pady=10, sticky='nsew')
-            
-            # Unit stats display: Base on left, bonus on right in green
-            stats_frame = tk.Frame(unit_frame, bg='#1a1a1a')
-            stats_frame.pack(pady=5, padx=5, fill='x')
-            
-            # HP display
-            hp_frame = tk.Frame(stats_frame, bg='#1a1a1a')
-            hp_frame.pack(fill='x', pady=1)
-            
-            hp_base_label = tk.Label(hp_frame, text=f"❤️ {base_stats['hp']}", font=self.small_font, bg='#1a1a1a', fg='white')
-            hp_base_label.pack(side='left')
-            
-            hp_bonus = final_stats['hp'] - base_stats['hp']
-            if hp_bonus > 0:
-                hp_bonus_label = tk.Label(hp_frame, text=f" +{hp_bonus}", font=self.small_font, bg='#1a1a1a', fg='#66FF66')
-                hp_bonus_label.pack(side='left')
-            
-            # Attack display
-            atk_frame = tk.Frame(stats_frame, bg='#1a1a1a')
-            atk_frame.pack(fill='x', pady=1)
-            
-            atk_base_label = tk.Label(atk_frame, text=f"⚔️ {base_stats['attack']}", font=self.small_font, bg='#1a1a1a', fg='white')
-            atk_base_label.pack(side='left')
+        # Every scroll position change re-binds the cards to the rows now in view
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            self.render_visible_units()
             
-            atk_bonus = final_stats['attack'] - base_stats['attack']
-            if atk_bonus > 0:
-                atk_bonus_label = tk.Label(atk_frame, text=f" +{atk_bonus}", font=self.small_font, bg='#1a1a1a', fg='#66FF66')
-                atk_bonus_label.pack(side='left')
+        def on_resize(event):
+            self.unit_grid["width"] = event.width
+            self.unit_grid["height"] = event.height
+            self.refresh_unit_grid_layout()
             
-            # Defense display
-            def_frame = tk.Frame(stats_frame, bg='#1a1a1a')
-            def_frame.pack(fill='x', pady=1)
-            
-            def_base_label = tk.Label(def_frame, text=f"🛡️ {base_stats['defense']}", font=self.small_font, bg='#1a1a1a', fg='white')
-            def_base_label.pack(side='left')
+        canvas.configure(yscrollcommand=on_scroll)
+        canvas.bind("<Configure>", on_resize)
+        return self.unit_grid
+        
+    def refresh_unit_grid_layout(self):
+        """Resize the scroll region and card widths after the canvas changes size"""
+        grid = self.unit_grid
+        rows = (len(grid["units"]) + self.UNIT_GRID_COLUMNS - 1) // self.UNIT_GRID_COLUMNS
+        grid["canvas"].configure(scrollregion=(0, 0, grid["width"], rows * self.UNIT_CARD_HEIGHT))
+        
+        card_width = max(1, grid["width"] // self.UNIT_GRID_COLUMNS - 20)
+        for card in grid["pool"]:
+            grid["canvas"].itemconfig(card["window"], width=card_width)
             
-            def_bonus = final_stats['defense'] - base_stats['defense']
-            if def_bonus > 0:
-                def_bonus_label = tk.Label(def_frame, text=f" +{def_bonus}", font=self.small_font, bg='#1a1a1a', fg='#66FF66')
-                def_bonus_label.pack(side='left')
+        self.render_visible_units()
+        
+    def render_visible_units(self):
+        """Place pooled cards on the visible rows and bind them to the units there"""
+        grid = getattr(self, 'unit_grid', None)
+        if grid is None or not grid["units"]:
+            return
             
-            # Speed display
-            spd_frame = tk.Frame(stats_frame, bg='#1a1a1a')
-            spd_frame.pack(fill='x', pady=1)
+        canvas = grid["canvas"]
+        columns = self.UNIT_GRID_COLUMNS
+        first_row = max(0, int(canvas.canvasy(0)) // self.UNIT_CARD_HEIGHT)
+        visible_rows = grid["height"] // self.UNIT_CARD_HEIGHT + 2
+        
+        # Grow the pool to cover the viewport; it never depends on inventory size
+        while len(grid["pool"]) < visible_rows * columns:
+            grid["pool"].append(self.create_unit_card(canvas))
             
-            spd_base_label = tk.Label(spd_frame, text=f"⚡ {base_stats['speed']}", font=self.small_font, bg='#1a1a1a', fg='white')
-            spd_base_label.pack(side='left')
+        col_width = grid["width"] // columns
+        for k, card in enumerate(grid["pool"]):
+            i = first_row * columns + k
+            if i >= len(grid["units"]):
+                canvas.itemconfig(card["window"], state='hidden')
+                continue
+                
+            unit, original_idx = grid["units"][i]
+            if card["bound"] != (id(unit), original_idx):
+                self.bind_unit_card(card, unit, original_idx)
+                
+            row = i // columns
+            col = i % columns
+            canvas.coords(card["window"], col * col_width + 10, row * self.UNIT_CARD_HEIGHT + 10)
+            canvas.itemconfig(card["window"], state='normal')
             
-            spd_bonus = final_stats['speed'] - base_stats['speed']
-            if spd_bonus > 0:
-                spd_bonus_label = tk.Label(spd_frame, text=f" +{spd_bonus}", font=self.small_font, bg='#1a1a1a', fg='#66FF66')
-                spd_bonus_label.pack(side='left')
+    def create_unit_card(self, canvas):
+        """Create one reusable unit card; bind_unit_card fills it in"""
+        unit_frame = tk.LabelFrame(
+            canvas,
+            font=self.body_font,
+            bg='#1a1a1a',
+            bd=2,
+            relief='ridge'
+        )
+        card = {"frame": unit_frame, "bound": None, "unit_idx": None}
+        card["window"] = canvas.create_window(
+            (0, 0), window=unit_frame, anchor="nw",
+            width=max(1, self.unit_grid["width"] // self.UNIT_GRID_COLUMNS - 20),
+            height=self.UNIT_CARD_HEIGHT - 20
+        )
+        
+        # Unit stats display: Base on left, bonus on right in green
+        stats_frame = tk.Frame(unit_frame, bg='#1a1a1a')
+        stats_frame.pack(pady=5, padx=5, fill='x')
+        
+        card["stats"] = {}
+        for stat in ("hp", "attack", "defense", "speed"):
+            stat_frame = tk.Frame(stats_frame, bg='#1a1a1a')
+            stat_frame.pack(fill='x', pady=1)
             
-            # No stats_text variable exists anymore - removed this label
+            base_label = tk.Label(stat_frame, font=self.small_font, bg='#1a1a1a', fg='white')
+            base_label.pack(side='left')
             
-            # Rune slots display
-            runes_frame = tk.Frame(unit_frame, bg='#1a1a1a')
-            runes_frame.pack(pady=5)
+            bonus_label = tk.Label(stat_frame, font=self.small_font, bg='#1a1a1a', fg='#66FF66')
+            bonus_label.pack(side='left')
+            card["stats"][stat] = (base_label, bonus_label)
             
-            runes_label = tk.Label(
-                runes_frame,
-                text="Rune Slots:",
-                font=self.small_font,
-                bg='#1a1a1a',
-                fg='#CCCCCC'
-            )
-            runes_label.pack()
-            
-            slots_frame = tk.Frame(runes_frame, bg='#1a1a1a')
-            slots_frame.pack()
-            
-            # 6 rune slots with types
-            slot_types = ["⚔️", "🛡️", "💎", "✨", "✨", "✨"]
-            for slot in range(1, 7):
-                equipped_rune = None
-                if slot in unit.get('runes', {}):
-                    rune_id = unit['runes'][slot]
-                    equipped_rune = next((r for r in self.player_runes if r["id"] == rune_id), None)
-                
-                slot_color = '#006600' if equipped_rune else '#333333'
-                slot_text = slot_types[slot-1] if equipped_rune else f"[{slot}]"
-                
-                slot_btn = tk.Button(
-                    slots_frame,
-                    text=slot_text,
-                    command=lambda u=original_idx, s=slot: self.manage_rune_slot_inline(u, s),
-                    font=self.small_font,
-                    bg=slot_color,
-                    fg='white',
-                    width=4,
-                    height=1
-                )
-                slot_btn.pack(side='left', padx=1)
-                
-            # Buttons frame
-            btn_frame = tk.Frame(unit_frame, bg='#1a1a1a')
-            btn_frame.pack(pady=5)
-                
-            # Details button
-            details_btn = tk.Button(
-                btn_frame,
-                text="📋 Details",
-                command=lambda u=original_idx: self.show_unit_details_inline(u),
+        # Rune slots display
+        runes_frame = tk.Frame(unit_frame, bg='#1a1a1a')
+        runes_frame.pack(pady=5)
+        
+        runes_label = tk.Label(
+            runes_frame,
+            text="Rune Slots:",
+            font=self.small_font,
+            bg='#1a1a1a',
+            fg='#CCCCCC'
+        )
+        runes_label.pack()
+        
+        slots_frame = tk.Frame(runes_frame, bg='#1a1a1a')
+        slots_frame.pack()
+        
+        # Buttons act on whichever unit the card is bound to when clicked
+        card["slots"] = []
+        for slot in range(1, 7):
+            slot_btn = tk.Button(
+                slots_frame,
+                command=lambda c=card, s=slot: self.manage_rune_slot_inline(c["unit_idx"], s),
                 font=self.small_font,
-                bg='#006666',
                 fg='white',
-                width=10
+                width=4,
+                height=1
             )
-            details_btn.pack(side='left', padx=2)
+            slot_btn.pack(side='left', padx=1)
+            card["slots"].append(slot_btn)
             
-            # Test Unit button
-            test_btn = tk.Button(
-                btn_frame,
-                text="⚔️ Test",
-                command=lambda u=original_idx: self.start_unit_test(u),
-                font=self.small_font,
-                bg='#CC3300',
-                fg='white',
-                width=10
-            )
-            test_btn.pack(side='left', padx=2)
+        # Buttons frame
+        btn_frame = tk.Frame(unit_frame, bg='#1a1a1a')
+        btn_frame.pack(pady=5)
             
-        # Configure grid weights
-        for col in range(3):
-            scrollable_frame.grid_columnconfigure(col, weight=1)
+        # Details button
+        details_btn = tk.Button(
+            btn_frame,
+            text="📋 Details",
+            command=lambda c=card: self.show_unit_details_inline(c["unit_idx"]),
+            font=self.small_font,
+            bg='#006666',
+            fg='white',
+            width=10
+        )
+        details_btn.pack(side='left', padx=2)
+        
+        # Test Unit button
+        test_btn = tk.Button(
+            btn_frame,
+            text="⚔️ Test",
+            command=lambda c=card: self.start_unit_test(c["unit_idx"]),
+            font=self.small_font,
+            bg='#CC3300',
+            fg='white',
+            width=10
+        )
+        test_btn.pack(side='left', padx=2)
+        
+        return card
+        
+    def bind_unit_card(self, card, unit, original_idx):
+        """Show a unit on a pooled card, computing its stats only now that it is visible"""
+        card["bound"] = (id(unit), original_idx)
+        card["unit_idx"] = original_idx
+        
+        card["frame"].config(
+            text=f"{unit['entity']['name']} (Lv.{unit['level']})",
+            fg=self.rarity_colors[unit['entity']['rarity']]
+        )
+        
+        # Calculate level-scaled base stats and final stats with runes
+        base_stats = self.calculate_unit_level_stats(unit)
+        final_stats = self.calculate_unit_stats_with_runes(unit)
+        
+        icons = {"hp": "❤️", "attack": "⚔️", "defense": "🛡️", "speed": "⚡"}
+        for stat, (base_label, bonus_label) in card["stats"].items():
+            base_label.config(text=f"{icons[stat]} {base_stats[stat]}")
+            bonus = final_stats[stat] - base_stats[stat]
+            bonus_label.config(text=f" +{bonus}" if bonus > 0 else "")
+            
+        # 6 rune slots with types
+        slot_types = ["⚔️", "🛡️", "💎", "✨", "✨", "✨"]
+        for slot, slot_btn in enumerate(card["slots"], 1):
+            equipped_rune = None
+            if slot in unit.get('runes', {}):
+                rune_id = unit['runes'][slot]
+                equipped_rune = self.player_runes.get(rune_id)
+                
+            slot_btn.config(
+                text=slot_types[slot-1] if equipped_rune else f"[{slot}]",
+                bg='#006600' if equipped_rune else '#333333'
+            )
             
     def get_filtered_units(self):
         """Get filtered and sorted units with their original indices"""
@@ -2531,7 +5444,7 @@ class NightmareNexusGUI:
         equipped_runes = unit.get('runes', {})
         if equipped_runes:
             for slot, rune_id in equipped_runes.items():
-                rune = next((r for r in self.player_runes if r["id"] == rune_id), None)
+                rune = self.player_runes.get(rune_id)
                 if rune:
                     slot_names = {1: "⚔️ Weapon", 2: "🛡️ Armor", 3: "💎 Accessory", 4: "✨ Enhance", 5: "✨ Enhance", 6: "✨ Enhance"}
                     rune_text = f"{slot_names.get(slot, f'Slot {slot}')}: {rune['name']} (Lv.{rune['level']})\n"
@@ -2548,7 +5461,7 @@ class NightmareNexusGUI:
                     rune_label.pack(anchor='w', padx=5, pady=2)
                     
             # Show active set bonuses
-            active_sets = self.get_active_set_names([r for r in self.player_runes if r['id'] in equipped_runes.values()])
+            active_sets = self.get_active_set_names([r for r in map(self.player_runes.get, equipped_runes.values()) if r])
             if active_sets:
                 sets_title = tk.Label(
                     runes_frame,
@@ -2750,7 +5663,7 @@ class NightmareNexusGUI:
         equipped_rune_id = unit.get('runes', {}).get(slot)
         equipped_rune = None
         if equipped_rune_id:
-            equipped_rune = next((r for r in self.player_runes if r["id"] == equipped_rune_id), None)
+            equipped_rune = self.player_runes.get(equipped_rune_id)
             
         if equipped_rune:
             # Show equipped rune details
@@ -2898,6 +5811,14 @@ class NightmareNexusGUI:
         
     def get_compatible_runes(self, slot):
         """Get runes compatible with the specified slot"""
+        rarity_order = {"Common": 0, "Rare": 1, "Epic": 2, "Legendary": 3}
+        columns = self.player_runes.get_columns()
+        if columns is not None:
+            slot_types = [name for name, info in self.rune_types.items()
+                          if slot in (info["slot"] if isinstance(info["slot"], list) else [info["slot"]])]
+            return columns.select(types=slot_types, equipped=False,
+                                  order_by=[("rarity", True), ("level", True)], ranks={"rarity": rarity_order})
+            
         compatible_runes = []
         
         for rune in self.player_runes:
@@ -2914,7 +5835,6 @@ class NightmareNexusGUI:
                         compatible_runes.append(rune)
                         
         # Sort by rarity then level
-        rarity_order = {"Common": 0, "Rare": 1, "Epic": 2, "Legendary": 3}
         compatible_runes.sort(key=lambda r: (rarity_order.get(r['rarity'], 0), r['level']), reverse=True)
         
         return compatible_runes
@@ -2924,62 +5844,292 @@ class NightmareNexusGUI:
         if not self.player_runes or not self.player_inventory:
             return
             
-        # Define optimal stat priorities for each unit type
-        unit_priorities = {
-            "Jeff the Killer": ["Crit Rate", "Crit Damage", "Attack%", "Speed", "Attack"],
-            "SCP-682": ["HP%", "Defense%", "HP", "Defense", "Attack%"],
-            "Slender": ["Speed", "Accuracy", "HP%", "Evasion", "Attack%"],
-            "Iris": ["Attack%", "Speed", "Accuracy", "Attack", "HP%"],
-            "SCP-999": ["HP%", "Speed", "Defense%", "HP", "Defense"],
-            "The Rake": ["Attack%", "Crit Rate", "Speed", "Crit Damage", "Attack"],
-            "Kuchisake-onna": ["Crit Rate", "Crit Damage", "Attack%", "Speed", "Attack"],
-            "Mothman": ["Speed", "Accuracy", "Attack%", "HP%", "Evasion"],
-            "Bloody Mary": ["HP%", "Defense%", "Speed", "Attack%", "HP"]
-        }
+        self.optimize_rune_loadouts(range(len(self.player_inventory)))
         
-        for unit_idx, unit in enumerate(self.player_inventory):
-            unit_name = unit['entity']['name']
-            priorities = unit_priorities.get(unit_name, ["Attack%", "HP%", "Speed", "Defense%", "Crit Rate"])
-            
-            # Get available runes for each slot type
-            for slot in range(1, 7):
-                compatible_runes = self.get_compatible_runes(slot)
-                
-                if not compatible_runes:
-                    continue
+        # Then let units trade into set bonuses with the runes left over
+        self.equip_set_loadouts(range(len(self.player_inventory)))
+        
+    def loadout_coefficients(self, unit):
+        """Per rune stat name, the value of one point of it for this unit, plus each set bonus's value.
+        
+        Values are priority-weighted percent gains: flat HP/Attack/Defense/Speed
+        count as a percentage of the unit's level stats, other stats as points.
+        """
+        base_stats = self.calculate_unit_level_stats(unit)
+        priorities = self.unit_rune_priorities.get(unit['entity']['name'], self.default_rune_priorities)
+        weights = {}
+        for i, stat_name in enumerate(priorities):
+            stat = stat_name.replace("%", "").lower().replace(" ", "_")
+            weights[stat] = max(weights.get(stat, 1), 10 - i)
+            
+        def stat_value(stat, amount, is_percent):
+            if stat not in base_stats:
+                return 0  # Not a unit stat (e.g. stun chance)
+            weight = weights.get(stat, 1)
+            if stat in ("hp", "attack", "defense", "speed"):
+                return weight * (amount if is_percent else amount * 100 / max(1, base_stats[stat]))
+            return weight * (amount * base_stats[stat] / 100 if is_percent else amount)
+            
+        coefficients = {name: stat_value(name.replace("%", "").lower().replace(" ", "_"), 1, name.endswith("%"))
+                        for name in self.rune_stats}
+        set_bonuses = {}
+        for set_name, set_info in self.rune_sets.items():
+            set_bonuses[set_name] = sum(stat_value(stat.replace("_percent", ""), amount, stat.endswith("_percent"))
+                                        for stat, amount in set_info["stats"].items())
+        return coefficients, set_bonuses
+        
+    def loadout_classes(self, unit_indices):
+        """Group units whose loadout coefficients match; returns [(coefficients, set_bonuses, unit indices)].
+        
+        Units of the same entity and level value every rune alike, so the solvers
+        only need to score runes once per class.
+        """
+        classes = {}
+        for idx in unit_indices:
+            coefficients, set_bonuses = self.loadout_coefficients(self.player_inventory[idx])
+            key = tuple(sorted(coefficients.items()))
+            if key not in classes:
+                classes[key] = (coefficients, set_bonuses, [])
+            classes[key][2].append(idx)
+        return [classes[key] for key in sorted(classes)]
+        
+    def rune_loadout_value(self, rune, coefficients):
+        """A rune's value for a unit, scaled by rune level like calculate_unit_stats_with_runes"""
+        value = coefficients.get(rune["main_stat"], 0) * rune["main_value"] * (1 + (rune["level"] - 1) * 0.1)
+        sub_value = 0
+        for substat, amount in rune["substats"].items():
+            sub_value += coefficients.get(substat, 0) * amount
+        return value + sub_value * (1 + (rune["level"] - 1) * 0.05)
+        
+    def rune_loadout_weights(self, runes, coefficient_sets):
+        """rune_loadout_value of every rune under each set of coefficients, as weights[k][r].
+        
+        A rune's value is linear in the coefficients, so each rune is broken down
+        into points per stat once; with NumPy the weights are one matrix product.
+        """
+        points = []
+        for rune in runes:
+            level = rune["level"] - 1
+            row = {rune["main_stat"]: rune["main_value"] * (1 + level * 0.1)}
+            for substat, amount in rune["substats"].items():
+                row[substat] = row.get(substat, 0) + amount * (1 + level * 0.05)
+            points.append(row)
+            
+        if np is None:
+            return [[sum(coefficients.get(stat, 0) * amount for stat, amount in row.items()) for row in points]
+                    for coefficients in coefficient_sets]
                     
-                # Score runes based on unit priorities
-                best_rune = None
-                best_score = 0
+        stat_index = {stat: i for i, stat in enumerate(self.rune_stats)}
+        rows, cols, amounts = [], [], []
+        for r, row in enumerate(points):
+            for stat, amount in row.items():
+                if stat in stat_index:
+                    rows.append(r)
+                    cols.append(stat_index[stat])
+                    amounts.append(amount)
+        matrix = np.zeros((len(points), len(stat_index)))
+        matrix[rows, cols] = amounts
+        coefficient_matrix = np.array([[coefficients.get(stat, 0) for stat in stat_index]
+                                       for coefficients in coefficient_sets])
+        return (coefficient_matrix @ matrix.T).tolist()
+        
+    def loadout_value(self, runes, coefficients, set_bonuses):
+        """Total value of a set of equipped runes, including completed set bonuses"""
+        set_counts = {}
+        value = 0
+        for rune in runes:
+            value += self.rune_loadout_value(rune, coefficients)
+            set_counts[rune.get("set", "")] = set_counts.get(rune.get("set", ""), 0) + 1
+        for set_name, count in set_counts.items():
+            if set_name in self.rune_sets and count >= self.rune_sets[set_name]["pieces"]:
+                value += set_bonuses[set_name]
+        return value
+        
+    def rune_type_slots(self):
+        """The slots each rune type can go in"""
+        return {rune_type: type_info["slot"] if isinstance(type_info["slot"], list) else [type_info["slot"]]
+                for rune_type, type_info in self.rune_types.items()}
                 
-                for rune in compatible_runes:
-                    if rune['equipped_unit'] is not None:
-                        continue
-                        
-                    score = 0
-                    
-                    # Score main stat
-                    main_stat = rune['main_stat']
-                    if main_stat in priorities:
-                        score += (10 - priorities.index(main_stat)) * 100
+    def search_loadout(self, buckets, set_bonuses, floor=None):
+        """Best loadout from {(type, set): [(value, rune id, rune)]} candidate buckets; returns (value, {slot: rune}).
+        
+        With a floor, returns (floor, None) unless some loadout is worth more.
+        """
+        slots_by_type = self.rune_type_slots()
+        
+        # Swapping in a better rune of the same type and set never hurts, so each
+        # (type, set) only needs as many candidates as the type has slots
+        candidates = {rune_type: [] for rune_type in slots_by_type}
+        for (rune_type, set_name), bucket in buckets.items():
+            for value, _, rune in heapq.nlargest(len(slots_by_type[rune_type]), bucket):
+                candidates[rune_type].append((value, set_name, rune))
+                
+        groups = []
+        for rune_type, slots in slots_by_type.items():
+            candidates[rune_type].sort(key=lambda c: c[0], reverse=True)
+            groups.append((len(slots), candidates[rune_type]))
+            
+        set_pieces = {set_name: set_info["pieces"] for set_name, set_info in self.rune_sets.items()}
+        value, picks = search_rune_loadout(groups, set_bonuses, set_pieces, floor)
+        if picks is None:
+            return value, None
+            
+        loadout = {}
+        for slots, runes in zip(slots_by_type.values(), picks):
+            for slot, rune in zip(slots, runes):
+                loadout[slot] = rune
+        return value, loadout
+        
+    def optimize_unit_loadout(self, unit_idx):
+        """Find the best 6-slot loadout for one unit, set bonuses included; returns (value, {slot: rune})"""
+        unit = self.player_inventory[unit_idx]
+        own_ids = set(unit.get("runes", {}).values())
+        coefficients, set_bonuses = self.loadout_coefficients(unit)
+        slots_by_type = self.rune_type_slots()
+        
+        # Same arithmetic as rune_loadout_value, inlined since this runs over every rune
+        coefficient = coefficients.get
+        buckets = {}
+        for rune in self.player_runes:
+            if rune["equipped_unit"] is not None and rune["id"] not in own_ids:
+                continue
+            if rune["type"] not in slots_by_type:
+                continue
+            level = rune["level"] - 1
+            sub_value = 0
+            for substat, amount in rune["substats"].items():
+                sub_value += coefficient(substat, 0) * amount
+            value = coefficient(rune["main_stat"], 0) * rune["main_value"] * (1 + level * 0.1) + sub_value * (1 + level * 0.05)
+            buckets.setdefault((rune["type"], rune.get("set", "")), []).append((value, rune["id"], rune))
+            
+        return self.search_loadout(buckets, set_bonuses)
+        
+    def equip_unit_loadout(self, unit_idx):
+        """Switch a unit to its best set-aware loadout if that beats what it wears; returns True if changed"""
+        unit = self.player_inventory[unit_idx]
+        value, loadout = self.optimize_unit_loadout(unit_idx)
+        
+        coefficients, set_bonuses = self.loadout_coefficients(unit)
+        current = [rune for rune in map(self.player_runes.get, unit.get("runes", {}).values()) if rune]
+        if value <= self.loadout_value(current, coefficients, set_bonuses) + 1e-9:
+            return False
+            
+        for slot in list(unit.get("runes", {})):
+            self.unequip_rune(unit_idx, slot)
+        for slot, rune in loadout.items():
+            self.equip_rune(unit_idx, slot, rune['id'])
+        return True
+        
+    def equip_set_loadouts(self, unit_indices):
+        """Let units swap into set-aware loadouts using the unequipped runes; returns how many units changed.
+        
+        The leftover runes are bucketed and scored once per coefficient class, and
+        every unit searches against that same pool, so no unit gets first pick by
+        its place in the inventory. The biggest gains are applied first; a unit
+        whose picks clash with runes already taken searches again without them.
+        """
+        slots_by_type = self.rune_type_slots()
+        units = [idx for idx in unit_indices if idx < len(self.player_inventory)]
+        classes = self.loadout_classes(units)
+        
+        leftover = [r for r in self.player_runes if r["equipped_unit"] is None and r["type"] in slots_by_type]
+        leftover_ids = [r["id"] for r in leftover]
+        leftover_buckets = {}
+        for i, rune in enumerate(leftover):
+            leftover_buckets.setdefault((rune["type"], rune.get("set", "")), []).append(i)
+        weights = self.rune_loadout_weights(leftover, [coefficients for coefficients, _, _ in classes])
+        
+        taken = set()  # Leftover runes claimed by units already switched
+        taken_per_bucket = {}
+        tops = {}  # (class, bucket) -> best leftover candidates, enough to cover the taken ones
+        
+        def leftover_candidates(k, key):
+            needed = len(slots_by_type[key[0]]) + taken_per_bucket.get(key, 0)
+            if (k, key) not in tops or len(tops[k, key]) < min(needed, len(leftover_buckets[key])):
+                # Grow geometrically so repeated takes from one bucket don't rescan it each time
+                needed = max(needed, 2 * len(tops.get((k, key), ())))
+                class_weights = weights[k]
+                top = heapq.nlargest(needed, ((class_weights[i], leftover_ids[i], i) for i in leftover_buckets[key]))
+                tops[k, key] = [(value, rune_id, leftover[i]) for value, rune_id, i in top]
+            return [c for c in tops[k, key] if c[1] not in taken]
+            
+        unit_class = {idx: k for k, (_, _, members) in enumerate(classes) for idx in members}
+        pending = units
+        changed = 0
+        while pending:
+            proposals = []
+            for idx in pending:
+                k = unit_class[idx]
+                coefficients, set_bonuses, _ = classes[k]
+                own = self.player_inventory[idx].get("runes", {})
+                current = [rune for rune in map(self.player_runes.get, (own[slot] for slot in sorted(own))) if rune]
+                buckets = {key: leftover_candidates(k, key) for key in leftover_buckets}
+                for rune in current:
+                    buckets.setdefault((rune["type"], rune.get("set", "")), []).append(
+                        (self.rune_loadout_value(rune, coefficients), rune["id"], rune))
+                current_value = self.loadout_value(current, coefficients, set_bonuses)
+                value, loadout = self.search_loadout(buckets, set_bonuses, floor=current_value + 1e-9)
+                if loadout is not None:
+                    proposals.append((current_value - value, idx, loadout))
                     
-                    # Score substats
-                    for substat in rune['substats']:
-                        if substat in priorities:
-                            score += (10 - priorities.index(substat)) * 10
-                            
-                    # Bonus for higher rarity and level
-                    rarity_bonus = {"Common": 1, "Rare": 2, "Epic": 4, "Legendary": 8}
-                    score += rarity_bonus[rune['rarity']] * 5
-                    score += rune['level'] * 2
+            # Runes a switching unit gives up stay unequipped rather than joining this pool
+            proposals.sort(key=lambda p: p[:2])
+            pending = []
+            for _, idx, loadout in proposals:
+                claimed = [rune for rune in loadout.values() if rune["equipped_unit"] != idx]
+                if any(rune["id"] in taken for rune in claimed):
+                    pending.append(idx)
+                    continue
+                for rune in claimed:
+                    taken.add(rune["id"])
+                    key = (rune["type"], rune.get("set", ""))
+                    taken_per_bucket[key] = taken_per_bucket.get(key, 0) + 1
+                for slot in list(self.player_inventory[idx].get("runes", {})):
+                    self.unequip_rune(idx, slot)
+                for slot, rune in loadout.items():
+                    self.equip_rune(idx, slot, rune["id"])
+                changed += 1
+        return changed
+        
+    def optimize_rune_loadouts(self, unit_indices, time_budget=0.5):
+        """Re-equip the given units with the best overall rune assignment; returns runes equipped"""
+        deadline = time.perf_counter() + time_budget
+        units = [(idx, self.player_inventory[idx]) for idx in unit_indices if idx < len(self.player_inventory)]
+        
+        # Runes already on these units are back in play; runes on other units stay put
+        own_ids = {rune_id for _, unit in units for rune_id in unit.get("runes", {}).values()}
+        available = [r for r in self.player_runes if r["equipped_unit"] is None or r["id"] in own_ids]
+        
+        # Weights are rune_loadout_value, the same objective the set-aware search uses
+        classes = self.loadout_classes([idx for idx, _ in units])
+        
+        # Solve each rune type on its own: one slot each, or three for Enhancement
+        assignment = []
+        for rune_type, type_info in self.rune_types.items():
+            slots = type_info["slot"] if isinstance(type_info["slot"], list) else [type_info["slot"]]
+            runes = [r for r in available if r["type"] == rune_type]
+            if not runes:
+                continue
+                
+            capacities = [len(members) * len(slots) for _, _, members in classes]
+            weights = self.rune_loadout_weights(runes, [coefficients for coefficients, _, _ in classes])
+            owned = assign_runes_to_classes(capacities, weights, deadline)
+            
+            # Deal each class's runes best-first so identical units share them evenly
+            for (_, _, members), rune_idxs, class_weights in zip(classes, owned, weights):
+                rune_idxs.sort(key=lambda r: class_weights[r], reverse=True)
+                for n, r in enumerate(rune_idxs):
+                    assignment.append((members[n % len(members)], slots[n // len(members)], runes[r]))
                     
-                    if score > best_score:
-                        best_score = score
-                        best_rune = rune
-                        
-                # Equip the best rune found
-                if best_rune:
-                    self.equip_rune(unit_idx, slot, best_rune['id'])
+        for idx, unit in units:
+            for slot in list(unit.get("runes", {})):
+                self.unequip_rune(idx, slot)
+                
+        equipped_count = 0
+        for unit_idx, slot, rune in assignment:
+            if self.equip_rune(unit_idx, slot, rune['id']):
+                equipped_count += 1
+        return equipped_count
         
     def equip_rune_inline(self, rune):
         """Equip a rune in the inline interface"""
@@ -3018,6 +6168,17 @@ class NightmareNexusGUI:
         )
         title_label.pack(pady=20)
         
+        # Win rate simulator for planning where a team can farm
+        sim_btn = tk.Button(
+            self.content_frame,
+            text="📊 Win Rate Simulator",
+            command=self.show_win_rate_simulator,
+            font=self.body_font,
+            bg='#003366',
+            fg='white'
+        )
+        sim_btn.pack(pady=5)
+        
         # World selection
         worlds_frame = tk.Frame(self.content_frame, bg='black')
         worlds_frame.pack(pady=20, padx=20, fill='both', expand=True)
@@ -3071,6 +6232,131 @@ class NightmareNexusGUI:
                 )
                 locked_label.pack(pady=10)
                 
+    def show_win_rate_simulator(self):
+        """Pick a team and estimate its win rate on every campaign stage"""
+        self.show_notification("📊 Select a team to simulate across all campaign stages")
+        self.show_team_selection_inline(self.run_win_rate_simulation)
+    
+    def run_win_rate_simulation(self, team, runs=200):
+        """Start the Monte Carlo win rate simulation in worker processes"""
+        if not team:
+            return
+        
+        self.clear_content()
+        
+        title_label = tk.Label(
+            self.content_frame,
+            text="📊 WIN RATE SIMULATOR 📊",
+            font=self.title_font,
+            bg='black',
+            fg='#66CCFF'
+        )
+        title_label.pack(pady=20)
+        
+        self.win_rate_status = tk.Label(
+            self.content_frame,
+            text=f"Simulating {runs} battles per stage...",
+            font=self.header_font,
+            bg='black',
+            fg='#FFCC66'
+        )
+        self.win_rate_status.pack(pady=10)
+        
+        # Units and their rune stats are snapshotted so the workers never see live state
+        team_stats = [(dict(unit), self.calculate_unit_stats_with_runes(unit)) for unit in team]
+        tasks = campaign_win_rate_tasks(self.entities, team_stats, runs, int(time.time()), self.skill_costs,
+                                        self.NUM_WORLDS, self.STAGES_PER_WORLD)
+        
+        executor = ProcessPoolExecutor()
+        futures = [executor.submit(simulate_campaign_stage, task) for task in tasks]
+        status = self.win_rate_status
+        self.root.after(200, lambda: self.poll_win_rate_simulation(executor, futures, team, status))
+    
+    def poll_win_rate_simulation(self, executor, futures, team, status):
+        """Update progress until every stage is simulated, then show the table"""
+        if not status.winfo_exists():
+            # The player left the simulator; drop the work instead of replacing their screen
+            executor.shutdown(wait=False, cancel_futures=True)
+            return
+        
+        done = sum(1 for future in futures if future.done())
+        if done < len(futures):
+            status.config(text=f"Simulating... {done}/{len(futures)} stages")
+            self.root.after(200, lambda: self.poll_win_rate_simulation(executor, futures, team, status))
+            return
+        
+        executor.shutdown(wait=False)
+        self.show_win_rate_results([future.result() for future in futures], team)
+    
+    def show_win_rate_results(self, results, team):
+        """Show the per-stage win rate table"""
+        self.clear_content()
+        
+        title_label = tk.Label(
+            self.content_frame,
+            text="📊 WIN RATE SIMULATOR 📊",
+            font=self.title_font,
+            bg='black',
+            fg='#66CCFF'
+        )
+        title_label.pack(pady=10)
+        
+        team_names = ", ".join(unit['entity']['name'] for unit in team)
+        runs = results[0]["runs"] if results else 0
+        info_label = tk.Label(
+            self.content_frame,
+            text=f"Team: {team_names}\n{runs} battles per stage • win % (95% range) • avg turns to clear",
+            font=self.body_font,
+            bg='black',
+            fg='white'
+        )
+        info_label.pack(pady=5)
+        
+        table_frame = tk.Frame(self.content_frame, bg='black')
+        table_frame.pack(pady=10, padx=10)
+        
+        for world_idx in range(self.NUM_WORLDS):
+            header = tk.Label(
+                table_frame,
+                text=f"World {world_idx+1}",
+                font=self.small_font,
+                bg='black',
+                fg='#FFCC66'
+            )
+            header.grid(row=0, column=world_idx, padx=3, pady=2)
+        
+        for result in results:
+            # Green when even the pessimistic bound is a safe farm
+            if result["win_rate_low"] >= 0.95:
+                color = '#66FF66'
+            elif result["win_rate"] >= 0.5:
+                color = '#FFCC66'
+            else:
+                color = '#FF6666'
+            
+            turns_text = f"{result['avg_turns']:.0f}±{result['turns_margin']:.0f}t" if result["avg_turns"] is not None else "-"
+            cell = tk.Label(
+                table_frame,
+                text=(f"{result['stage_idx']+1}: {result['win_rate']*100:.0f}% "
+                      f"({result['win_rate_low']*100:.0f}-{result['win_rate_high']*100:.0f}) {turns_text}"),
+                font=self.small_font,
+                bg='#1a1a1a',
+                fg=color,
+                width=24,
+                anchor='w'
+            )
+            cell.grid(row=result["stage_idx"] + 1, column=result["world_idx"], padx=3, pady=1)
+        
+        back_btn = tk.Button(
+            self.content_frame,
+            text="🔙 Back to Campaign",
+            command=self.show_world_campaign,
+            font=self.body_font,
+            bg='#666666',
+            fg='white'
+        )
+        back_btn.pack(pady=10)
+
     def enter_world(self, world_idx):
         """Enter a specific world and show stage selection"""
         self.navigate_to(f"world_{world_idx}")
@@ -3391,13 +6677,16 @@ class NightmareNexusGUI:
             total_waves = 3  # Story stages have 3 waves
             self.show_notification(f"📖 Story Stage: Face {total_waves} waves of enemies!")
         
+        # Every wave is rolled up front so the battle engine owns the whole fight
+        waves = [self.generate_enemies(world_idx, stage_idx, wave=wave) for wave in range(1, total_waves + 1)]
+        
         # Initialize battle state with multi-wave support and user preferences
         self.battle_state = {
             "type": "campaign",
             "world_idx": world_idx,
             "stage_idx": stage_idx,
             "team": team.copy(),
-            "enemies": self.generate_enemies(world_idx, stage_idx, wave=1),
+            "enemies": waves[0],
             "current_turn": 0,
             "turn_order": [],
             "auto_battle": self.auto_battle_preference,  # Use saved preference
@@ -3412,20 +6701,13 @@ class NightmareNexusGUI:
         # Initialize units with proper stat calculations
         for unit in self.battle_state["team"]:
             final_stats = self.calculate_unit_stats_with_runes(unit)
-            unit["battle_stats"] = final_stats.copy()  # Store calculated stats for battle use
-            unit["battle_hp"] = final_stats["hp"]  # Use final calculated HP
-            unit["max_hp"] = final_stats["hp"]     # Store max HP from final stats
-            unit["max_sp"] = final_stats["sp_cap"]
-            unit["sp"] = int(final_stats["sp_cap"] * 0.7)  # Start with 70% SP
-            unit["effects"] = []
-            unit["defending"] = False
-            # Jeff starts with 1 ghost stack (Go to Sleep passive)
-            if unit["entity"]["name"] == "Jeff the Killer":
-                unit["effects"].append({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
+            BattleEngine.prepare_unit(unit, final_stats.copy(), int(final_stats["sp_cap"] * 0.7))  # Start with 70% SP
                 
         for enemy in self.battle_state["enemies"]:
             enemy["effects"] = []
             
+        self.create_battle_engine(waves)
+            
         # Show battle interface
         self.show_battle_interface()
         
@@ -3436,116 +6718,7 @@ class NightmareNexusGUI:
         
     def generate_enemies(self, world_idx, stage_idx, wave=1):
         """Generate enemies for a stage with enhanced difficulty scaling and progression gating"""
-        is_boss_stage = (stage_idx + 1) % 10 == 0
-        
-        # Enhanced difficulty scaling - more aggressive progression
-        world_difficulty = 1.0 + (world_idx * 0.5)  # Increased from 0.3
-        stage_difficulty = 1.0 + (stage_idx * 0.15)  # Increased from 0.1
-        wave_difficulty = 1.0 + ((wave - 1) * 0.25)  # Increased from 0.2
-        
-        # Progressive enemy rarity scaling based on world progression
-        if world_idx == 0:  # World 1: Mostly Common/Rare
-            story_rarities = [["Common"], ["Common", "Rare"], ["Rare"]]
-            boss_rarities = [["Common", "Rare"], ["Rare"], ["Rare", "Epic"]]
-        elif world_idx == 1:  # World 2: Rare/Epic introduction
-            story_rarities = [["Common", "Rare"], ["Rare"], ["Rare", "Epic"]]
-            boss_rarities = [["Rare"], ["Rare", "Epic"], ["Epic"]]
-        elif world_idx == 2:  # World 3: Epic becomes common
-            story_rarities = [["Rare"], ["Rare", "Epic"], ["Epic"]]
-            boss_rarities = [["Rare", "Epic"], ["Epic"], ["Epic", "Legendary"]]
-        elif world_idx == 3:  # World 4: Epic/Legendary
-            story_rarities = [["Rare", "Epic"], ["Epic"], ["Epic", "Legendary"]]
-            boss_rarities = [["Epic"], ["Epic", "Legendary"], ["Legendary"]]
-        else:  # World 5+: End game content
-            story_rarities = [["Epic"], ["Epic", "Legendary"], ["Legendary"]]
-            boss_rarities = [["Epic", "Legendary"], ["Legendary"], ["Legendary"]]
-        
-        if is_boss_stage:
-            # Boss stage enemy generation with enhanced scaling
-            if wave < 5:
-                num_enemies = min(3 + wave, 7)  # 4-8 enemies
-                if wave <= 2:
-                    enemy_rarities = boss_rarities[0]
-                elif wave <= 4:
-                    enemy_rarities = boss_rarities[1] 
-                else:
-                    enemy_rarities = boss_rarities[2]
-            else:
-                # Wave 5: The actual boss + elite minions
-                num_enemies = random.randint(2, 4)  # Boss + 1-3 minions
-                enemy_rarities = ["Epic", "Legendary"]
-        else:
-            # Story stage enemy generation with progression scaling
-            if wave == 1:
-                num_enemies = random.randint(3, 5)  # Slightly more enemies
-                enemy_rarities = story_rarities[0]
-            elif wave == 2:
-                num_enemies = random.randint(4, 6)  # More challenging
-                enemy_rarities = story_rarities[1]
-            else:  # wave == 3
-                num_enemies = random.randint(5, 7)  # Significantly more enemies
-                enemy_rarities = story_rarities[2]
-        
-        enemies = []
-        
-        for _ in range(num_enemies):
-            # Get base entity from appropriate rarity pool
-            available_entities = [e for e in self.entities if e["rarity"] in enemy_rarities]
-            if not available_entities:  # Fallback to common if no matches
-                available_entities = [e for e in self.entities if e["rarity"] == "Common"]
-            base_entity = random.choice(available_entities)
-            
-            # Enhanced scaling calculation
-            total_scale = world_difficulty * stage_difficulty * wave_difficulty
-            
-            # Additional scaling for boss stages (increased from 1.5 to 2.0)
-            if is_boss_stage:
-                total_scale *= 2.0
-            
-            # Late world scaling becomes more aggressive
-            if world_idx >= 3:
-                total_scale *= 1.3  # 30% bonus for worlds 4-5
-            if world_idx >= 4:
-                total_scale *= 1.2  # Additional 20% for world 5
-            
-            enemy = {
-                "name": f"{base_entity['name']} [W{world_idx+1}-{stage_idx+1}]",
-                "rarity": base_entity["rarity"],
-                "hp": int(base_entity["hp"] * total_scale),
-                "max_hp": int(base_entity["hp"] * total_scale),
-                "attack": int(base_entity["attack"] * total_scale),
-                "defense": int(base_entity["defense"] * total_scale),
-                "speed": int(base_entity["speed"] * min(total_scale, 2.0)),  # Cap speed scaling
-                "skill": base_entity["skill"],
-                "crit_rate": min(base_entity["crit_rate"] + (world_idx * 3) + (wave * 2), 30),
-                "crit_damage": base_entity["crit_damage"] + (world_idx * 10) + (wave * 5),
-                "accuracy": min(base_entity["accuracy"] + (world_idx * 5) + (wave * 3), 95),
-                "evasion": min(base_entity["evasion"] + (world_idx * 2) + wave, 25),
-                "sp": min(80 + (world_idx * 10) + (wave * 10), 150),
-                "effects": []
-            }
-            
-            # Enhanced boss generation for final wave
-            if is_boss_stage and wave == 5 and len(enemies) == 0:
-                boss_names = [
-                    "Nightmare Sovereign", "Terror Lord", "Dread King", "Horror Master", 
-                    "Void Emperor", "Abyssal Tyrant", "Shadow Overlord", "Crimson Despot"
-                ]
-                enemy["name"] = f"{random.choice(boss_names)} [W{world_idx+1} BOSS]"
-                enemy["rarity"] = "Legendary"
-                # More dramatic boss scaling
-                enemy["hp"] = int(enemy["hp"] * 3.0)  # 3x HP instead of 2.5x
-                enemy["max_hp"] = int(enemy["max_hp"] * 3.0)
-                enemy["attack"] = int(enemy["attack"] * 2.0)  # 2x attack instead of 1.8x
-                enemy["defense"] = int(enemy["defense"] * 1.8)  # 1.8x defense instead of 1.5x
-                enemy["skill"] = "boss_ultimate"
-                enemy["sp"] = 150
-                enemy["crit_rate"] = min(enemy["crit_rate"] + 10, 35)  # Boss crit bonus
-                enemy["crit_damage"] = enemy["crit_damage"] + 25  # Boss crit damage bonus
-            
-            enemies.append(enemy)
-            
-        return enemies
+        return generate_campaign_enemies(self.get_entity_pools(), world_idx, stage_idx, wave)
         
     def show_battle_interface(self):
         """Show the optimized battle interface with enhanced UX"""
@@ -3711,6 +6884,7 @@ class NightmareNexusGUI:
         log_scrollbar = ttk.Scrollbar(log_container, orient="vertical", command=self.battle_log_display.yview)
         log_scrollbar.pack(side='right', fill='y')
         self.battle_log_display.configure(yscrollcommand=log_scrollbar.set)
+        self.battle_log.attach(self.battle_log_display, clear=True)
         
         # Action buttons frame (enhanced)
         self.actions_frame = tk.LabelFrame(
@@ -3751,177 +6925,192 @@ class NightmareNexusGUI:
         self.start_battle_turn()
         
     def update_battle_display(self):
-        """Update the battle display with enhanced status tracking"""
-        # Clear existing displays
+        """Update the battle display in place, rebuilding cards only for a new battle or wave"""
+        view = getattr(self, 'battle_view', None)
+        if (view is None or view["team_display"] is not self.team_display
+                or view["enemies"] is not self.battle_state["enemies"]):
+            view = self.build_battle_view()
+            
+        current = self.battle_engine.current
+        for card in view["team_cards"]:
+            self.update_combatant_card(card, self.get_unit_card_state(card["unit"], current))
+            
+        # Enemies are numbered by position among the living, like the target buttons
+        alive_index = 0
+        for card in view["enemy_cards"]:
+            state = self.get_enemy_card_state(card["unit"], current, alive_index)
+            if state["alive"]:
+                alive_index += 1
+            self.update_combatant_card(card, state)
+        
+        # Update turn order display immediately
+        self.update_turn_display()
+        
+    def build_battle_view(self):
+        """Create one persistent card per team unit and enemy of the current wave"""
         for widget in self.team_display.winfo_children():
             widget.destroy()
         for widget in self.enemies_display.winfo_children():
             widget.destroy()
             
-        # Update team display with enhanced information
-        alive_team = [unit for unit in self.battle_state["team"] if unit["battle_hp"] > 0]
-        for i, unit in enumerate(alive_team):
-            unit_frame = tk.Frame(self.team_display, bg='#1a1a1a', relief='solid', bd=1)
-            unit_frame.pack(side='left', padx=3, pady=2, fill='both', expand=True)
-            
-            # Check if this unit's turn
-            is_current_turn = (self.battle_state.get("turn_order") and 
-                              self.battle_state["turn_order"] and
-                              self.battle_state["turn_order"][0].get("type") == "player" and
-                              self.battle_state["turn_order"][0].get("unit") == unit)
-            
-            if is_current_turn:
-                unit_frame.config(bg='#2a3a2a', relief='solid', bd=2)
-            
-            # Unit name with level indicator
-            name_text = unit["entity"]["name"]
-            if len(name_text) > 12:
-                name_text = name_text[:12] + "..."
-                
-            name_label = tk.Label(
-                unit_frame,
-                text=f"📗 {name_text}",
-                font=self.small_font,
-                bg=unit_frame['bg'],
-                fg=self.rarity_colors[unit["entity"]["rarity"]]
-            )
-            name_label.pack(pady=1)
+        self.battle_view = {
+            "team_display": self.team_display,
+            "enemies": self.battle_state["enemies"],
+            "team_cards": [self.create_combatant_card(self.team_display, unit, '#1a1a1a', show_sp=True)
+                           for unit in self.battle_state["team"]],
+            "enemy_cards": [self.create_combatant_card(self.enemies_display, enemy, '#2a1a1a', show_sp=False)
+                            for enemy in self.battle_state["enemies"]]
+        }
+        return self.battle_view
+        
+    def create_combatant_card(self, parent, unit, bg, show_sp):
+        """Create the widgets of one combatant card; update_combatant_card fills them in"""
+        frame = tk.Frame(parent, bg=bg, relief='solid', bd=1)
+        
+        name_label = tk.Label(frame, font=self.small_font, bg=bg)
+        name_label.pack(pady=1)
+        
+        hp_label = tk.Label(frame, font=('Consolas', 7), bg=bg)
+        hp_label.pack()
+        
+        sp_label = None
+        if show_sp:
+            sp_label = tk.Label(frame, font=('Consolas', 7), bg=bg)
+            sp_label.pack()
             
-            # HP bar with percentage using correct battle stats
-            # Use battle_stats if available, otherwise calculate on the fly
-            if "battle_stats" in unit:
-                max_hp = unit["battle_stats"]["hp"]
-            else:
-                final_stats = self.calculate_unit_stats_with_runes(unit)
-                max_hp = final_stats["hp"]
+        # Packed only while there is something to show
+        effects_label = tk.Label(frame, font=('Consolas', 7), bg=bg, fg='#FFCC66', wraplength=100)
+        defend_label = tk.Label(frame, text="🛡️ DEF", font=('Consolas', 7), bg=bg, fg='#66CC66')
+        
+        return {
+            "unit": unit,
+            "frame": frame,
+            "name": name_label,
+            "hp": hp_label,
+            "sp": sp_label,
+            "effects": effects_label,
+            "defend": defend_label,
+            "bg": bg,
+            "state": {}
+        }
+        
+    def get_unit_card_state(self, unit, current):
+        """What a team unit's card should show right now"""
+        name_text = unit["entity"]["name"]
+        if len(name_text) > 12:
+            name_text = name_text[:12] + "..."
+            
+        # HP bar with percentage using correct battle stats
+        # Use battle_stats if available, otherwise calculate on the fly
+        if "battle_stats" in unit:
+            max_hp = unit["battle_stats"]["hp"]
+        else:
+            final_stats = self.calculate_unit_stats_with_runes(unit)
+            max_hp = final_stats["hp"]
+            
+        hp_percent = unit["battle_hp"] / max_hp if max_hp > 0 else 0
+        
+        # Compact HP display using correct max HP
+        hp_text = f"❤️ {unit['battle_hp']}/{max_hp} ({hp_percent*100:.0f}%)"
+        if max_hp >= 10000:  # Handle large numbers
+            hp_text = f"❤️ {unit['battle_hp']//1000}k/{max_hp//1000}k ({hp_percent*100:.0f}%)"
+            
+        # SP with skill availability indicator
+        sp_color = '#66CCFF'
+        sp_text = f"⚡ {unit['sp']}/150"
+        
+        # Check if skill is available
+        if unit["entity"]["skill"]:
+            skill_cost = self.skill_costs.get(unit["entity"]["skill"], 50)
+            if unit["sp"] >= skill_cost:
+                sp_text = f"✨ {unit['sp']}/150"  # Skill ready indicator
+                sp_color = '#FFFF66'
                 
-            hp_percent = unit["battle_hp"] / max_hp if max_hp > 0 else 0
-            hp_color = '#66FF66' if hp_percent > 0.6 else '#FFFF66' if hp_percent > 0.3 else '#FF6666'
+        return {
+            "alive": unit["battle_hp"] > 0,
+            "current": current is not None and current["unit"] is unit,
+            "name": f"📗 {name_text}",
+            "name_color": self.rarity_colors[unit["entity"]["rarity"]],
+            "hp": hp_text,
+            "hp_color": '#66FF66' if hp_percent > 0.6 else '#FFFF66' if hp_percent > 0.3 else '#FF6666',
+            "sp": sp_text,
+            "sp_color": sp_color,
+            "effects": self.get_effects_summary(unit.get("effects")),
+            "defending": bool(unit.get("defending"))
+        }
+        
+    def get_enemy_card_state(self, enemy, current, alive_index):
+        """What an enemy's card should show right now"""
+        name_text = enemy['name']
+        if len(name_text) > 12:
+            name_text = name_text[:12] + "..."
+            
+        # HP with percentage
+        max_hp = enemy.get("max_hp", enemy["hp"])
+        hp_percent = enemy["hp"] / max_hp if max_hp > 0 else 0
+        
+        hp_text = f"💀 {enemy['hp']}/{max_hp} ({hp_percent*100:.0f}%)"
+        if enemy["hp"] >= 10000:  # Handle large numbers
+            hp_text = f"💀 {enemy['hp']//1000}k/{max_hp//1000}k ({hp_percent*100:.0f}%)"
             
-            # Compact HP display using correct max HP
-            hp_text = f"❤️ {unit['battle_hp']}/{max_hp} ({hp_percent*100:.0f}%)"
-            if max_hp >= 10000:  # Handle large numbers
-                hp_text = f"❤️ {unit['battle_hp']//1000}k/{max_hp//1000}k ({hp_percent*100:.0f}%)"
-                
-            hp_label = tk.Label(
-                unit_frame,
-                text=hp_text,
-                font=('Consolas', 7),
-                bg=unit_frame['bg'],
-                fg=hp_color
-            )
-            hp_label.pack()
-            
-            # SP with skill availability indicator
-            sp_color = '#66CCFF'
-            sp_text = f"⚡ {unit['sp']}/150"
-            
-            # Check if skill is available
-            if unit["entity"]["skill"]:
-                skill_cost = self.skill_costs.get(unit["entity"]["skill"], 50)
-                if unit["sp"] >= skill_cost:
-                    sp_text = f"✨ {unit['sp']}/150"  # Skill ready indicator
-                    sp_color = '#FFFF66'
-            
-            sp_label = tk.Label(
-                unit_frame,
-                text=sp_text,
-                font=('Consolas', 7),
-                bg=unit_frame['bg'],
-                fg=sp_color
-            )
-            sp_label.pack()
+        return {
+            "alive": enemy["hp"] > 0,
+            "current": current is not None and current["unit"] is enemy,
+            "name": f"📕 {alive_index+1}. {name_text}",
+            "name_color": self.rarity_colors.get(enemy.get("rarity", "Common"), '#FFFFFF'),
+            "hp": hp_text,
+            "hp_color": '#66FF66' if hp_percent > 0.6 else '#FFFF66' if hp_percent > 0.3 else '#FF6666',
+            "effects": self.get_effects_summary(enemy.get("effects")),
+            "defending": False
+        }
+        
+    def update_combatant_card(self, card, state):
+        """Push only the fields that changed since the last update into the card's widgets"""
+        old = card["state"]
+        card["state"] = state
+        
+        if state["alive"] != old.get("alive"):
+            if state["alive"]:
+                card["frame"].pack(side='left', padx=3, pady=2, fill='both', expand=True)
+            else:
+                card["frame"].pack_forget()
+        if not state["alive"]:
+            return
             
-            # Status effects (enhanced display)
-            if unit.get("effects"):
-                effects_info = self.get_effects_summary(unit["effects"])
-                if effects_info:
-                    effects_label = tk.Label(
-                        unit_frame,
-                        text=effects_info,
-                        font=('Consolas', 7),
-                        bg=unit_frame['bg'],
-                        fg='#FFCC66',
-                        wraplength=100
-                    )
-                    effects_label.pack(pady=1)
+        # Turn highlight recolours the frame and every label on it
+        if state["current"] != old.get("current"):
+            if card["bg"] == '#1a1a1a':
+                bg = '#2a3a2a' if state["current"] else card["bg"]
+            else:
+                bg = '#3a2a2a' if state["current"] else card["bg"]
+            card["frame"].config(bg=bg, bd=2 if state["current"] else 1)
+            for key in ("name", "hp", "sp", "effects", "defend"):
+                if card[key] is not None:
+                    card[key].config(bg=bg)
                     
-            # Defending indicator
-            if unit.get("defending"):
-                defend_label = tk.Label(
-                    unit_frame,
-                    text="🛡️ DEF",
-                    font=('Consolas', 7),
-                    bg=unit_frame['bg'],
-                    fg='#66CC66'
-                )
-                defend_label.pack()
-                
-        # Update enemies display with enhanced information
-        alive_enemies = [enemy for enemy in self.battle_state["enemies"] if enemy["hp"] > 0]
-        for i, enemy in enumerate(alive_enemies):
-            enemy_frame = tk.Frame(self.enemies_display, bg='#2a1a1a', relief='solid', bd=1)
-            enemy_frame.pack(side='left', padx=3, pady=2, fill='both', expand=True)
-            
-            # Check if this enemy's turn
-            is_current_turn = (self.battle_state.get("turn_order") and 
-                              self.battle_state["turn_order"] and
-                              self.battle_state["turn_order"][0].get("type") == "enemy" and
-                              self.battle_state["turn_order"][0].get("unit") == enemy)
-            
-            if is_current_turn:
-                enemy_frame.config(bg='#3a2a2a', relief='solid', bd=2)
-            
-            # Enemy name with index
-            name_text = enemy['name']
-            if len(name_text) > 12:
-                name_text = name_text[:12] + "..."
+        for key in ("name", "hp", "sp"):
+            if card[key] is None:
+                continue
+            if state[key] != old.get(key):
+                card[key].config(text=state[key])
+            if state[key + "_color"] != old.get(key + "_color"):
+                card[key].config(fg=state[key + "_color"])
                 
-            name_label = tk.Label(
-                enemy_frame,
-                text=f"📕 {i+1}. {name_text}",
-                font=self.small_font,
-                bg=enemy_frame['bg'],
-                fg=self.rarity_colors.get(enemy.get("rarity", "Common"), '#FFFFFF')
-            )
-            name_label.pack(pady=1)
-            
-            # HP with percentage
-            max_hp = enemy.get("max_hp", enemy["hp"])
-            hp_percent = enemy["hp"] / max_hp if max_hp > 0 else 0
-            hp_color = '#66FF66' if hp_percent > 0.6 else '#FFFF66' if hp_percent > 0.3 else '#FF6666'
-            
-            hp_text = f"💀 {enemy['hp']}/{max_hp} ({hp_percent*100:.0f}%)"
-            if enemy["hp"] >= 10000:  # Handle large numbers
-                hp_text = f"💀 {enemy['hp']//1000}k/{max_hp//1000}k ({hp_percent*100:.0f}%)"
+        if state["effects"] != old.get("effects"):
+            if state["effects"]:
+                card["effects"].config(text=state["effects"])
+                if not old.get("effects"):
+                    card["effects"].pack(pady=1, after=card["sp"] or card["hp"])
+            else:
+                card["effects"].pack_forget()
                 
-            hp_label = tk.Label(
-                enemy_frame,
-                text=hp_text,
-                font=('Consolas', 7),
-                bg=enemy_frame['bg'],
-                fg=hp_color
-            )
-            hp_label.pack()
-            
-            # Status effects (enhanced display)
-            if enemy.get("effects"):
-                effects_info = self.get_effects_summary(enemy["effects"])
-                if effects_info:
-                    effects_label = tk.Label(
-                        enemy_frame,
-                        text=effects_info,
-                        font=('Consolas', 7),
-                        bg=enemy_frame['bg'],
-                        fg='#FFCC66',
-                        wraplength=100
-                    )
-                    effects_label.pack(pady=1)
-        
-        # Update turn order display immediately
-        self.update_turn_display()
+        if state["defending"] != old.get("defending"):
+            if state["defending"]:
+                card["defend"].pack()
+            else:
+                card["defend"].pack_forget()
                 
-    def get_effect_icon(self, effect):
+    def get_effect_icon(self, effect, turns=None):
         """Get icon for status effect"""
         icons = {
             "bleed": "🩸",
@@ -3943,7 +7132,8 @@ class NightmareNexusGUI:
         
         icon = icons.get(effect.get("type"), "●")
         stacks = effect.get("stacks", 1)
-        turns = effect.get("turns", 0)
+        if turns is None:
+            turns = effect.get("turns", 0)
         
         if stacks > 1:
             return f"{icon}{stacks}"
@@ -3963,7 +7153,7 @@ class NightmareNexusGUI:
             effect_type = effect.get("type", "unknown")
             effect_source = effect.get("source", "unknown")
             stacks = effect.get("stacks", 1)
-            turns = effect.get("turns", 0)
+            turns = effects.turns_left(effect) if isinstance(effects, EffectStore) else effect.get("turns", 0)
             
             # For effects that should stack from different sources
             if effect_type in ["joyful_regen", "scp_regen", "bleed", "burn", "poison"]:
@@ -4013,22 +7203,18 @@ class NightmareNexusGUI:
             
     def check_battle_end(self):
         """Check if battle has ended"""
-        team_alive = any(unit["battle_hp"] > 0 for unit in self.battle_state["team"])
-        enemies_alive = any(enemy["hp"] > 0 for enemy in self.battle_state["enemies"])
+        outcome = self.battle_engine.get_outcome()
         
-        if not team_alive:
+        if outcome == "defeat":
             self.add_battle_log("💀 Your team has been defeated!")
             # Delay before showing defeat screen
             self.root.after(2000, self.battle_defeat)
             return True
-        elif not enemies_alive:
-            # Check if there are more waves to fight
-            if hasattr(self.battle_state, 'current_wave') and hasattr(self.battle_state, 'total_waves'):
-                if self.battle_state['current_wave'] < self.battle_state['total_waves']:
-                    self.add_battle_log(f"🎉 Wave {self.battle_state['current_wave']} cleared! Preparing next wave...")
-                    self.root.after(3000, self.start_next_wave)
-                    return True
-            
+        elif outcome == "wave_cleared":
+            self.add_battle_log(f"🎉 Wave {self.battle_engine.current_wave} cleared! Preparing next wave...")
+            self.root.after(3000, self.start_next_wave)
+            return True
+        elif outcome == "victory":
             self.add_battle_log("🎉 All enemies defeated! Victory!")
             # Delay before showing victory screen
             self.root.after(2000, self.battle_victory)
@@ -4038,29 +7224,10 @@ class NightmareNexusGUI:
         
     def process_next_turn(self):
         """Process the next turn in battle"""
-        # Create turn order if empty
-        if not self.battle_state.get("turn_order"):
-            self.create_turn_order()
-            
-        if not self.battle_state["turn_order"]:
-            self.create_turn_order()
+        current = self.battle_engine.next_combatant()
+        self.update_turn_display()
+        if current is None:
             return
-            
-        # Get current unit
-        current = self.battle_state["turn_order"][0]
-        self.battle_state["turn_order"].pop(0)
-        
-        # Check if unit is still alive
-        if current["type"] == "player":
-            unit = current["unit"]
-            if unit["battle_hp"] <= 0:
-                self.process_next_turn()
-                return
-        else:
-            enemy = current["unit"]
-            if enemy["hp"] <= 0:
-                self.process_next_turn()
-                return
                 
         # Process turn
         if current["type"] == "player":
@@ -4071,34 +7238,15 @@ class NightmareNexusGUI:
         else:
             self.process_enemy_turn(current["unit"])
             
-    def create_turn_order(self):
-        """Create turn order based on speed"""
-        combatants = []
-        
-        # Add alive team members
-        for unit in self.battle_state["team"]:
-            if unit["battle_hp"] > 0:
-                combatants.append({"type": "player", "unit": unit, "speed": unit["entity"]["speed"]})
-                
-        # Add alive enemies
-        for enemy in self.battle_state["enemies"]:
-            if enemy["hp"] > 0:
-                combatants.append({"type": "enemy", "unit": enemy, "speed": enemy["speed"]})
-                
-        # Sort by speed (highest first)
-        combatants.sort(key=lambda x: x["speed"], reverse=True)
-        
-        self.battle_state["turn_order"] = combatants
-        self.update_turn_display()
-        
     def update_turn_display(self):
         """Update the enhanced turn order display"""
         self.turn_display.config(state='normal')
         self.turn_display.delete('1.0', 'end')
         
-        if self.battle_state.get("turn_order"):
-            # Show next 8 turns for better planning
-            for i, combatant in enumerate(self.battle_state["turn_order"][:8]):
+        current = self.battle_engine.current
+        if current:
+            # Show the current actor and the next 7 turns for better planning
+            for i, combatant in enumerate([current] + self.battle_engine.preview_turns(7)):
                 if combatant["type"] == "player":
                     name = combatant["unit"]["entity"]["name"]
                     # Truncate long names
@@ -4301,499 +7449,72 @@ class NightmareNexusGUI:
                 bg='#663333',
                 fg='white',
                 width=30
-            )
-            target_btn.pack(pady=2)
-            
-        # Cancel button
-        cancel_btn = tk.Button(
-            targets_frame,
-            text="❌ Cancel",
-            command=lambda: self.process_player_turn(unit),
-            font=self.body_font,
-            bg='#666666',
-            fg='white'
-        )
-        cancel_btn.pack(pady=10)
-        
-    def execute_player_action(self, unit, target, action_type):
-        """Execute the player's chosen action"""
-        if action_type == "attack":
-            # Calculate damage
-            damage, is_crit = self.calculate_damage(unit, target)
-            target["hp"] -= damage
-            target["hp"] = max(0, target["hp"])
-            
-            # Apply Slender's Eight Pages passive (only when Slender is involved)
-            self.apply_slender_eight_pages_passive(unit, target)
-            
-            # Apply Jeff's Go to Sleep passive on crit
-            if is_crit and unit["entity"]["name"] == "Jeff the Killer":
-                ghost_effect = None
-                for effect in unit["effects"]:
-                    if effect.get("type") == "ghost":
-                        ghost_effect = effect
-                        break
-                if ghost_effect:
-                    ghost_effect["stacks"] = min(ghost_effect["stacks"] + 1, 5)
-                else:
-                    unit["effects"].append({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
-                self.add_battle_log(f"👻 {unit['entity']['name']} gains Ghost stack on critical hit!")
-            
-            # Special effects
-            if unit["entity"]["name"] == "Iris":
-                # Iris AoE attack
-                self.add_battle_log(f"⚔️ {unit['entity']['name']} attacks ALL enemies for {damage} damage!")
-                for enemy in self.battle_state["enemies"]:
-                    if enemy["hp"] > 0 and enemy != target:
-                        enemy["hp"] -= damage
-                        enemy["hp"] = max(0, enemy["hp"])
-                        # 40% chance to slow
-                        if random.randint(1, 100) <= 40:
-                            enemy["effects"].append({"type": "slow", "turns": 3, "source": "Iris"})
-                        # Apply Slender passive for AoE targets too
-                        self.apply_slender_eight_pages_passive(unit, enemy)
-            else:
-                crit_text = " [CRITICAL HIT]" if is_crit else ""
-                self.add_battle_log(f"⚔️ {unit['entity']['name']} attacks {target['name']} for {damage} damage!{crit_text}")
-                
-            # SP gain
-            unit["sp"] = min(unit["sp"] + 5, 150)
-            
-        elif action_type == "skill":
-            # Use skill on target
-            self.use_skill(unit, target)
-            unit["sp"] -= self.skill_costs[unit["entity"]["skill"]]
-            
-        self.finish_turn(unit)
-        
-    def player_skill(self, unit):
-        """Handle player skill action"""
-        skill = unit["entity"]["skill"]
-        
-        # Skills that require target selection
-        target_required_skills = ["killer_burst", "faceless_terror", "bloody_smile", "mirror_curse"]
-        
-        if skill in target_required_skills:
-            # Show target selection for skills that need it
-            alive_enemies = [e for e in self.battle_state["enemies"] if e["hp"] > 0]
-            if alive_enemies:
-                self.show_target_selection_inline(unit, alive_enemies, "skill")
-                return
-        
-        # Use skill without target selection
-        self.use_skill(unit, None)
-        unit["sp"] -= self.skill_costs[skill]
-        self.finish_turn(unit)
-        
-    def player_defend(self, unit):
-        """Handle player defend action"""
-        unit["defending"] = True
-        unit["sp"] = min(unit["sp"] + 10, 150)
-        self.show_notification(f"🛡️ {unit['entity']['name']} is defending!")
-        self.finish_turn(unit)
-        
-    def use_skill(self, unit, target):
-        """Use a unit's skill"""
-        skill = unit["entity"]["skill"]
-        name = unit["entity"]["name"]
-        skill_level = unit.get("skill_level", 0)
-        
-        if skill == "joyful_regeneration":  # SCP-999
-            # Grant 20% HP regeneration per turn for 3 turns to all allies
-            for team_unit in self.battle_state["team"]:
-                if team_unit["battle_hp"] > 0:
-                    # Remove existing joyful regen if present
-                    team_unit["effects"] = [e for e in team_unit["effects"] if e.get("type") != "joyful_regen"]
-                    # Add new joyful regeneration
-                    regen_effect = {
-                        "type": "joyful_regen",
-                        "turns": 3,
-                        "heal_percent": 20,
-                        "source": name
-                    }
-                    # At skill level 5, add 50% increased healing effect
-                    if skill_level >= 5:
-                        team_unit["effects"] = [e for e in team_unit["effects"] if e.get("type") != "heal_boost"]
-                        team_unit["effects"].append({
-                            "type": "heal_boost",
-                            "turns": 3,
-                            "boost_percent": 50,
-                            "source": name
-                        })
-                        regen_effect["enhanced"] = True
-                    team_unit["effects"].append(regen_effect)
-            
-            heal_text = f"💚 {name} grants joyful regeneration to all allies!"
-            if skill_level >= 5:
-                heal_text += " Enhanced healing effects active!"
-            self.add_battle_log(heal_text)
-            
-        elif skill == "killer_burst":  # Jeff the Killer
-            # High damage attack - allow target selection
-            alive_enemies = [e for e in self.battle_state["enemies"] if e["hp"] > 0]
-            if alive_enemies and target:
-                damage, _ = self.calculate_damage(unit, target, force_crit=True)
-                damage = int(damage * 1.5)
-                target["hp"] = max(0, target["hp"] - damage)
-                # Gain 1 ghost stack after using skill
-                ghost_effect = None
-                for effect in unit["effects"]:
-                    if effect.get("type") == "ghost":
-                        ghost_effect = effect
-                        break
-                if ghost_effect:
-                    ghost_effect["stacks"] = min(ghost_effect["stacks"] + 1, 5)
-                else:
-                    unit["effects"].append({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
-                self.add_battle_log(f"👻 {name} unleashes Killer Burst for {damage} damage and gains Ghost!")
-            elif alive_enemies:
-                # Fallback for auto-battle
-                target = random.choice(alive_enemies)
-                damage, _ = self.calculate_damage(unit, target, force_crit=True)
-                damage = int(damage * 1.5)
-                target["hp"] = max(0, target["hp"] - damage)
-                ghost_effect = None
-                for effect in unit["effects"]:
-                    if effect.get("type") == "ghost":
-                        ghost_effect = effect
-                        break
-                if ghost_effect:
-                    ghost_effect["stacks"] = min(ghost_effect["stacks"] + 1, 5)
-                else:
-                    unit["effects"].append({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
-                self.add_battle_log(f"👻 {name} unleashes Killer Burst for {damage} damage and gains Ghost!")
-                
-        elif skill == "analog_distortion":  # Iris
-            # Reality distortion - damage and debuff all enemies
-            for enemy in self.battle_state["enemies"]:
-                if enemy["hp"] > 0:
-                    damage = int(unit["entity"]["attack"] * 0.8)
-                    enemy["hp"] = max(0, enemy["hp"] - damage)
-                    enemy["effects"].append({"type": "debuff", "stat": "defense", "amount": int(enemy["defense"] * 0.3), "turns": 4, "source": name})
-            self.add_battle_log(f"📺 {name} distorts reality, damaging and debuffing all enemies!")
-            
-        elif skill == "indestructible_regeneration":  # SCP-682
-            # Heal and taunt
-            max_hp = unit.get("battle_stats", {}).get("hp", unit["entity"]["hp"])
-            heal = int(max_hp * 0.4)
-            unit["battle_hp"] = min(unit["battle_hp"] + heal, max_hp)
-            
-            # Add regeneration effect (different from SCP-999's joyful_regen)
-            unit["effects"].append({"type": "scp_regen", "turns": 3, "heal_percent": 10, "source": name})
-            unit["effects"].append({"type": "taunt", "turns": 3, "source": name})
-            self.add_battle_log(f"🦎 {name} regenerates {heal} HP and taunts enemies!")
-            
-        elif skill == "faceless_terror":  # Slender - 8 Pages effect
-            # Slender's 8 Pages skill implementation - allow target selection
-            alive_enemies = [e for e in self.battle_state["enemies"] if e["hp"] > 0]
-            if alive_enemies and target:
-                # Guaranteed hit with no defense calculation
-                damage = unit["entity"]["attack"]
-                target["hp"] = max(0, target["hp"] - damage)
-                
-                # Add Eight Pages stack
-                eight_pages_effect = None
-                for effect in target["effects"]:
-                    if effect.get("type") == "eight_pages":
-                        eight_pages_effect = effect
-                        break
-                        
-                if eight_pages_effect:
-                    eight_pages_effect["stacks"] = min(eight_pages_effect["stacks"] + 1, 8)
-                else:
-                    target["effects"].append({"type": "eight_pages", "turns": 99, "stacks": 1, "source": name})
-                    eight_pages_effect = target["effects"][-1]
-                    
-                # Apply defense reduction based on stacks
-                defense_reduction = eight_pages_effect["stacks"] * 5
-                target["effects"] = [e for e in target["effects"] if not (e.get("type") == "debuff" and e.get("source") == "Eight Pages")]
-                target["effects"].append({"type": "debuff", "stat": "defense", "amount": defense_reduction, "turns": 99, "source": "Eight Pages"})
-                
-                # Check for 8 stacks at max skill level
-                if skill_level == 5 and eight_pages_effect["stacks"] >= 8:
-                    target["effects"].append({"type": "stun", "turns": 2, "source": name})
-                    target["effects"].append({"type": "fear", "turns": 3, "source": name})
-                    eight_pages_effect["stacks"] = 0
-                    self.add_battle_log(f"📄 {name} completes the 8 Pages ritual! {target['name']} is stunned and feared!")
-                else:
-                    self.add_battle_log(f"📄 {name} uses Faceless Terror for {damage} damage! {target['name']} has {eight_pages_effect['stacks']} Pages.")
-            elif alive_enemies:
-                # Fallback for auto-battle
-                target = random.choice(alive_enemies)
-                damage = unit["entity"]["attack"]
-                target["hp"] = max(0, target["hp"] - damage)
-                eight_pages_effect = None
-                for effect in target["effects"]:
-                    if effect.get("type") == "eight_pages":
-                        eight_pages_effect = effect
-                        break
-                if eight_pages_effect:
-                    eight_pages_effect["stacks"] = min(eight_pages_effect["stacks"] + 1, 8)
-                else:
-                    target["effects"].append({"type": "eight_pages", "turns": 99, "stacks": 1, "source": name})
-                    eight_pages_effect = target["effects"][-1]
-                defense_reduction = eight_pages_effect["stacks"] * 5
-                target["effects"] = [e for e in target["effects"] if not (e.get("type") == "debuff" and e.get("source") == "Eight Pages")]
-                target["effects"].append({"type": "debuff", "stat": "defense", "amount": defense_reduction, "turns": 99, "source": "Eight Pages"})
-                if skill_level == 5 and eight_pages_effect["stacks"] >= 8:
-                    target["effects"].append({"type": "stun", "turns": 2, "source": name})
-                    target["effects"].append({"type": "fear", "turns": 3, "source": name})
-                    eight_pages_effect["stacks"] = 0
-                    self.add_battle_log(f"📄 {name} completes the 8 Pages ritual! {target['name']} is stunned and feared!")
-                else:
-                    self.add_battle_log(f"📄 {name} uses Faceless Terror for {damage} damage! {target['name']} has {eight_pages_effect['stacks']} Pages.")
-                    
-        elif skill == "bloody_smile":  # Kuchisake-onna
-            # High crit chance attack with bleed
-            alive_enemies = [e for e in self.battle_state["enemies"] if e["hp"] > 0]
-            if alive_enemies:
-                target = random.choice(alive_enemies)
-                damage, _ = self.calculate_damage(unit, target, force_crit=True)
-                target["hp"] = max(0, target["hp"] - damage)
-                target["effects"].append({"type": "bleed", "turns": 4, "damage": damage // 4, "source": name})
-                self.add_battle_log(f"💋 {name} inflicts a Bloody Smile for {damage} damage and bleeding!")
-                
-        elif skill == "night_ambush":  # The Rake
-            # Multi-hit attack with increased damage in darkness
-            alive_enemies = [e for e in self.battle_state["enemies"] if e["hp"] > 0]
-            if alive_enemies:
-                hits = random.randint(2, 4)
-                total_damage = 0
-                for _ in range(hits):
-                    target = random.choice(alive_enemies)
-                    if target["hp"] > 0:
-                        damage, _ = self.calculate_damage(unit, target)
-                        damage = int(damage * 1.3)  # Night bonus
-                        target["hp"] = max(0, target["hp"] - damage)
-                        total_damage += damage
-                self.add_battle_log(f"🌙 {name} performs Night Ambush with {hits} hits for {total_damage} total damage!")
-                
-        elif skill == "mothmans_omen":  # Mothman
-            # Accuracy debuff and damage all enemies
-            for enemy in self.battle_state["enemies"]:
-                if enemy["hp"] > 0:
-                    damage = int(unit["entity"]["attack"] * 0.6)
-                    enemy["hp"] = max(0, enemy["hp"] - damage)
-                    enemy["effects"].append({"type": "debuff", "stat": "accuracy", "amount": 30, "turns": 3, "source": name})
-            self.add_battle_log(f"🦋 {name} brings an ill omen, reducing all enemies' accuracy!")
-            
-        elif skill == "mirror_curse":  # Bloody Mary
-            # Damage and curse reflection
-            alive_enemies = [e for e in self.battle_state["enemies"] if e["hp"] > 0]
-            if alive_enemies:
-                target = random.choice(alive_enemies)
-                damage, _ = self.calculate_damage(unit, target)
-                target["hp"] = max(0, target["hp"] - damage)
-                # Curse that reflects damage
-                target["effects"].append({"type": "mirror_curse", "turns": 5, "reflect_percent": 50, "source": name})
-                self.add_battle_log(f"🪞 {name} casts Mirror Curse for {damage} damage and curse reflection!")
-                
-        # Add other skills as needed...
-        
-    def calculate_damage(self, attacker, defender, force_crit=False):
-        """Calculate damage between attacker and defender using battle stats"""
-        # Get battle stats if available, otherwise fall back to base stats
-        if "battle_stats" in attacker:
-            atk = attacker["battle_stats"]["attack"]
-            crit_rate = min(attacker["battle_stats"]["crit_rate"], 100)  # Cap at 100%
-            crit_damage = attacker["battle_stats"]["crit_damage"]
-        elif "entity" in attacker:
-            atk = attacker["entity"]["attack"]
-            crit_rate = min(attacker["entity"]["crit_rate"], 100)
-            crit_damage = attacker["entity"]["crit_damage"]
-        else:
-            atk = attacker["attack"]
-            crit_rate = min(attacker["crit_rate"], 100)
-            crit_damage = attacker["crit_damage"]
-            
-        if "battle_stats" in defender:
-            defense = defender["battle_stats"]["defense"]
-        elif "entity" in defender:
-            defense = defender["entity"]["defense"]
-        else:
-            defense = defender["defense"]
+            )
+            target_btn.pack(pady=2)
             
-        # Calculate base damage
-        base_damage = max(1, atk - defense)
-        
-        # Check for crit
-        is_crit = force_crit or (random.randint(1, 100) <= crit_rate)
+        # Cancel button
+        cancel_btn = tk.Button(
+            targets_frame,
+            text="❌ Cancel",
+            command=lambda: self.process_player_turn(unit),
+            font=self.body_font,
+            bg='#666666',
+            fg='white'
+        )
+        cancel_btn.pack(pady=10)
         
-        if is_crit:
-            damage = int(base_damage * (crit_damage / 100))
-        else:
-            damage = base_damage
+    def execute_player_action(self, unit, target, action_type):
+        """Execute the player's chosen action"""
+        if action_type == "attack":
+            self.battle_engine.player_attack(unit, target)
+        elif action_type == "skill":
+            # Use skill on target
+            self.battle_engine.cast_skill(unit, target)
             
-        # Add some randomness
-        damage = int(damage * random.uniform(0.85, 1.15))
-        
-        return max(1, damage), is_crit
+        self.finish_turn(unit)
         
-    def apply_slender_eight_pages_passive(self, attacker, target):
-        """Apply Slender's Eight Pages passive effect - only when Slender is involved"""
-        # Only apply if Slender is the attacker or target
-        slender_involved = False
+    def player_skill(self, unit):
+        """Handle player skill action"""
+        skill = unit["entity"]["skill"]
         
-        # Check if attacker is Slender
-        attacker_name = attacker.get('entity', {}).get('name', attacker.get('name', ''))
-        target_name = target.get('entity', {}).get('name', target.get('name', ''))
+        # Skills that require target selection
+        target_required_skills = ["killer_burst", "faceless_terror", "bloody_smile", "mirror_curse"]
         
-        if attacker_name == 'Slender' or target_name == 'Slender':
-            slender_involved = True
-            
-        if not slender_involved:
-            return
-            
-        # Apply Eight Pages stack to the non-Slender participant
-        stack_target = target if attacker_name == 'Slender' else attacker
-        stack_target_name = target_name if attacker_name == 'Slender' else attacker_name
+        if skill in target_required_skills:
+            # Show target selection for skills that need it
+            alive_enemies = [e for e in self.battle_state["enemies"] if e["hp"] > 0]
+            if alive_enemies:
+                self.show_target_selection_inline(unit, alive_enemies, "skill")
+                return
         
-        if stack_target_name == 'Slender':  # Don't apply to Slender itself
-            return
-            
-        # Apply Eight Pages stack
-        eight_pages_effect = None
-        for effect in stack_target.get('effects', []):
-            if effect.get('type') == 'eight_pages':
-                eight_pages_effect = effect
-                break
-                
-        if eight_pages_effect:
-            eight_pages_effect['stacks'] = min(eight_pages_effect['stacks'] + 1, 8)
-        else:
-            if 'effects' not in stack_target:
-                stack_target['effects'] = []
-            stack_target['effects'].append({
-                'type': 'eight_pages', 
-                'turns': 99, 
-                'stacks': 1, 
-                'source': 'Slender'
-            })
-            eight_pages_effect = stack_target['effects'][-1]
-            
-        # Apply defense reduction (5% per stack)
-        defense_reduction = eight_pages_effect['stacks'] * 5
+        # Use skill without target selection
+        self.battle_engine.cast_skill(unit, None)
+        self.finish_turn(unit)
         
-        # Remove old defense debuff from Eight Pages if exists
-        stack_target['effects'] = [e for e in stack_target.get('effects', []) 
-                              if not (e.get('type') == 'debuff' and e.get('source') == 'Eight Pages')]
-                              
-        # Apply new defense debuff
-        stack_target['effects'].append({
-            'type': 'debuff',
-            'stat': 'defense',
-            'amount': defense_reduction,
-            'turns': 99,
-            'source': 'Eight Pages'
-        })
+    def player_defend(self, unit):
+        """Handle player defend action"""
+        self.battle_engine.defend(unit)
+        self.show_notification(f"🛡️ {unit['entity']['name']} is defending!")
+        self.finish_turn(unit)
         
-        # Log the effect
-        self.add_battle_log(f"📄 {stack_target_name} gains Eight Pages stack ({eight_pages_effect['stacks']}/8) - Defense reduced by {defense_reduction}%!")
+    def use_skill(self, unit, target):
+        """Use a unit's skill through the battle engine"""
+        self.battle_engine.use_skill(unit, target)
         
-        # Check for 8 stacks - stun effect
-        if eight_pages_effect['stacks'] >= 8:
-            stack_target['effects'].append({'type': 'stun', 'turns': 2, 'source': 'Slender'})
-            stack_target['effects'].append({'type': 'fear', 'turns': 3, 'source': 'Slender'})
-            eight_pages_effect['stacks'] = 0  # Reset stacks after triggering
-            self.add_battle_log(f"📄 {stack_target_name} is overwhelmed by the Eight Pages! Stunned and feared!")
+    def calculate_damage(self, attacker, defender, force_crit=False):
+        """Calculate damage between attacker and defender using battle stats"""
+        return self.battle_engine.calculate_damage(attacker, defender, force_crit)
         
     def process_auto_player_turn(self, unit):
         """Process an automatic player turn (AI)"""
-        # Simple AI: attack random enemy
-        alive_enemies = [e for e in self.battle_state["enemies"] if e["hp"] > 0]
-        if alive_enemies:
-            target = random.choice(alive_enemies)
-            
-            # Use skill if available and SP is sufficient
-            if (unit["entity"]["skill"] and 
-                unit["sp"] >= self.skill_costs.get(unit["entity"]["skill"], 999) and
-                random.randint(1, 100) <= 30):  # 30% chance to use skill
-                self.use_skill(unit, target)
-                unit["sp"] -= self.skill_costs[unit["entity"]["skill"]]
-                self.add_battle_log(f"🤖 {unit['entity']['name']} uses skill!")
-            else:
-                # Normal attack
-                damage, is_crit = self.calculate_damage(unit, target)
-                target["hp"] = max(0, target["hp"] - damage)
-                
-                # Apply Slender's Eight Pages passive (only when Slender is involved)
-                self.apply_slender_eight_pages_passive(unit, target)
-                
-                # Apply Jeff's Go to Sleep passive on crit
-                if is_crit and unit["entity"]["name"] == "Jeff the Killer":
-                    ghost_effect = None
-                    for effect in unit["effects"]:
-                        if effect.get("type") == "ghost":
-                            ghost_effect = effect
-                            break
-                    if ghost_effect:
-                        ghost_effect["stacks"] = min(ghost_effect["stacks"] + 1, 5)
-                    else:
-                        unit["effects"].append({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
-                    self.add_battle_log(f"👻 {unit['entity']['name']} gains Ghost stack on critical hit!")
-                
-                crit_text = " [CRIT]" if is_crit else ""
-                self.add_battle_log(f"🤖 {unit['entity']['name']} attacks {target['name']} for {damage} damage!{crit_text}")
-                
-                unit["sp"] = min(unit["sp"] + 5, 150)
-                
+        self.battle_engine.auto_player_turn(unit)
         self.finish_turn(unit)
         
     def start_next_wave(self):
         """Start the next wave in multi-wave battles"""
-        if not hasattr(self.battle_state, 'current_wave') or not hasattr(self.battle_state, 'total_waves'):
-            # If not a multi-wave battle, just proceed to victory
-            self.battle_victory()
-            return
-            
-        # Increment wave counter
-        self.battle_state['current_wave'] += 1
-        
-        # Generate new enemies for this wave
-        if self.battle_state.get("type") == "campaign":
-            # Campaign battles: use the enhanced wave generation
-            new_enemies = self.generate_enemies(
-                self.battle_state['world_idx'], 
-                self.battle_state['stage_idx'], 
-                wave=self.battle_state['current_wave']
-            )
-        elif self.battle_state.get("type") == "rune_boss":
-            # Rune boss: generate minions leading up to the boss
-            if self.battle_state['current_wave'] < self.battle_state['total_waves']:
-                # Generate minions for waves 1-4
-                new_enemies = self.generate_boss_minions(self.battle_state['boss_data'], self.battle_state['current_wave'])
-            else:
-                # Final wave: the actual boss
-                new_enemies = [self.battle_state['original_boss']]
-        else:
-            # Default: generate enemies with wave scaling
-            new_enemies = self.generate_enemies(0, 0, wave=self.battle_state['current_wave'])
-            
-        # Replace enemies in battle state
-        self.battle_state['enemies'] = new_enemies
-        
-        # Reset turn order for new wave
-        self.battle_state['turn_order'] = []
-        
-        # Heal team members between waves
-        heal_percentage = 0.3 if self.battle_state.get('is_boss_stage') else 0.25  # More healing for boss stages
-        sp_recovery = 40 if self.battle_state.get('is_boss_stage') else 30  # More SP for boss stages
-        
-        for unit in self.battle_state['team']:
-            if unit['battle_hp'] > 0:  # Only heal living units
-                max_hp = unit.get('battle_stats', {}).get('hp', unit.get('max_hp', 100))
-                heal_amount = int(max_hp * heal_percentage)
-                unit['battle_hp'] = min(unit['battle_hp'] + heal_amount, max_hp)
-                # Also restore SP
-                unit['sp'] = min(unit['sp'] + sp_recovery, 150)
-        
-        # Special message for boss waves
-        if self.battle_state.get('is_boss_stage') and self.battle_state['current_wave'] == self.battle_state['total_waves']:
-            self.add_battle_log(f"👑 FINAL WAVE! The boss emerges! Team healed for the ultimate challenge!")
-        elif self.battle_state.get('is_boss_stage'):
-            self.add_battle_log(f"🌊 Boss Stage Wave {self.battle_state['current_wave']}/{self.battle_state['total_waves']} - Team healed, prepare for escalating difficulty!")
-        else:
-            self.add_battle_log(f"🌊 Wave {self.battle_state['current_wave']}/{self.battle_state['total_waves']} begins! Team partially healed.")
+        self.battle_engine.start_next_wave()
+        self.battle_state['enemies'] = self.battle_engine.enemies
+        self.battle_state['current_wave'] = self.battle_engine.current_wave
         
         # Update battle display and start new turn
         self.update_battle_display()
@@ -5095,6 +7816,18 @@ class NightmareNexusGUI:
         )
         stop_levelup_check.pack(anchor='w', padx=10, pady=5)
         
+        self.multi_battle_instant = tk.BooleanVar(value=False)
+        instant_check = tk.Checkbutton(
+            config_frame,
+            text="⚡ Resolve instantly (skip battle animations)",
+            variable=self.multi_battle_instant,
+            font=self.body_font,
+            bg='black',
+            fg='#66CCFF',
+            selectcolor='#333333'
+        )
+        instant_check.pack(anchor='w', padx=20, pady=5)
+        
         # Start multi-battle button
         start_btn = tk.Button(
             self.content_frame,
@@ -5143,9 +7876,85 @@ class NightmareNexusGUI:
         
         self.show_notification(f"⚡ Starting multi-battle sequence: {battle_count} battles")
         
+        if self.multi_battle_instant.get():
+            self.resolve_multi_battle_instantly()
+            return
+        
         # Start first battle
         self.continue_multi_battle()
     
+    def resolve_multi_battle_instantly(self):
+        """Resolve the whole multi-battle sequence headlessly and apply the rewards once"""
+        config = self.multi_battle_config
+        battle = self.last_completed_battle
+        team = battle.get('team', [])
+        
+        if not team:
+            self.finish_multi_battle("No team data available!")
+            return
+        
+        start_time = time.perf_counter()
+        rng = random.Random()
+        
+        # Stats come from the team as it entered the sequence; runes can't change mid-run
+        final_stats = [self.calculate_unit_stats_with_runes(unit) for unit in team]
+        if battle.get('type') == 'campaign':
+            start_sp = [int(stats["sp_cap"] * 0.7) for stats in final_stats]
+        else:
+            start_sp = [100 for _ in final_stats]
+        is_boss_stage = battle.get('type') == 'campaign' and (battle.get('stage_idx', 0) + 1) % 10 == 0
+        exp_multiplier = 1.25 if self.player_research.get('battle_efficiency', False) else 1.0
+        
+        totals = {"exp": 0, "cash": 0, "runes": [], "items": {}}
+        reason = "All battles completed!"
+        
+        while config['completed_battles'] < config['total_battles']:
+            config['completed_battles'] += 1
+            
+            # Fresh battle copies so the real units keep their inventory state
+            battle_team = []
+            for unit, stats, sp in zip(team, final_stats, start_sp):
+                battle_unit = dict(unit)
+                BattleEngine.prepare_unit(battle_unit, dict(stats), sp)
+                battle_team.append(battle_unit)
+            
+            engine = BattleEngine(battle_team, self.build_battle_waves(battle), rng=rng,
+                                  skill_costs=self.skill_costs, is_boss_stage=is_boss_stage)
+            
+            if engine.run() != "victory":
+                config['defeats'] += 1
+                if config['stop_on_defeat']:
+                    reason = "Stopped on defeat"
+                    break
+                continue
+            
+            config['victories'] += 1
+            self.merge_battle_rewards(totals, self.roll_battle_rewards(battle))
+            
+            if config['stop_on_level_up']:
+                gained = int(totals["exp"] * exp_multiplier)
+                if any(unit["exp"] + gained >= unit["level"] * 100 for unit in team):
+                    reason = "Stopped on level up"
+                    break
+        
+        level_ups = []
+        if config['victories']:
+            old_levels = [unit["level"] for unit in team]
+            self.apply_battle_rewards(battle, totals, team)
+            level_ups = [f"{unit['entity']['name']}: Lv.{old} → Lv.{unit['level']}"
+                         for unit, old in zip(team, old_levels) if unit["level"] > old]
+            self.update_stats_display()
+        
+        config['instant_summary'] = {
+            "cash": totals["cash"],
+            "exp": int(totals["exp"] * exp_multiplier),
+            "runes": len(totals["runes"]),
+            "items": totals["items"],
+            "level_ups": level_ups,
+            "elapsed": time.perf_counter() - start_time
+        }
+        self.finish_multi_battle(reason)
+    
     def continue_multi_battle(self):
         """Continue multi-battle sequence"""
         if not self.multi_battle_active:
@@ -5196,6 +8005,17 @@ class NightmareNexusGUI:
         results_text += f"Victories: {config['victories']}\n"
         results_text += f"Defeats: {config['defeats']}"
         
+        summary = config.get('instant_summary')
+        if summary:
+            results_text += f"\n\n💰 Cash: {summary['cash']}\n"
+            results_text += f"⭐ EXP per unit: {summary['exp']}\n"
+            results_text += f"🎰 Runes: {summary['runes']}\n"
+            for item, count in summary['items'].items():
+                results_text += f"🧪 {item}: {count}\n"
+            for level_up in summary['level_ups']:
+                results_text += f"⭐ {level_up}\n"
+            results_text += f"\nResolved in {summary['elapsed']:.2f}s"
+        
         messagebox.showinfo("Multi-Battle Results", results_text)
         
         # Return to post-battle options
@@ -5250,35 +8070,13 @@ class NightmareNexusGUI:
         
     def process_enemy_turn(self, enemy):
         """Process an enemy's turn"""
-        # Enemy AI: attack random player
-        alive_team = [u for u in self.battle_state["team"] if u["battle_hp"] > 0]
-        if alive_team:
-            target = random.choice(alive_team)
-            
-            damage, is_crit = self.calculate_damage(enemy, target)
-            
-            # Apply defending reduction
-            if target.get("defending"):
-                damage = damage // 2
-                
-            target["battle_hp"] = max(0, target["battle_hp"] - damage)
-            
-            # Apply Slender's Eight Pages passive (only when Slender is involved)
-            self.apply_slender_eight_pages_passive(enemy, target)
-            
-            crit_text = " [CRIT]" if is_crit else ""
-            self.add_battle_log(f"👹 {enemy['name']} attacks {target['entity']['name']} for {damage} damage!{crit_text}")
-            
+        self.battle_engine.enemy_turn(enemy)
         self.finish_turn(enemy)
         
     def finish_turn(self, unit):
         """Finish the current turn and continue battle"""
-        # Reset defending status
-        if "entity" in unit:  # Player unit
-            unit["defending"] = False
-        
-        # Apply turn-based effects (DoT, HoT, etc.) and update display
-        self.apply_turn_effects(unit)
+        # Reset defending status and apply turn-based effects (DoT, HoT, etc.)
+        self.battle_engine.end_turn(unit)
         
         # Update display immediately to show any changes
         self.update_battle_display()
@@ -5290,96 +8088,24 @@ class NightmareNexusGUI:
             delay = max(250, delay)  # Minimum delay for readability
             self.root.after(delay, self.process_next_turn)
     
-    def apply_turn_effects(self, unit):
-        """Apply turn-based effects like DoT, HoT, buffs, debuffs with proper stacking"""
-        effects_to_remove = []
-        
-        # Group effects by type and source for proper stacking
-        effect_groups = {}
-        for effect in unit.get("effects", []):
-            effect_type = effect.get("type")
-            effect_source = effect.get("source", "unknown")
-            key = f"{effect_type}_{effect_source}"
-            
-            if key not in effect_groups:
-                effect_groups[key] = []
-            effect_groups[key].append(effect)
-        
-        # Process each effect group
-        for group_key, effects_list in effect_groups.items():
-            effect_type = effects_list[0].get("type")
-            effect_source = effects_list[0].get("source", "unknown")
-            
-            # Apply healing over time effects (these stack from different sources)
-            if effect_type == "joyful_regen":
-                for effect in effects_list:
-                    heal_percent = effect.get("heal_percent", 20)
-                    max_hp = unit.get("battle_stats", {}).get("hp", unit.get("max_hp", unit.get("entity", {}).get("hp", 1)))
-                    heal_amount = int(max_hp * heal_percent / 100)
-                    
-                    if "entity" in unit:  # Player unit
-                        unit["battle_hp"] = min(unit["battle_hp"] + heal_amount, max_hp)
-                    else:  # Enemy unit
-                        unit["hp"] = min(unit["hp"] + heal_amount, max_hp)
-                        
-                    self.add_battle_log(f"💚 {self.get_unit_name(unit)} heals {heal_amount} HP from {effect_source}'s regeneration!")
-            
-            elif effect_type == "scp_regen":  # SCP-682's regeneration (different from joyful_regen)
-                for effect in effects_list:
-                    heal_percent = effect.get("heal_percent", 10)
-                    max_hp = unit.get("battle_stats", {}).get("hp", unit.get("max_hp", unit.get("entity", {}).get("hp", 1)))
-                    heal_amount = int(max_hp * heal_percent / 100)
-                    
-                    if "entity" in unit:  # Player unit
-                        unit["battle_hp"] = min(unit["battle_hp"] + heal_amount, max_hp)
-                    else:  # Enemy unit
-                        unit["hp"] = min(unit["hp"] + heal_amount, max_hp)
-                        
-                    self.add_battle_log(f"🦎 {self.get_unit_name(unit)} regenerates {heal_amount} HP from SCP-682's ability!")
-            
-            # Apply damage over time effects (these also stack from different sources)
-            elif effect_type == "bleed":
-                for effect in effects_list:
-                    damage = effect.get("damage", 10)
-                    if "entity" in unit:
-                        unit["battle_hp"] = max(0, unit["battle_hp"] - damage)
-                    else:
-                        unit["hp"] = max(0, unit["hp"] - damage)
-                    self.add_battle_log(f"🩸 {self.get_unit_name(unit)} takes {damage} bleed damage from {effect_source}!")
-            
-            elif effect_type == "burn":
-                for effect in effects_list:
-                    damage = effect.get("damage", 15)
-                    if "entity" in unit:
-                        unit["battle_hp"] = max(0, unit["battle_hp"] - damage)
-                    else:
-                        unit["hp"] = max(0, unit["hp"] - damage)
-                    self.add_battle_log(f"🔥 {self.get_unit_name(unit)} takes {damage} burn damage from {effect_source}!")
-            
-            elif effect_type == "poison":
-                for effect in effects_list:
-                    damage = effect.get("damage", 20)
-                    if "entity" in unit:
-                        unit["battle_hp"] = max(0, unit["battle_hp"] - damage)
-                    else:
-                        unit["hp"] = max(0, unit["hp"] - damage)
-                    self.add_battle_log(f"☠️ {self.get_unit_name(unit)} takes {damage} poison damage from {effect_source}!")
-            
-            # Reduce turn counters for all effects in this group
-            for effect in effects_list:
-                if "turns" in effect and effect["turns"] > 0:
-                    effect["turns"] -= 1
-                    if effect["turns"] <= 0:
-                        effects_to_remove.append(effect)
-        
-        # Remove expired effects
-        if effects_to_remove:
-            for effect in effects_to_remove:
-                if effect in unit.get("effects", []):
-                    unit["effects"].remove(effect)
-                    effect_name = effect.get("type", "unknown").replace("_", " ").title()
-                    effect_source = effect.get("source", "unknown")
-                    self.add_battle_log(f"⏰ {effect_name} from {effect_source} expired on {self.get_unit_name(unit)}")
+    def create_battle_engine(self, waves):
+        """Create the battle engine for the current battle_state and observe it"""
+        self.battle_engine = BattleEngine(
+            self.battle_state["team"],
+            waves,
+            rng=random.Random(),
+            skill_costs=self.skill_costs,
+            is_boss_stage=self.battle_state.get("is_boss_stage", False)
+        )
+        self.battle_engine.add_observer(self.on_battle_event)
+        self.battle_state["enemies"] = self.battle_engine.enemies
+        self.battle_state["current_wave"] = self.battle_engine.current_wave
+        self.battle_state["total_waves"] = self.battle_engine.total_waves
+        
+    def on_battle_event(self, event, data):
+        """Mirror battle engine events into the battle screen"""
+        if event == "log":
+            self.add_battle_log(data["message"])
     
     def get_unit_name(self, unit):
         """Get the display name of a unit"""
@@ -5422,10 +8148,9 @@ class NightmareNexusGUI:
             for widget in self.actions_frame.winfo_children():
                 widget.destroy()
             # Resume manual control - process current turn if it's a player turn
-            if (self.battle_state.get("turn_order") and 
-                len(self.battle_state["turn_order"]) > 0 and
-                self.battle_state["turn_order"][0]["type"] == "player"):
-                current_unit = self.battle_state["turn_order"][0]["unit"]
+            current = self.battle_engine.current
+            if current and current["type"] == "player":
+                current_unit = current["unit"]
                 if current_unit["battle_hp"] > 0:
                     self.process_player_turn(current_unit)
                 
@@ -5445,33 +8170,48 @@ class NightmareNexusGUI:
             "team": self.battle_state["team"].copy()
         }
         
+        rewards = self.roll_battle_rewards(self.battle_state)
+        for message in rewards["messages"]:
+            self.show_notification(message)
+        for message in self.apply_battle_rewards(self.battle_state, rewards, self.battle_state["team"]):
+            self.show_notification(message)
+        
+        # Update stats
+        self.update_stats_display()
+        
+        # Check if multi-battle is active
+        if self.multi_battle_active:
+            self.handle_multi_battle_continuation()
+        else:
+            # Show post-battle options for single battles
+            self.show_post_battle_options()
+        
+    def roll_battle_rewards(self, battle):
+        """Roll the loot for one won battle without touching player state"""
+        rewards = {"exp": 0, "cash": 0, "runes": [], "items": {}, "messages": []}
+        
         # Handle different battle types with enhanced rewards
-        if self.battle_state.get("type") == "delve":
+        if battle.get("type") == "delve":
             # Enhanced delve rewards for progression
-            floor = self.battle_state["floor"]
-            exp_gain = 75 + (floor * 25)  # Increased from 50 + (floor * 15)
-            cash_gain = 200 + (floor * 100)  # Increased from 100 + (floor * 50)
+            floor = battle["floor"]
+            rewards["exp"] = 75 + (floor * 25)  # Increased from 50 + (floor * 15)
+            rewards["cash"] = 200 + (floor * 100)  # Increased from 100 + (floor * 50)
             
             # Delve rune drops - better rewards for higher floors
             if floor >= 5:
                 rune_rarity = "Epic" if floor < 15 else "Legendary"
                 delve_rune = self.generate_rune(rarity=rune_rarity)
                 delve_rune['level'] = min(floor // 3, 15)  # Higher level runes
-                self.player_runes.append(delve_rune)
-                self.show_notification(f"🎰 Floor {floor} Reward: {delve_rune['name']} ({rune_rarity})!")
-            
-            # Unlock next floor
-            if floor >= self.player_progress.get('dungeon_highest', 1):
-                self.player_progress['dungeon_highest'] = floor + 1
-                self.show_notification(f"🔓 Delve Floor {floor + 1} unlocked!")
+                rewards["runes"].append(delve_rune)
+                rewards["messages"].append(f"🎰 Floor {floor} Reward: {delve_rune['name']} ({rune_rarity})!")
                 
-        elif self.battle_state.get("type") == "rune_boss":
+        elif battle.get("type") == "rune_boss":
             # Enhanced rune boss rewards
-            boss_data = self.battle_state["boss_data"]
-            stage = self.battle_state.get("stage", 1)
+            boss_data = battle["boss_data"]
+            stage = battle.get("stage", 1)
             
-            exp_gain = (30 + stage * 8) * 15  # Increased rewards
-            cash_gain = (30 + stage * 8) * 75
+            rewards["exp"] = (30 + stage * 8) * 15  # Increased rewards
+            rewards["cash"] = (30 + stage * 8) * 75
             
             # Enhanced rune generation with guaranteed high-quality drops
             rune_count = 2 + (stage // 3)  # More runes for higher stages
@@ -5513,36 +8253,36 @@ class NightmareNexusGUI:
                     for substat in rune['substats']:
                         rune['substats'][substat] = int(rune['substats'][substat] * 1.1)
                 
-                self.player_runes.append(rune)
+                rewards["runes"].append(rune)
                 
             set_names = " & ".join(boss_sets)
-            self.show_notification(f"🎰 Stage {stage} Complete! Obtained {len(rune_rarities)} {set_names} Set Runes!")
+            rewards["messages"].append(f"🎰 Stage {stage} Complete! Obtained {len(rune_rarities)} {set_names} Set Runes!")
             
-        elif self.battle_state.get("type") == "xp_trainer":
+        elif battle.get("type") == "xp_trainer":
             # Enhanced XP trainer rewards
-            trainer_data = self.battle_state["trainer_data"]
-            exp_gain = trainer_data['level'] * 25  # Increased from 15
-            cash_gain = trainer_data['level'] * 120  # Increased from 80
+            trainer_data = battle["trainer_data"]
+            rewards["exp"] = trainer_data['level'] * 25  # Increased from 15
+            rewards["cash"] = trainer_data['level'] * 120  # Increased from 80
             
             # Enhanced XP potion rewards
             if "Novice" in trainer_data['name']:
-                self.player_items["Small XP Pot"] += 5  # Increased from 3
-                self.show_notification("⭐ Earned 5x Small XP Potions!")
+                rewards["items"]["Small XP Pot"] = 5  # Increased from 3
+                rewards["messages"].append("⭐ Earned 5x Small XP Potions!")
             elif "Veteran" in trainer_data['name']:
-                self.player_items["Medium XP Pot"] += 4  # Increased from 2
-                self.show_notification("⭐ Earned 4x Medium XP Potions!")
+                rewards["items"]["Medium XP Pot"] = 4  # Increased from 2
+                rewards["messages"].append("⭐ Earned 4x Medium XP Potions!")
             elif "Elite" in trainer_data['name']:
-                self.player_items["Large XP Pot"] += 2  # Increased from 1
-                self.show_notification("⭐ Earned 2x Large XP Potions!")
+                rewards["items"]["Large XP Pot"] = 2  # Increased from 1
+                rewards["messages"].append("⭐ Earned 2x Large XP Potions!")
             elif "Grandmaster" in trainer_data['name']:
-                self.player_items["Large XP Pot"] += 2
-                self.player_items["Medium XP Pot"] += 2
-                self.show_notification("⭐ Earned 2x Large + 2x Medium XP Potions!")
+                rewards["items"]["Large XP Pot"] = 2
+                rewards["items"]["Medium XP Pot"] = 2
+                rewards["messages"].append("⭐ Earned 2x Large + 2x Medium XP Potions!")
                 
         else:
             # Enhanced campaign rewards with progression-gated rune drops
-            world_idx = self.battle_state["world_idx"]
-            stage_idx = self.battle_state["stage_idx"]
+            world_idx = battle["world_idx"]
+            stage_idx = battle["stage_idx"]
             is_boss_stage = (stage_idx + 1) % 10 == 0
             
             # Scaling rewards based on difficulty
@@ -5554,8 +8294,8 @@ class NightmareNexusGUI:
                 base_exp = int(base_exp * 1.5)
                 base_cash = int(base_cash * 1.5)
                 
-            exp_gain = base_exp
-            cash_gain = base_cash
+            rewards["exp"] = base_exp
+            rewards["cash"] = base_cash
             
             # Rune drops from campaign stages (progression incentive)
             rune_drop_chance = 0.3 + (world_idx * 0.1) + (0.1 if is_boss_stage else 0)  # 30-80% chance
@@ -5590,8 +8330,39 @@ class NightmareNexusGUI:
                     for substat in campaign_rune['substats']:
                         campaign_rune['substats'][substat] = int(campaign_rune['substats'][substat] * 1.05)
                 
-                self.player_runes.append(campaign_rune)
-                self.show_notification(f"🎰 Stage Drop: {campaign_rune['name']} ({rune_rarity})!")
+                rewards["runes"].append(campaign_rune)
+                rewards["messages"].append(f"🎰 Stage Drop: {campaign_rune['name']} ({rune_rarity})!")
+        
+        return rewards
+        
+    def merge_battle_rewards(self, total, rewards):
+        """Add one battle's rolled rewards into a running total"""
+        total["exp"] += rewards["exp"]
+        total["cash"] += rewards["cash"]
+        total["runes"].extend(rewards["runes"])
+        for item, count in rewards["items"].items():
+            total["items"][item] = total["items"].get(item, 0) + count
+        return total
+        
+    def apply_battle_rewards(self, battle, rewards, team):
+        """Apply rolled rewards and stage progression once, returning notification lines"""
+        messages = []
+        
+        self.player_runes.extend(rewards["runes"])
+        for item, count in rewards["items"].items():
+            self.player_items[item] = self.player_items.get(item, 0) + count
+        
+        if battle.get("type") == "delve":
+            # Unlock next floor
+            floor = battle["floor"]
+            if floor >= self.player_progress.get('dungeon_highest', 1):
+                self.player_progress['dungeon_highest'] = floor + 1
+                messages.append(f"🔓 Delve Floor {floor + 1} unlocked!")
+                
+        elif battle.get("type") == "campaign":
+            world_idx = battle["world_idx"]
+            stage_idx = battle["stage_idx"]
+            is_boss_stage = (stage_idx + 1) % 10 == 0
             
             # First-time clear gem rewards
             stage_key = f"world_{world_idx}_stage_{stage_idx}"
@@ -5608,32 +8379,27 @@ class NightmareNexusGUI:
                     gem_reward *= 2  # Double gems for boss stages
                 
                 self.player_gems += gem_reward
-                self.show_notification(f"🎉 FIRST CLEAR BONUS: +{gem_reward} gems!")
+                messages.append(f"🎉 FIRST CLEAR BONUS: +{gem_reward} gems!")
             
             # Unlock next stage progression
             if stage_idx + 1 < self.STAGES_PER_WORLD:
                 self.player_progress["unlocked"][world_idx][stage_idx + 1] = 1
-                self.show_notification(f"🔓 Stage {stage_idx + 2} unlocked!")
+                messages.append(f"🔓 Stage {stage_idx + 2} unlocked!")
             elif world_idx + 1 < self.NUM_WORLDS:
                 self.player_progress["unlocked"][world_idx + 1][0] = 1
-                self.show_notification(f"🔓 World {world_idx + 2} unlocked! New challenges await!")
+                messages.append(f"🔓 World {world_idx + 2} unlocked! New challenges await!")
         
         # Enhanced EXP and cash rewards with improved level-up detection
+        exp_gain = rewards["exp"]
+        cash_gain = rewards["cash"]
         level_ups = []
-        for unit in self.battle_state["team"]:
+        for unit in team:
             old_level = unit["level"]
             
             # Apply battle efficiency research bonus
             exp_multiplier = 1.25 if self.player_research.get('battle_efficiency', False) else 1.0
             final_exp_gain = int(exp_gain * exp_multiplier)
-            unit["exp"] += final_exp_gain
-            
-            # Enhanced level up calculation
-            levels_gained = 0
-            while unit["exp"] >= (unit["level"] * 100):
-                unit["exp"] -= (unit["level"] * 100)
-                unit["level"] += 1
-                levels_gained += 1
+            levels_gained = self.grant_unit_exp(unit, final_exp_gain)
                 
             if levels_gained > 0:
                 level_ups.append(f"{unit['entity']['name']}: Lv.{old_level} → Lv.{unit['level']} (+{levels_gained})")
@@ -5642,24 +8408,15 @@ class NightmareNexusGUI:
         
         # Show enhanced reward notifications
         if self.player_research.get('battle_efficiency', False):
-            self.show_notification(f"💰 Earned {cash_gain} cash and {int(exp_gain * 1.25)} EXP per unit! (Battle Efficiency +25%)")
+            messages.append(f"💰 Earned {cash_gain} cash and {int(exp_gain * 1.25)} EXP per unit! (Battle Efficiency +25%)")
         else:
-            self.show_notification(f"💰 Earned {cash_gain} cash and {exp_gain} EXP per unit!")
+            messages.append(f"💰 Earned {cash_gain} cash and {exp_gain} EXP per unit!")
         
         # Show level-up notifications
-        if level_ups:
-            for level_up in level_ups:
-                self.show_notification(f"⭐ {level_up}")
+        for level_up in level_ups:
+            messages.append(f"⭐ {level_up}")
         
-        # Update stats
-        self.update_stats_display()
-        
-        # Check if multi-battle is active
-        if self.multi_battle_active:
-            self.handle_multi_battle_continuation()
-        else:
-            # Show post-battle options for single battles
-            self.show_post_battle_options()
+        return messages
         
     def battle_defeat(self):
         """Handle battle defeat with multi-battle support and post-battle options"""
@@ -5986,6 +8743,30 @@ class NightmareNexusGUI:
             return
             
         # Generate enhanced enemies for delve
+        enemies = self.generate_delve_enemies(floor)
+            
+        # Setup battle state for delve
+        self.battle_state = {
+            "type": "delve",
+            "floor": floor,
+            "team": team.copy(),
+            "enemies": enemies,
+            "current_turn": 0,
+            "turn_order": [],
+            "auto_battle": False
+        }
+        
+        # Initialize units with proper battle stats
+        for unit in self.battle_state["team"]:
+            BattleEngine.prepare_unit(unit, self.calculate_unit_stats_with_runes(unit), 100)
+            
+        self.create_battle_engine([enemies])
+                
+        # Show battle interface
+        self.show_battle_interface()
+        
+    def generate_delve_enemies(self, floor):
+        """Generate the enemy group for a delve floor"""
         enemies = []
         num_enemies = random.randint(4, 6)
         
@@ -6011,31 +8792,7 @@ class NightmareNexusGUI:
             }
             enemies.append(enemy)
             
-        # Setup battle state for delve
-        self.battle_state = {
-            "type": "delve",
-            "floor": floor,
-            "team": team.copy(),
-            "enemies": enemies,
-            "current_turn": 0,
-            "turn_order": [],
-            "auto_battle": False
-        }
-        
-        # Initialize units with proper battle stats
-        for unit in self.battle_state["team"]:
-            final_stats = self.calculate_unit_stats_with_runes(unit)
-            unit["battle_stats"] = final_stats
-            unit["battle_hp"] = final_stats["hp"]
-            unit["max_hp"] = final_stats["hp"]
-            unit["sp"] = 100
-            unit["effects"] = []
-            unit["defending"] = False
-            if unit["entity"]["name"] == "Jeff the Killer":
-                unit["effects"].append({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
-                
-        # Show battle interface
-        self.show_battle_interface()
+        return enemies
         
     def show_rune_sanctums(self):
         """Show Rune Sanctums interface with boss stages"""
@@ -6630,6 +9387,7 @@ class NightmareNexusGUI:
         self.player_cash -= project['cost']
         project_key = project['name'].lower().replace(' ', '_')
         self.player_research[project_key] = True
+        self.invalidate_unit_stats()
         
         self.show_notification(f"🔬 {project['name']} research completed!")
         self.update_stats_display()
@@ -6884,11 +9642,7 @@ class NightmareNexusGUI:
         
         # Apply training
         for unit in self.training_selected_units:
-            unit['exp'] += option['exp']
-            # Level up check (simplified)
-            while unit['exp'] >= (unit['level'] * 100):
-                unit['exp'] -= (unit['level'] * 100)
-                unit['level'] += 1
+            self.grant_unit_exp(unit, option['exp'])
                 
         self.show_notification(f"💪 Training completed! {len(self.training_selected_units)} units gained {option['exp']} EXP each!")
         self.update_stats_display()
@@ -6985,7 +9739,7 @@ class NightmareNexusGUI:
         
         # Generate a new rune
         new_rune = self.generate_rune(service['type'])
-        self.player_runes.append(new_rune)
+        self.player_runes.add(new_rune)
         
         self.show_notification(f"⚒️ Crafted {new_rune['name']} ({service['type']})!")
         self.update_stats_display()
@@ -7318,10 +10072,37 @@ class NightmareNexusGUI:
         filter_menu.pack(side='left', padx=5)
         filter_menu.bind("<<ComboboxSelected>>", lambda e: self.refresh_rune_display())
         
+        # Search box, e.g. set:Nightmare main:Attack% sub:"Crit Rate">=5 level>=9 unequipped
+        search_label = tk.Label(controls_frame, text="Search:", font=self.body_font, bg='black', fg='white')
+        search_label.pack(side='left', padx=(20, 5))
+        
+        self.rune_query_var = tk.StringVar(value="")
+        search_entry = tk.Entry(controls_frame, textvariable=self.rune_query_var, font=self.body_font,
+                                bg='#2a2a2a', fg='white', insertbackground='white', width=40)
+        search_entry.pack(side='left', padx=5)
+        search_entry.bind('<Return>', lambda e: self.refresh_rune_display())
+        
+        search_btn = tk.Button(controls_frame, text="🔍", font=self.small_font, bg='#333333', fg='white',
+                               command=self.refresh_rune_display)
+        search_btn.pack(side='left', padx=2)
+        
         # Total runes count
         self.rune_count_label = tk.Label(controls_frame, text="", font=self.body_font, bg='black', fg='#CCCCCC')
         self.rune_count_label.pack(side='right', padx=10)
 
+        # Bulk actions over everything the current search shows
+        bulk_frame = tk.Frame(self.content_frame, bg='black')
+        bulk_frame.pack(fill='x', padx=20)
+        
+        bulk_label = tk.Label(bulk_frame, text="All shown:", font=self.body_font, bg='black', fg='white')
+        bulk_label.pack(side='left', padx=5)
+        
+        for text, action, color in [("💰 Sell", "sell", '#CC6600'), ("⬆️ Upgrade", "upgrade", '#006600'),
+                                    ("🔒 Lock", "lock", '#444466'), ("🔓 Unlock", "unlock", '#444466')]:
+            bulk_btn = tk.Button(bulk_frame, text=text, font=self.small_font, bg=color, fg='white',
+                                 command=lambda a=action: self.bulk_rune_action(a), width=10)
+            bulk_btn.pack(side='left', padx=2)
+            
         # Display runes in grid with scrolling
         self.runes_display_frame = tk.Frame(self.content_frame, bg='black')
         self.runes_display_frame.pack(fill='both', expand=True, padx=20, pady=20)
@@ -7335,7 +10116,11 @@ class NightmareNexusGUI:
             widget.destroy()
             
         # Get filtered and sorted runes
-        filtered_runes = self.get_filtered_runes()
+        try:
+            filtered_runes = self.get_filtered_runes()
+        except ValueError as e:
+            self.rune_count_label.config(text=f"❌ {e}")
+            return
         
         # Update count
         self.rune_count_label.config(text=f"Showing {len(filtered_runes)} runes")
@@ -7363,7 +10148,8 @@ class NightmareNexusGUI:
 
         # Display each rune
         for i, rune in enumerate(filtered_runes):
-            rune_frame = tk.LabelFrame(scrollable_frame, text=f"{rune['name']} (Lv.{rune['level']})", font=self.body_font,
+            lock_mark = "🔒 " if rune.get('locked') else ""
+            rune_frame = tk.LabelFrame(scrollable_frame, text=f"{lock_mark}{rune['name']} (Lv.{rune['level']})", font=self.body_font,
                                        bg='#1a1a1a', fg=self.rarity_colors[rune['rarity']], bd=2, relief='ridge')
             rune_frame.grid(row=i // 3, column=i % 3, padx=10, pady=10, sticky='nsew')
 
@@ -7392,6 +10178,11 @@ class NightmareNexusGUI:
             sell_btn = tk.Button(btn_frame, text="💰 Sell", font=self.small_font, bg='#CC6600', fg='white',
                                 command=lambda r=rune: self.sell_rune(r), width=8)
             sell_btn.pack(side='left', padx=2)
+            
+            # Lock toggle
+            lock_btn = tk.Button(btn_frame, text="🔓 Unlock" if rune.get('locked') else "🔒 Lock", font=self.small_font,
+                                 bg='#444466', fg='white', command=lambda r=rune: self.toggle_rune_lock(r), width=8)
+            lock_btn.pack(side='left', padx=2)
 
         # Configure grid weights
         for col in range(3):
@@ -7399,24 +10190,39 @@ class NightmareNexusGUI:
             
     def get_filtered_runes(self):
         """Get filtered and sorted runes"""
-        runes = self.player_runes.copy()
+        rarity = self.rune_filter_var.get() if hasattr(self, 'rune_filter_var') else "All"
+        sort_by = self.rune_sort_var.get() if hasattr(self, 'rune_sort_var') else None
+        query = self.rune_query_var.get() if hasattr(self, 'rune_query_var') else ""
+        order_by = [RUNE_SORT_KEYS[sort_by]] if sort_by in RUNE_SORT_KEYS else []
+        return self.find_runes(query, rarities=None if rarity == "All" else [rarity], order_by=order_by)
+        
+    def find_runes(self, query="", rarities=None, equipped=None, order_by=()):
+        """Runes matching a search like 'set:Nightmare sub:"Crit Rate">=5 unequipped'.
+        
+        A sort: in the query takes precedence over order_by. Raises ValueError if the
+        query can't be parsed.
+        """
+        terms, query_order = parse_rune_query(query)
+        order_by = query_order if query_order is not None else order_by
+        rarity_order = {"Common": 0, "Rare": 1, "Epic": 2, "Legendary": 3}
         
-        # Apply filter
-        if hasattr(self, 'rune_filter_var') and self.rune_filter_var.get() != "All":
-            runes = [r for r in runes if r['rarity'] == self.rune_filter_var.get()]
-            
-        # Apply sort
-        if hasattr(self, 'rune_sort_var'):
-            sort_by = self.rune_sort_var.get()
-            if sort_by == "name":
-                runes.sort(key=lambda r: r['name'])
-            elif sort_by == "rarity":
-                rarity_order = {"Common": 0, "Rare": 1, "Epic": 2, "Legendary": 3}
-                runes.sort(key=lambda r: rarity_order.get(r['rarity'], 0), reverse=True)
-            elif sort_by == "type":
-                runes.sort(key=lambda r: r['type'])
-            elif sort_by == "level":
-                runes.sort(key=lambda r: r['level'], reverse=True)
+        columns = self.player_runes.get_columns()
+        if columns is not None:
+            # One mask and one lexsort over the columns instead of copying and re-sorting the list
+            return columns.select(rarities=rarities, equipped=equipped, terms=terms,
+                                  order_by=order_by, ranks={"rarity": rarity_order})
+            
+        runes = [rune for rune in self.player_runes
+                 if (rarities is None or rune['rarity'] in rarities)
+                 and (equipped is None or (rune['equipped_unit'] is not None) == equipped)
+                 and rune_matches_query(rune, terms)]
+        
+        # Stable sorts from the least significant key up
+        for field, descending in reversed(order_by):
+            if field == "rarity":
+                runes.sort(key=lambda r: rarity_order.get(r['rarity'], 0), reverse=descending)
+            else:
+                runes.sort(key=lambda r: r[field], reverse=descending)
                 
         return runes
         
@@ -7432,29 +10238,39 @@ class NightmareNexusGUI:
             return
             
         self.player_cash -= upgrade_cost
-        rune['level'] += 1
-        
-        # Increase main stat
-        rune['main_value'] = int(rune['main_value'] * 1.1)
-        
-        # Chance to upgrade substats
-        for substat in rune['substats']:
-            if random.randint(1, 100) <= 25:  # 25% chance
-                rune['substats'][substat] = int(rune['substats'][substat] * 1.05)
+        self.level_up_rune(rune)
+        self.invalidate_unit_stats()
                 
         self.show_notification(f"✨ {rune['name']} upgraded to level {rune['level']}!")
         self.update_stats_display()
         self.refresh_rune_display()
         
+    def level_up_rune(self, rune):
+        """Raise a rune one level without charging for it"""
+        rune['level'] += 1
+        
+        # Increase main stat
+        rune['main_value'] = int(rune['main_value'] * 1.1)
+        
+        # Chance to upgrade substats; a new dict, so the rune columns see the change
+        rune['substats'] = {substat: int(amount * 1.05) if random.randint(1, 100) <= 25 else amount  # 25% chance
+                            for substat, amount in rune['substats'].items()}
+                            
+    def rune_sell_price(self, rune):
+        """Cash a rune sells for"""
+        rarity_multiplier = {"Common": 100, "Rare": 300, "Epic": 800, "Legendary": 2000}
+        return rarity_multiplier[rune['rarity']] + (rune['level'] * 50)
+    
     def sell_rune(self, rune):
         """Sell a rune"""
         if rune['equipped_unit'] is not None:
             self.show_notification("❌ Cannot sell equipped rune! Unequip it first.")
             return
+        if rune.get('locked'):
+            self.show_notification("❌ Cannot sell locked rune! Unlock it first.")
+            return
             
-        # Calculate sell price
-        rarity_multiplier = {"Common": 100, "Rare": 300, "Epic": 800, "Legendary": 2000}
-        sell_price = rarity_multiplier[rune['rarity']] + (rune['level'] * 50)
+        sell_price = self.rune_sell_price(rune)
         
         self.player_cash += sell_price
         self.player_runes.remove(rune)
@@ -7463,6 +10279,81 @@ class NightmareNexusGUI:
         self.update_stats_display()
         self.refresh_rune_display()
         
+    def toggle_rune_lock(self, rune):
+        """Lock a rune against selling, or unlock it"""
+        rune['locked'] = not rune.get('locked')
+        self.show_notification(f"{'🔒 Locked' if rune['locked'] else '🔓 Unlocked'} {rune['name']}")
+        self.refresh_rune_display()
+        
+    def preview_bulk_rune_action(self, action, runes):
+        """What selling, upgrading, locking or unlocking these runes would do, without doing it.
+        
+        Returns the action, the runes it would touch, how many were skipped and the
+        change in cash. Selling skips equipped and locked runes and upgrading takes
+        each rune below the level cap up one level.
+        """
+        if action == "sell":
+            targets = [r for r in runes if r['equipped_unit'] is None and not r.get('locked')]
+            cash = sum(self.rune_sell_price(r) for r in targets)
+        elif action == "upgrade":
+            targets = [r for r in runes if r['level'] < 15]
+            cash = -sum(r['level'] * 1000 for r in targets)
+        elif action in ("lock", "unlock"):
+            targets = [r for r in runes if bool(r.get('locked')) != (action == "lock")]
+            cash = 0
+        else:
+            raise ValueError(f"Unknown bulk rune action '{action}'")
+        return {"action": action, "runes": targets, "skipped": len(runes) - len(targets), "cash": cash}
+    
+    def apply_bulk_rune_action(self, preview):
+        """Apply a previewed bulk action all at once, with one stats update and one redraw"""
+        action, runes, cash = preview["action"], preview["runes"], preview["cash"]
+        if self.player_cash + cash < 0:
+            self.show_notification(f"❌ Need {-cash:,} cash to upgrade {len(runes):,} runes!")
+            return False
+            
+        if action == "sell":
+            self.player_runes.remove_many(runes)
+            message = f"💰 Sold {len(runes):,} runes for {cash:,} cash!"
+        elif action == "upgrade":
+            for rune in runes:
+                self.level_up_rune(rune)
+            self.invalidate_unit_stats()
+            message = f"✨ Upgraded {len(runes):,} runes for {-cash:,} cash!"
+        else:
+            for rune in runes:
+                rune['locked'] = action == "lock"
+            message = f"{'🔒 Locked' if action == 'lock' else '🔓 Unlocked'} {len(runes):,} runes"
+        self.player_cash += cash
+        
+        self.show_notification(message)
+        self.update_stats_display()
+        self.refresh_rune_display()
+        return True
+    
+    def bulk_rune_action(self, action):
+        """Preview a bulk action over the runes on screen, confirm it, then apply it"""
+        try:
+            runes = self.get_filtered_runes()
+        except ValueError as e:
+            self.show_notification(f"❌ {e}")
+            return
+            
+        preview = self.preview_bulk_rune_action(action, runes)
+        verb = {"sell": "sold", "upgrade": "upgraded", "lock": "locked", "unlock": "unlocked"}[action]
+        if not preview["runes"]:
+            self.show_notification(f"⚠️ None of the {len(runes):,} shown runes can be {verb}")
+            return
+            
+        details = f"{action.capitalize()} {len(preview['runes']):,} runes?\n\n"
+        if preview["cash"]:
+            details += (f"Cash: {preview['cash']:+,} "
+                        f"({self.player_cash:,} → {self.player_cash + preview['cash']:,})\n")
+        if preview["skipped"]:
+            details += f"Skipped: {preview['skipped']:,} runes that can't be {verb}\n"
+        if messagebox.askyesno("Bulk Rune Action", details):
+            self.apply_bulk_rune_action(preview)
+            
     def show_account_manager(self):
         """Show account manager interface"""
         self.navigate_to("account_manager")
@@ -7494,6 +10385,8 @@ class NightmareNexusGUI:
             user_info += f"Player Level: {self.player_level}\n"
             user_info += f"Total Units: {len(self.player_inventory)}\n"
             user_info += f"Total Runes: {len(self.player_runes)}\n"
+            if self.current_user.get('is_developer'):
+                user_info += f"Stat Cache: {self.stat_cache_hits} hits / {self.stat_cache_misses} misses\n"
             user_info += f"Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}\n"
             user_info += f"Worlds Completed: {self.player_progress.get('world', 0) + 1}/{self.NUM_WORLDS}"
         else:
@@ -7537,7 +10430,9 @@ class NightmareNexusGUI:
                 ("🎰 Generate 10 Epic Runes", lambda: self.dev_generate_runes("Epic", 10)),
                 ("🌟 Generate 5 Legendary Runes", lambda: self.dev_generate_runes("Legendary", 5)),
                 ("🏭 Max All Facilities", self.dev_max_facilities),
-                ("⚔️ Re-equip All Units", self.auto_equip_best_runes)
+                ("⚔️ Re-equip All Units", self.auto_equip_best_runes),
+                ("📈 Gacha Rate Audit", self.run_gacha_rate_audit),
+                ("🧮 Rune Memory Benchmark", self.dev_rune_memory_benchmark)
             ]
             
             for i, (text, command) in enumerate(dev_buttons):
@@ -8086,7 +10981,7 @@ To the horror community and creators of the various entities featured in this ga
         """Developer tool to generate runes"""
         for _ in range(count):
             rune = self.generate_rune(rarity)
-            self.player_runes.append(rune)
+            self.player_runes.add(rune)
         self.show_notification(f"🎰 Generated {count} {rarity} runes!")
         
     def dev_max_facilities(self):
@@ -8105,6 +11000,154 @@ To the horror community and creators of the various entities featured in this ga
             
         self.show_notification("🏭 All facilities maxed out!")
         
+    def dev_rune_memory_benchmark(self, count=50000):
+        """Developer tool to compare memory for runes held as dicts versus Runes"""
+        next_id = self.player_runes.next_id
+        runes = [self.generate_rune() for _ in range(count)]
+        self.player_runes.next_id = next_id  # Sample runes are never added, so give their ids back
+        result = benchmark_rune_memory(runes)
+        self.show_notification(
+            f"🧮 {result['count']:,} runes: {result['dict_bytes'] / 1e6:.1f} MB as dicts, "
+            f"{result['rune_bytes'] / 1e6:.1f} MB as Runes "
+            f"({result['dict_bytes'] / max(result['rune_bytes'], 1):.1f}x smaller)")
+        
+    def run_gacha_rate_audit(self, pulls=1000000):
+        """Developer tool to simulate every banner in worker processes and audit its rates"""
+        self.clear_content()
+        
+        title_label = tk.Label(
+            self.content_frame,
+            text="📈 GACHA RATE AUDIT 📈",
+            font=self.title_font,
+            bg='black',
+            fg='#66CCFF'
+        )
+        title_label.pack(pady=20)
+        
+        self.gacha_audit_status = tk.Label(
+            self.content_frame,
+            text=f"Simulating {pulls:,} pulls per banner...",
+            font=self.header_font,
+            bg='black',
+            fg='#FFCC66'
+        )
+        self.gacha_audit_status.pack(pady=10)
+        
+        pools = {rarity: [entity["name"] for entity in entities] for rarity, entities in self.get_entity_pools().items()}
+        seed = int(time.time())
+        banners = []
+        executor = ProcessPoolExecutor()
+        for banner_type in (None, "Creepypasta", "SCP", "Analogue"):
+            rates = self.get_banner_rates(banner_type)
+            tasks = gacha_simulation_tasks(rates, pools, pulls, f"{seed}-{banner_type}")
+            futures = [executor.submit(simulate_gacha_chunk, task) for task in tasks]
+            banners.append((banner_type, rates, futures))
+        status = self.gacha_audit_status
+        self.root.after(200, lambda: self.poll_gacha_rate_audit(executor, banners, pools, status))
+        
+    def poll_gacha_rate_audit(self, executor, banners, pools, status):
+        """Update progress until every banner is simulated, then show the report"""
+        if not status.winfo_exists():
+            # The audit screen was left; drop the work instead of replacing the current screen
+            executor.shutdown(wait=False, cancel_futures=True)
+            return
+        
+        futures = [future for _, _, banner_futures in banners for future in banner_futures]
+        done = sum(1 for future in futures if future.done())
+        if done < len(futures):
+            status.config(text=f"Simulating... {done}/{len(futures)} chunks")
+            self.root.after(200, lambda: self.poll_gacha_rate_audit(executor, banners, pools, status))
+            return
+        
+        executor.shutdown(wait=False)
+        reports = []
+        for banner_type, rates, banner_futures in banners:
+            report = analyze_gacha_results(rates, pools, [future.result() for future in banner_futures])
+            report["banner"] = banner_type
+            reports.append(report)
+        self.show_gacha_rate_audit(reports)
+        
+    def show_gacha_rate_audit(self, reports):
+        """Show configured vs observed rates, legendaries per 10-pull and gem costs per banner"""
+        self.clear_content()
+        
+        title_label = tk.Label(
+            self.content_frame,
+            text="📈 GACHA RATE AUDIT 📈",
+            font=self.title_font,
+            bg='black',
+            fg='#66CCFF'
+        )
+        title_label.pack(pady=10)
+        
+        pulls = reports[0]["pulls"] if reports else 0
+        info_label = tk.Label(
+            self.content_frame,
+            text=f"{pulls:,} pulls per banner • configured → observed rates • chi-square audit",
+            font=self.body_font,
+            bg='black',
+            fg='white'
+        )
+        info_label.pack(pady=5)
+        
+        for report in reports:
+            banner_frame = tk.LabelFrame(
+                self.content_frame,
+                text=f"{report['banner'] or 'Normal'} Banner",
+                font=self.header_font,
+                bg='#1a1a1a',
+                fg='#FFCC66',
+                bd=2,
+                relief='ridge'
+            )
+            banner_frame.pack(fill='x', pady=5, padx=20)
+            
+            rates_text = " • ".join(f"{rarity} {rate['configured']:.2f}% → {rate['observed']:.2f}%"
+                                    for rarity, rate in report["rates"].items())
+            
+            # Red when the observed rates are very unlikely under the configured ones
+            audit_ok = report["p_value"] >= 0.001
+            audit_text = (f"χ² = {report['chi_square']:.2f} ({report['dof']} dof), p = {report['p_value']:.3f} "
+                          + ("✅ rates match" if audit_ok else "❌ rates differ from configuration"))
+            
+            per_ten = report["legendaries_per_10"]
+            ten_text = "Legendaries per 10-pull (exact / observed): " + " • ".join(
+                f"{row['legendaries']}: {row['exact']*100:.2f}% / {row['observed']*100:.2f}%" for row in per_ten[:4])
+            ten_text += (f" • 4+: {sum(row['exact'] for row in per_ten[4:])*100:.2f}% / "
+                         f"{sum(row['observed'] for row in per_ten[4:])*100:.2f}%")
+            
+            # Every entity of a rarity shares the same odds, so one line per rarity covers them all
+            gems_lines = []
+            for rarity in report["rates"]:
+                entry = next((entry for entry in report["entities"].values()
+                              if entry["rarity"] == rarity and "expected_gems" in entry), None)
+                if entry:
+                    gems_lines.append(f"Gems for a specific {rarity}: avg {entry['expected_gems']:,.0f} • "
+                                      f"50% by {entry['gems_50']:,} • 90% by {entry['gems_90']:,}")
+            
+            for text, color in ((rates_text, 'white'), (audit_text, '#66FF66' if audit_ok else '#FF6666'),
+                                (ten_text, '#CCCCFF'), ("\n".join(gems_lines), '#FFCC66')):
+                label = tk.Label(
+                    banner_frame,
+                    text=text,
+                    font=self.small_font,
+                    bg='#1a1a1a',
+                    fg=color,
+                    justify='left',
+                    wraplength=900
+                )
+                label.pack(anchor='w', padx=10, pady=1)
+        
+        back_btn = tk.Button(
+            self.content_frame,
+            text="🔙 Back to Account",
+            command=self.show_account_manager,
+            font=self.body_font,
+            bg='#666666',
+            fg='white'
+        )
+        back_btn.pack(pady=10)
+        
     def show_player_statistics(self):
         """Show detailed player statistics"""
         stats = f"""📊 PLAYER STATISTICS
@@ -8157,7 +11200,7 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         self.player_xp = 0
         self.player_inventory = []
         self.player_items = {"Small XP Pot": 0, "Medium XP Pot": 0, "Large XP Pot": 0}
-        self.player_runes = []
+        self.player_runes = RuneStore()
         self.player_facilities = {}
         self.player_research = {}
         self.player_progress = {
@@ -8211,13 +11254,16 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         practice_unit = self.battle_state["team"][0]
         practice_unit["battle_hp"] = 999999  # Infinite HP for testing
         practice_unit["sp"] = 150  # Max SP to test skills
-        practice_unit["effects"] = []
+        practice_unit["effects"] = EffectStore()
         practice_unit["defending"] = False
         
         # Jeff starts with 1 ghost stack even in practice
         if practice_unit["entity"]["name"] == "Jeff the Killer":
-            practice_unit["effects"].append({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
+            practice_unit["effects"].add({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
+        
+        self.create_battle_engine([[practice_dummy]])
             
+
         # Show practice battle interface
         self.show_practice_battle_interface()
         
@@ -8295,6 +11341,7 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
             wrap=tk.WORD
         )
         self.battle_log_display.pack(fill='both', expand=True, padx=5, pady=5)
+        self.battle_log.attach(self.battle_log_display, clear=True)
         
         # Unit display
         unit_frame = tk.LabelFrame(
@@ -8367,7 +11414,8 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         
         # Status effects
         if unit.get("effects"):
-            effects_text = " ".join([self.get_effect_icon(eff) for eff in unit["effects"]])
+            effects = EffectStore.of(unit)
+            effects_text = " ".join([self.get_effect_icon(eff, effects.turns_left(eff)) for eff in effects])
             effects_label = tk.Label(
                 unit_info_frame,
                 text=f"Effects: {effects_text}",
@@ -8522,6 +11570,36 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         if not team:
             return
             
+        waves = self.generate_rune_boss_waves(boss, stage)
+        
+        # Setup battle state for boss fight with 5-wave system
+        self.battle_state = {
+            "type": "rune_boss",
+            "boss_data": boss,
+            "stage": stage,
+            "team": team.copy(),
+            "enemies": waves[0],
+            "current_turn": 0,
+            "turn_order": [],
+            "auto_battle": False,
+            "current_wave": 1,
+            "total_waves": 5,
+            "original_boss": waves[-1][0]
+        }
+        
+        self.show_notification(f"🎰 {boss['name']} Boss Battle! Prepare for 5 waves of increasing difficulty!")
+        
+        # Initialize units with proper battle stats
+        for unit in self.battle_state["team"]:
+            BattleEngine.prepare_unit(unit, self.calculate_unit_stats_with_runes(unit), 100)
+            
+        self.create_battle_engine(waves)
+                
+        # Show battle interface
+        self.show_battle_interface()
+        
+    def generate_rune_boss_waves(self, boss, stage):
+        """Build the 5 waves of a rune boss stage, ending with the scaled boss"""
         # Calculate boss stats based on stage (1-10)
         base_level = 20 + (stage * 5)  # Level 25-70
         stage_multiplier = 1.0 + (stage * 0.3)  # 1.0x to 4.0x scaling
@@ -8544,53 +11622,45 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
             "effects": []
         }
         
-        # Start with first wave minions
-        first_wave_enemies = self.generate_boss_minions(boss, 1)
+        # Minion waves 1-4 lead up to the boss on the final wave
+        return [self.generate_boss_minions(boss, wave) for wave in range(1, 5)] + [[boss_entity]]
         
-        # Setup battle state for boss fight with 5-wave system
+    def battle_xp_trainer(self, trainer):
+        """Battle an XP trainer"""
+        self.show_notification(f"⚔️ Challenging {trainer['name']}! Earn valuable XP potions!")
+        self.show_team_selection_inline(lambda team: self.launch_xp_trainer_battle(trainer, team))
+        
+    def launch_xp_trainer_battle(self, trainer, team):
+        """Launch XP trainer battle"""
+        if not team:
+            return
+            
+        # Create trainer enemy
+        trainer_entity = self.create_trainer_entity(trainer)
+        
+        # Setup battle state
         self.battle_state = {
-            "type": "rune_boss",
-            "boss_data": boss,
-            "stage": stage,
+            "type": "xp_trainer",
+            "trainer_data": trainer,
             "team": team.copy(),
-            "enemies": first_wave_enemies,
+            "enemies": [trainer_entity],
             "current_turn": 0,
             "turn_order": [],
-            "auto_battle": False,
-            "current_wave": 1,
-            "total_waves": 5,
-            "original_boss": boss_entity
+            "auto_battle": False
         }
         
-        self.show_notification(f"🎰 {boss['name']} Boss Battle! Prepare for 5 waves of increasing difficulty!")
-        
         # Initialize units with proper battle stats
         for unit in self.battle_state["team"]:
-            final_stats = self.calculate_unit_stats_with_runes(unit)
-            unit["battle_stats"] = final_stats
-            unit["battle_hp"] = final_stats["hp"]
-            unit["max_hp"] = final_stats["hp"]
-            unit["sp"] = 100
-            unit["effects"] = []
-            unit["defending"] = False
-            if unit["entity"]["name"] == "Jeff the Killer":
-                unit["effects"].append({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
+            BattleEngine.prepare_unit(unit, self.calculate_unit_stats_with_runes(unit), 100)
+            
+        self.create_battle_engine([[trainer_entity]])
                 
         # Show battle interface
         self.show_battle_interface()
         
-    def battle_xp_trainer(self, trainer):
-        """Battle an XP trainer"""
-        self.show_notification(f"⚔️ Challenging {trainer['name']}! Earn valuable XP potions!")
-        self.show_team_selection_inline(lambda team: self.launch_xp_trainer_battle(trainer, team))
-        
-    def launch_xp_trainer_battle(self, trainer, team):
-        """Launch XP trainer battle"""
-        if not team:
-            return
-            
-        # Create trainer enemy
-        trainer_entity = {
+    def create_trainer_entity(self, trainer):
+        """Create the enemy entity for an XP trainer"""
+        return {
             "name": trainer['name'],
             "rarity": "Epic",
             "hp": trainer['level'] * 80,
@@ -8607,31 +11677,18 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
             "effects": []
         }
         
-        # Setup battle state
-        self.battle_state = {
-            "type": "xp_trainer",
-            "trainer_data": trainer,
-            "team": team.copy(),
-            "enemies": [trainer_entity],
-            "current_turn": 0,
-            "turn_order": [],
-            "auto_battle": False
-        }
+    def build_battle_waves(self, battle):
+        """Roll every enemy wave for a saved battle description"""
+        battle_type = battle.get('type')
         
-        # Initialize units with proper battle stats
-        for unit in self.battle_state["team"]:
-            final_stats = self.calculate_unit_stats_with_runes(unit)
-            unit["battle_stats"] = final_stats
-            unit["battle_hp"] = final_stats["hp"]
-            unit["max_hp"] = final_stats["hp"]
-            unit["sp"] = 100
-            unit["effects"] = []
-            unit["defending"] = False
-            if unit["entity"]["name"] == "Jeff the Killer":
-                unit["effects"].append({"type": "ghost", "turns": 99, "stacks": 1, "source": "Go to Sleep"})
-                
-        # Show battle interface
-        self.show_battle_interface()
+        if battle_type == 'delve':
+            return [self.generate_delve_enemies(battle.get('floor', 1))]
+        elif battle_type == 'rune_boss':
+            return self.generate_rune_boss_waves(battle.get('boss_data', {}), battle.get('stage', 1))
+        elif battle_type == 'xp_trainer':
+            return [[self.create_trainer_entity(battle.get('trainer_data', {}))]]
+        
+        return generate_campaign_waves(self.get_entity_pools(), battle.get('world_idx', 0), battle.get('stage_idx', 0))
         
     def run(self):
         """Start the GUI application"""
@@ -8700,7 +11757,8 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
                 self.player_xp = save_data.get("player_xp", 0)
                 self.player_inventory = save_data.get("player_inventory", [])
                 self.player_items = save_data.get("player_items", {"Small XP Pot": 0, "Medium XP Pot": 0, "Large XP Pot": 0})
-                self.player_runes = save_data.get("player_runes", [])
+                self.player_runes = RuneStore(save_data.get("player_runes", []))
+                self.invalidate_unit_stats()
                 self.player_progress = save_data.get("player_progress", {
                     "world": 0,
                     "stage": 0,
@@ -8726,19 +11784,7 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
     
     def add_battle_log_with_turn(self, message, color='white'):
         """Add message to battle log with turn number"""
-        if hasattr(self, 'battle_log_display'):
-            self.battle_log_display.config(state='normal')
-            turn_text = f"[Turn {self.turn_counter}]"
-            self.battle_log_display.insert('end', f"{turn_text} {message}\n")
-            self.battle_log_display.see('end')
-            self.battle_log_display.config(state='disabled')
-            
-            # Auto-scroll and limit lines
-            lines = self.battle_log_display.get('1.0', 'end').count('\n')
-            if lines > 50:
-                self.battle_log_display.config(state='normal')
-                self.battle_log_display.delete('1.0', '2.0')
-                self.battle_log_display.config(state='disabled')
+        self.battle_log.add(message, color, turn=self.turn_counter)
     
     def process_turn_end_sp_recovery(self, unit):
         """Process SP recovery at end of turn if no skill was used"""
@@ -8765,9 +11811,10 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
             effects_frame = tk.Frame(unit_frame, bg=unit_frame['bg'])
             effects_frame.pack(pady=2)
             
+            effects = EffectStore.of(unit)
             effects_text = ""
-            for effect in unit["effects"]:
-                effect_icon = self.get_effect_icon(effect)
+            for effect in effects:
+                effect_icon = self.get_effect_icon(effect, effects.turns_left(effect))
                 effects_text += effect_icon + " "
             
             if effects_text.strip():
@@ -8992,7 +12039,7 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
             equipped_rune = None
             if slot in unit.get('runes', {}):
                 rune_id = unit['runes'][slot]
-                equipped_rune = next((r for r in self.player_runes if r["id"] == rune_id), None)
+                equipped_rune = self.player_runes.get(rune_id)
                 
             slot_frame = tk.LabelFrame(
                 slots_grid,
@@ -9086,7 +12133,7 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         
         equipped_runes = []
         for slot, rune_id in unit.get('runes', {}).items():
-            rune = next((r for r in self.player_runes if r["id"] == rune_id), None)
+            rune = self.player_runes.get(rune_id)
             if rune:
                 equipped_runes.append(rune)
         
@@ -9182,62 +12229,13 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         unit = self.player_inventory[unit_idx]
         unit_name = unit['entity']['name']
         
-        # Define optimal stat priorities for different unit types
-        unit_priorities = {
-            "Jeff the Killer": ["Crit Rate", "Crit Damage", "Attack%", "Speed", "Attack"],
-            "SCP-682": ["HP%", "Defense%", "HP", "Defense", "Attack%"],
-            "Slender": ["Speed", "Accuracy", "HP%", "Evasion", "Attack%"],
-            "Iris": ["Attack%", "Speed", "Accuracy", "Attack", "HP%"],
-            "SCP-999": ["HP%", "Speed", "Defense%", "HP", "Defense"]
-        }
-        
-        priorities = unit_priorities.get(unit_name, ["Attack%", "HP%", "Speed", "Defense%", "Crit Rate"])
-        
-        equipped_count = 0
-        for slot in range(1, 7):
-            compatible_runes = self.get_compatible_runes(slot)
-            
-            if not compatible_runes:
-                continue
-                
-            # Score runes based on unit priorities
-            best_rune = None
-            best_score = 0
-            
-            for rune in compatible_runes:
-                if rune['equipped_unit'] is not None:
-                    continue
-                    
-                score = 0
-                
-                # Score main stat
-                main_stat = rune['main_stat']
-                if main_stat in priorities:
-                    score += (10 - priorities.index(main_stat)) * 100
-                
-                # Score substats
-                for substat in rune['substats']:
-                    if substat in priorities:
-                        score += (10 - priorities.index(substat)) * 10
-                        
-                # Bonus for higher rarity and level
-                rarity_bonus = {"Common": 1, "Rare": 2, "Epic": 4, "Legendary": 8}
-                score += rarity_bonus[rune['rarity']] * 5
-                score += rune['level'] * 2
-                
-                if score > best_score:
-                    best_score = score
-                    best_rune = rune
-                    
-            # Equip the best rune found
-            if best_rune:
-                if self.equip_rune(unit_idx, slot, best_rune['id']):
-                    equipped_count += 1
-        
-        if equipped_count > 0:
+        if self.equip_unit_loadout(unit_idx):
+            equipped_count = len(unit.get("runes", {}))
             self.show_notification(f"🤖 Auto-equipped {equipped_count} optimal runes for {unit_name}!")
             # Refresh the rune management interface
             self.show_unit_rune_management(unit_idx)
+        elif unit.get("runes"):
+            self.show_notification(f"✅ {unit_name} already wears the best available runes")
         else:
             self.show_notification(f"⚠️ No suitable runes available for {unit_name}")
     
@@ -9446,14 +12444,9 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         
         unit = self.player_inventory[unit_idx]
         self.player_items[item_key] -= 1
-        unit['exp'] += exp_value
         
-        # Handle level ups
-        levels_gained = 0
-        while unit['exp'] >= (unit['level'] * 100):
-            unit['exp'] -= (unit['level'] * 100)
-            unit['level'] += 1
-            levels_gained += 1
+        # Grant EXP and handle level ups
+        levels_gained = self.grant_unit_exp(unit, exp_value)
         
         if levels_gained > 0:
             self.show_notification(f"✨ {unit['entity']['name']} gained {levels_gained} level(s)! Now level {unit['level']}")
@@ -9508,15 +12501,8 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
                 self.show_notification("❌ Error: Target unit lost during fodder process")
                 return
         
-        # Grant EXP to the target unit
-        target_unit['exp'] += fodder_exp
-        
-        # Handle level ups
-        levels_gained = 0
-        while target_unit['exp'] >= (target_unit['level'] * 100):
-            target_unit['exp'] -= (target_unit['level'] * 100)
-            target_unit['level'] += 1
-            levels_gained += 1
+        # Grant EXP to the target unit and handle level ups
+        levels_gained = self.grant_unit_exp(target_unit, fodder_exp)
         
         if levels_gained > 0:
             self.show_notification(f"💀 {removed_unit['entity']['name']} consumed as fodder! {target_unit_name} gained {levels_gained} level(s)!")
@@ -9539,7 +12525,7 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
             self.show_notification("❌ No rune equipped in this slot!")
             return
         
-        rune = next((r for r in self.player_runes if r["id"] == equipped_rune_id), None)
+        rune = self.player_runes.get(equipped_rune_id)
         if not rune:
             self.show_notification("❌ Rune not found!")
             return
@@ -9675,15 +12661,8 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         
         # Perform upgrade
         self.player_cash -= upgrade_cost
-        rune['level'] += 1
-        
-        # Increase main stat by 10%
-        rune['main_value'] = int(rune['main_value'] * 1.1)
-        
-        # 25% chance to upgrade each substat by 5%
-        for substat in rune['substats']:
-            if random.randint(1, 100) <= 25:
-                rune['substats'][substat] = int(rune['substats'][substat] * 1.05)
+        self.level_up_rune(rune)
+        self.invalidate_unit_stats()
         
         self.show_notification(f"✨ {rune['name']} upgraded to level {rune['level']}!")
         self.update_stats_display()
@@ -9695,7 +12674,7 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         """Display active rune set effects for a unit"""
         equipped_runes = []
         for slot, rune_id in unit.get('runes', {}).items():
-            rune = next((r for r in self.player_runes if r["id"] == rune_id), None)
+            rune = self.player_runes.get(rune_id)
             if rune:
                 equipped_runes.append(rune)
         
@@ -9721,25 +12700,42 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
         self.root.after(120000, self.autosave_game_data)  # 2 minutes
     
     def autosave_game_data(self):
-        """Auto-save game data periodically"""
+        """Auto-save game data periodically; only the snapshot runs on the Tk thread"""
         try:
-            # Only autosave if user is logged in
-            if self.current_user:
-                self.save_game_data()
-                self.show_notification("💾 Game auto-saved")
+            # Only autosave if user is logged in, and never queue saves behind a slow disk
+            pending = getattr(self, 'autosave_future', None)
+            if self.current_user and (pending is None or pending.done()):
+                start = time.perf_counter()
+                future = self.save_game_data(wait=False)
+                snapshot_ms = (time.perf_counter() - start) * 1000
+                if future is not None:
+                    self.autosave_future = future
+                    self.root.after(100, lambda: self.poll_autosave(future, snapshot_ms))
         except Exception as e:
             self.show_notification(f"❌ Auto-save failed: {str(e)}", '#FF6666')
         
         # Schedule next autosave
         self.root.after(120000, self.autosave_game_data)
     
-    def save_game_data(self):
+    def poll_autosave(self, future, snapshot_ms):
+        """Report the autosave and how long it took once the writer thread finishes"""
+        if not future.done():
+            self.root.after(100, lambda: self.poll_autosave(future, snapshot_ms))
+            return
+        
+        try:
+            write_seconds = future.result()
+        except Exception as e:
+            self.show_notification(f"❌ Auto-save failed: {str(e)}", '#FF6666')
+            return
+        self.show_notification(f"💾 Game auto-saved ({snapshot_ms:.0f} ms snapshot, {write_seconds * 1000:.0f} ms write)")
+    
+    def save_game_data(self, wait=True):
         """Save game data to file with backward compatibility"""
         # Use account-specific saving for players
         if self.current_user and not self.current_user.get('is_developer'):
-            self.save_player_account()
-            return
-            
+            return self.save_player_account(wait)
+        
         # Developer account uses main save file
         save_data = {
             "version": "1.1",
@@ -9747,22 +12743,17 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
             "player_cash": self.player_cash,
             "player_level": self.player_level,
             "player_xp": self.player_xp,
-            "player_inventory": self.player_inventory,
-            "player_items": self.player_items,
-            "player_runes": self.player_runes,
-            "player_progress": self.player_progress,
-            "player_facilities": self.player_facilities,
-            "player_research": self.player_research,
-            "current_user": self.current_user
+            "player_inventory": self.pack_player_units(),
+            "player_items": dict(self.player_items),
+            "player_runes": snapshot_runes(self.player_runes),
+            "player_progress": snapshot_save_value(self.player_progress),
+            "player_facilities": dict(self.player_facilities),
+            "player_research": snapshot_save_value(self.player_research),
+            "current_user": snapshot_save_value(self.current_user)
         }
         
-        # Ensure save directory exists
-        os.makedirs("saves", exist_ok=True)
-        
-        # Save to file
-        with open("saves/nightmare_nexus_save.json", "w") as f:
-            json.dump(save_data, f, indent=2)
-    
+        return self.write_save("saves/nightmare_nexus_save.json", save_data, wait)
+
     def load_game_data(self):
         """Load game data from file with backward compatibility"""
         try:
@@ -9777,7 +12768,8 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
                 self.player_xp = save_data.get("player_xp", 0)
                 self.player_inventory = save_data.get("player_inventory", [])
                 self.player_items = save_data.get("player_items", {"Small XP Pot": 0, "Medium XP Pot": 0, "Large XP Pot": 0})
-                self.player_runes = save_data.get("player_runes", [])
+                self.player_runes = RuneStore(save_data.get("player_runes", []))
+                self.invalidate_unit_stats()
                 self.player_progress = save_data.get("player_progress", {
                     "world": 0,
                     "stage": 0,
@@ -9788,15 +12780,9 @@ Highest Delve Floor: {self.player_progress.get('dungeon_highest', 1)}
                 self.player_research = save_data.get("player_research", {})
                 self.current_user = save_data.get("current_user", None)
                 
-                # Ensure backward compatibility for new rune format
-                for rune in self.player_runes:
-                    if "set" not in rune:
-                        rune["set"] = random.choice(list(self.rune_sets.keys()))
-                
-                # Ensure backward compatibility for units with new level scaling
-                for unit in self.player_inventory:
-                    if "runes" not in unit:
-                        unit["runes"] = {}
+                # Ensure backward compatibility for rune sets, unit rune slots and entity ids
+                self.prepare_loaded_section("player_runes", self.player_runes)
+                self.prepare_loaded_section("player_inventory", self.player_inventory)
                 
                 print(f"✅ Game data loaded from save file")
         except Exception as e:
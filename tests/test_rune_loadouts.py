@@ -0,0 +1,90 @@
+import importlib.util
+import itertools
+import os
+import random
+
+import pytest
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nightmare_nexus_v0.1.py")
+
+SET_PIECES = {"Nightmare": 4, "Terror": 2, "Void": 2, "Soul": 2}
+
+
+@pytest.fixture(scope="module")
+def nn():
+    spec = importlib.util.spec_from_file_location("nightmare_nexus", GAME_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def loadout_value(picks, set_bonuses):
+    counts = {}
+    for _, set_name, _ in picks:
+        counts[set_name] = counts.get(set_name, 0) + 1
+    return sum(c[0] for c in picks) + sum(bonus for set_name, bonus in set_bonuses.items()
+                                          if counts.get(set_name, 0) >= SET_PIECES[set_name])
+
+
+def brute_force_loadout(groups, set_bonuses):
+    """Try every way to fill each group's positions"""
+    choices = [itertools.combinations(candidates, min(positions, len(candidates)))
+               for positions, candidates in groups]
+    return max(loadout_value([c for group in combo for c in group], set_bonuses)
+               for combo in itertools.product(*choices))
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_loadout_search_matches_brute_force(nn, seed):
+    rng = random.Random(seed)
+    set_bonuses = {set_name: rng.choice([0, rng.randint(1, 120)]) for set_name in SET_PIECES}
+    groups = []
+    for positions in (1, 1, 1, 3):
+        candidates = [(rng.randint(0, 60), rng.choice(list(SET_PIECES) + [""]), object())
+                      for _ in range(rng.randint(0, 6))]
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        groups.append((positions, candidates))
+
+    value, picks = nn.search_rune_loadout(groups, set_bonuses, SET_PIECES)
+
+    assert value == brute_force_loadout(groups, set_bonuses)
+    chosen = []
+    for (positions, candidates), runes in zip(groups, picks):
+        assert len(runes) == min(positions, len(candidates))
+        by_rune = {c[2]: c for c in candidates}
+        chosen += [by_rune[rune] for rune in runes]
+    assert loadout_value(chosen, set_bonuses) == value
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_loadout_search_floor(nn, seed):
+    rng = random.Random(seed)
+    set_bonuses = {set_name: rng.randint(1, 80) for set_name in SET_PIECES}
+    groups = []
+    for positions in (1, 1, 1, 3):
+        candidates = [(rng.randint(0, 40), rng.choice(list(SET_PIECES)), object()) for _ in range(4)]
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        groups.append((positions, candidates))
+    best = brute_force_loadout(groups, set_bonuses)
+
+    assert nn.search_rune_loadout(groups, set_bonuses, SET_PIECES, floor=best) == (best, None)
+    assert nn.search_rune_loadout(groups, set_bonuses, SET_PIECES, floor=best - 1)[0] == best
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_class_assignment_matches_brute_force(nn, seed):
+    rng = random.Random(seed)
+    num_classes = rng.randint(1, 3)
+    num_runes = rng.randint(0, 7)
+    capacities = [rng.randint(0, 3) for _ in range(num_classes)]
+    weights = [[rng.randint(0, 50) for _ in range(num_runes)] for _ in range(num_classes)]
+
+    owned = nn.assign_runes_to_classes(capacities, weights)
+
+    assert all(len(owned[k]) <= capacities[k] for k in range(num_classes))
+    assert len({r for runes in owned for r in runes}) == sum(len(runes) for runes in owned)
+    # Each rune goes to one class or to none (num_classes)
+    best = max(sum(weights[k][r] for r, k in enumerate(combo) if k < num_classes)
+               for combo in itertools.product(range(num_classes + 1), repeat=num_runes)
+               if all(combo.count(k) <= capacities[k] for k in range(num_classes)))
+    assert sum(weights[k][r] for k in range(num_classes) for r in owned[k]) == best
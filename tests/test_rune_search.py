@@ -0,0 +1,91 @@
+import importlib.util
+import os
+import random
+
+import pytest
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nightmare_nexus_v0.1.py")
+
+STATS = ["Attack%", "HP%", "Defense%", "Speed", "Crit Rate", "Crit Damage", "Accuracy"]
+
+QUERIES = [
+    'set:Nightmare main:Attack% sub:"Crit Rate">=5 level>=9 unequipped',
+    'set:Nightmare sub:"Crit Rate">=5 unequipped',
+    'main:Attack%',
+    '-main:Attack%',
+    'main:Attack%>=20',
+    '-main:Attack%>=20',
+    '-main:hp%<10 level<=12',
+    'sub:Speed',
+    '-sub:Speed',
+    'sub:"Crit Rate">=5',
+    '-sub:"Crit Rate">=5',
+    'sub:accuracy!=3',
+    'level>=9 -set:Void',
+    'value<15 rarity:legendary',
+    'fang',
+    '-name:eye locked',
+    'equipped -locked',
+    'type:weapon unlocked',
+]
+
+
+@pytest.fixture(scope="module")
+def nn():
+    spec = importlib.util.spec_from_file_location("nightmare_nexus", GAME_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if module.np is None:
+        pytest.skip("RuneColumns needs NumPy")
+    return module
+
+
+def make_rune(rng, rune_id):
+    return {"id": rune_id, "name": f"{rng.choice(['Cursed', 'Haunted', 'Bloody'])} {rng.choice(['Fang', 'Eye', 'Bone'])}",
+            "type": rng.choice(["Weapon", "Armor", "Accessory", "Enhancement"]),
+            "rarity": rng.choice(["Common", "Rare", "Epic", "Legendary"]),
+            "level": rng.randint(1, 15), "main_stat": rng.choice(STATS), "main_value": rng.randint(1, 40),
+            "substats": {stat: rng.randint(1, 10) for stat in rng.sample(STATS, rng.randint(0, 3))},
+            "set": rng.choice(["Nightmare", "Terror", "Void", "Soul"]),
+            "equipped_unit": rng.choice([None, None, 0, 1]), "equipped_slot": None, "locked": rng.random() < 0.2}
+
+
+def make_store(nn, rng, count=500):
+    store = nn.RuneStore(make_rune(rng, store_id) for store_id in range(1, count + 1))
+    store.get_columns()
+    return store
+
+
+def assert_same_ids(nn, store, query):
+    terms, _ = nn.parse_rune_query(query)
+    expected = [rune["id"] for rune in store if nn.rune_matches_query(rune, terms)]
+    assert [rune["id"] for rune in store.get_columns().select(terms=terms)] == expected
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_columns_match_python_path(nn, query):
+    store = make_store(nn, random.Random(1))
+    assert_same_ids(nn, store, query)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_columns_match_python_path_after_changes(nn, query):
+    rng = random.Random(2)
+    store = make_store(nn, rng)
+    for _ in range(60):
+        store.add(make_rune(rng, store.new_id()))
+    for rune in rng.sample(list(store), 40):
+        store.remove(rune)
+    store.remove_many(rng.sample(list(store), 25))
+    for rune in rng.sample(list(store), 80):
+        # The way level_up_rune upgrades: new values and a new substats dict
+        rune["level"] += 1
+        rune["main_value"] = int(rune["main_value"] * 1.1) + 1
+        substats = {stat: amount + 1 for stat, amount in rune["substats"].items()}
+        if len(substats) < 4:
+            substats[rng.choice(STATS)] = rng.randint(1, 10)
+        rune["substats"] = substats
+    for rune in rng.sample(list(store), 40):
+        rune["locked"] = not rune["locked"]
+        rune["equipped_unit"] = None if rune["equipped_unit"] is not None else 0
+    assert_same_ids(nn, store, query)
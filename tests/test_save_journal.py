@@ -0,0 +1,112 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nightmare_nexus_v0.1.py")
+
+
+@pytest.fixture(scope="module")
+def nn():
+    spec = importlib.util.spec_from_file_location("nightmare_nexus", GAME_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def fields(gems, cash):
+    return {"version": "1.1", "username": "tester", "password_hash": "x",
+            "player_gems": gems, "player_cash": cash}
+
+
+def save_changes(nn, snapshot_path, gems, cash):
+    """Log in lazily and journal one change, the way save_player_account does"""
+    save_data = nn.SaveJournal.load(snapshot_path, lazy=True)
+    journal = nn.SaveJournal(snapshot_path)
+    journal.resume(save_data)
+    assert journal.ready
+    line = journal.diff(fields(gems, cash), None, None)
+    journal.append(line)
+    return journal
+
+
+def test_saves_after_a_torn_journal_line_survive(nn, tmp_path):
+    snapshot_path = str(tmp_path / "player_tester.json")
+    save_data = dict(fields(100, 0), player_inventory=[], player_runes=[], journal_seq=0)
+    journal = nn.SaveJournal(snapshot_path)
+    journal.reset(save_data)
+    journal.compact(save_data)
+    journal.append(journal.diff(fields(200, 0), {}, {}))
+
+    # Crash mid-append
+    with open(journal.journal_path, "a") as f:
+        f.write('{"fields":{"player_gems":3')
+
+    assert nn.SaveJournal.load(snapshot_path)["player_gems"] == 200
+    save_changes(nn, snapshot_path, 500, 12345)
+    save_changes(nn, snapshot_path, 600, 12345)
+
+    loaded = nn.SaveJournal.load(snapshot_path)
+    assert (loaded["player_gems"], loaded["player_cash"]) == (600, 12345)
+
+
+def test_failed_append_forces_a_full_snapshot(nn, tmp_path):
+    snapshot_path = str(tmp_path / "player_tester.json")
+    save_data = dict(fields(100, 0), player_inventory=[], player_runes=[], journal_seq=0)
+    journal = nn.SaveJournal(snapshot_path)
+    journal.reset(save_data)
+    journal.compact(save_data)
+
+    line = journal.diff(fields(200, 0), {}, {})
+    journal_path = journal.journal_path
+    journal.journal_path = str(tmp_path / "missing" / "player_tester.journal")  # Any write error
+    with pytest.raises(OSError):
+        journal.append(line)
+    assert not journal.ready
+
+    # The mirror already holds the lost line, so the snapshot that follows covers it
+    journal.journal_path = journal_path
+    journal.compact(journal.compact_data())
+    assert nn.SaveJournal.load(snapshot_path)["player_gems"] == 200
+
+
+def unit_changes(units):
+    return {uid: None if unit is None else dict(unit) for uid, unit in units.take_unsaved().items()}
+
+
+def test_removing_a_unit_journals_only_that_unit(nn, tmp_path):
+    snapshot_path = str(tmp_path / "player_tester.json")
+    units = nn.UnitInventory({"entity_id": "Ghoul", "level": level, "exp": 0} for level in range(1, 51))
+    save_data = dict(fields(100, 0), player_inventory=[dict(unit) for unit in units], player_runes=[], journal_seq=0)
+    units.take_unsaved()
+    journal = nn.SaveJournal(snapshot_path)
+    journal.reset(save_data)
+    journal.compact(save_data)
+
+    units.pop(3)
+    units[10]["level"] = 99
+    units.mark(units[10])
+    units.append({"entity_id": "Wraith", "level": 1, "exp": 0})
+    line = journal.diff(fields(100, 0), unit_changes(units), {})
+    journal.append(line)
+
+    entry = json.loads(line)["units"]
+    assert entry["removed"] == [3]
+    assert [unit["uid"] for unit in entry["changed"]] == [11, 50]
+    assert journal.diff(fields(100, 0), unit_changes(units), {}) is None
+    assert nn.SaveJournal.load(snapshot_path)["player_inventory"] == list(units)
+    assert nn.SaveJournal.load(snapshot_path, lazy=True)["player_inventory"].count == len(units)
+
+
+def test_position_journal_from_before_uids_still_replays(nn):
+    units = [{"entity_id": "Ghoul", "level": level} for level in range(1, 6)]
+    entries = [
+        {"units": {"count": 4, "set": {"1": {"entity_id": "Ghoul", "level": 20}}}},
+        # The first save after uids are numbered by position, as loaded
+        {"units": {"count": 4, "changed": [{"entity_id": "Wraith", "level": 1, "uid": 5}], "removed": [0]}},
+    ]
+
+    replayed = nn.replay_unit_changes(units, entries)
+
+    assert [(unit["uid"], unit["level"]) for unit in replayed] == [(1, 20), (2, 3), (3, 4), (5, 1)]